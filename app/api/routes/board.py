@@ -0,0 +1,182 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Annotated, Any, Optional
+from app.schemas.flight import FlightListItemSchema, FlightListResponseSchema
+from app.schemas.error import ErrorResponseSchema
+from app.core.config import Settings
+from app.core.dependencies import get_query_index, get_settings, rate_limit
+from app.services.query_index import FlightQueryIndex
+from opentelemetry import trace
+from prometheus_client import Counter
+import re
+
+BOARD_REQUESTS = Counter(
+    'board_api_requests_total',
+    'Airport and airline flight listing requests',
+    ['status', 'endpoint']
+)
+
+AIRPORT_ICAO = re.compile(r'^[A-Z0-9]{4}$')
+
+router = APIRouter(prefix="/v1", tags=["boards"])
+tracer = trace.get_tracer(__name__)
+
+RESPONSES = {
+    400: {"model": ErrorResponseSchema},
+    429: {"model": ErrorResponseSchema}
+}
+
+StatusFilter = Annotated[Optional[str], Query(alias="status", description="Only flights with this status")]
+MinDelay = Annotated[Optional[int], Query(ge=0, description="Only flights delayed at least this many minutes")]
+Offset = Annotated[int, Query(ge=0, description="Matches to skip")]
+Limit = Annotated[int, Query(ge=1, description="Flights per page, at most QUERY_MAX_LIMIT")]
+
+
+def _list_flights(
+    index: FlightQueryIndex,
+    settings: Settings,
+    endpoint: str,
+    order_by: str,
+    offset: int,
+    limit: int,
+    **filters: Any
+) -> FlightListResponseSchema:
+    if limit > settings.QUERY_MAX_LIMIT:
+        BOARD_REQUESTS.labels(status="invalid_limit", endpoint=endpoint).inc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit may be at most {settings.QUERY_MAX_LIMIT}"
+        )
+    page, total = index.query(order_by=order_by, offset=offset, limit=limit, **filters)
+    BOARD_REQUESTS.labels(status="success", endpoint=endpoint).inc()
+    return FlightListResponseSchema(
+        total=total,
+        offset=offset,
+        limit=limit,
+        results=[FlightListItemSchema(flight_icao=e.flight_icao, data=e.flight) for e in page],
+    )
+
+def _airport_code(code: str, endpoint: str) -> str:
+    code = code.upper()
+    if not AIRPORT_ICAO.match(code):
+        BOARD_REQUESTS.labels(status="invalid_format", endpoint=endpoint).inc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid ICAO airport code format"
+        )
+    return code
+
+@router.get("/airports/{code}/departures", response_model=FlightListResponseSchema, responses=RESPONSES)
+async def get_airport_departures(
+    code: str,
+    index: Annotated[FlightQueryIndex, Depends(get_query_index)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    flight_status: StatusFilter = None,
+    min_delay: MinDelay = None,
+    offset: Offset = 0,
+    limit: Limit = 50
+):
+    """
+    List held flights departing an airport, by scheduled departure time.
+
+    Served only from flights this worker already holds (cached lookups and
+    ingested snapshots); never calls the upstream API.
+
+    Parameters:
+        code: ICAO airport code
+        flight_status: Optional status filter, e.g. `active`
+        min_delay: Optional minimum departure delay in minutes
+        offset: Matches to skip
+        limit: Page size, at most QUERY_MAX_LIMIT
+
+    Returns:
+        FlightListResponseSchema: One page of matches and the total
+
+    Raises:
+        HTTPException: For an invalid airport code or limit
+    """
+    with tracer.start_as_current_span("get_airport_departures") as span:
+        span.set_attribute("airport.icao", code)
+        code = _airport_code(code, "get_airport_departures")
+        return _list_flights(
+            index, settings, "get_airport_departures", "departure_time", offset, limit,
+            departure=code, flight_status=flight_status, min_delay=min_delay
+        )
+
+@router.get("/airports/{code}/arrivals", response_model=FlightListResponseSchema, responses=RESPONSES)
+async def get_airport_arrivals(
+    code: str,
+    index: Annotated[FlightQueryIndex, Depends(get_query_index)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    flight_status: StatusFilter = None,
+    min_delay: MinDelay = None,
+    offset: Offset = 0,
+    limit: Limit = 50
+):
+    """
+    List held flights arriving at an airport, by scheduled arrival time.
+
+    Served only from flights this worker already holds; never calls the
+    upstream API.
+
+    Parameters:
+        code: ICAO airport code
+        flight_status: Optional status filter, e.g. `landed`
+        min_delay: Optional minimum departure delay in minutes
+        offset: Matches to skip
+        limit: Page size, at most QUERY_MAX_LIMIT
+
+    Returns:
+        FlightListResponseSchema: One page of matches and the total
+
+    Raises:
+        HTTPException: For an invalid airport code or limit
+    """
+    with tracer.start_as_current_span("get_airport_arrivals") as span:
+        span.set_attribute("airport.icao", code)
+        code = _airport_code(code, "get_airport_arrivals")
+        return _list_flights(
+            index, settings, "get_airport_arrivals", "arrival_time", offset, limit,
+            arrival=code, flight_status=flight_status, min_delay=min_delay
+        )
+
+@router.get("/airlines/{name}/flights", response_model=FlightListResponseSchema, responses=RESPONSES)
+async def get_airline_flights(
+    name: str,
+    index: Annotated[FlightQueryIndex, Depends(get_query_index)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    flight_status: StatusFilter = None,
+    min_delay: MinDelay = None,
+    offset: Offset = 0,
+    limit: Limit = 50
+):
+    """
+    List held flights of an airline, by scheduled departure time.
+
+    Served only from flights this worker already holds; never calls the
+    upstream API.
+
+    Parameters:
+        name: Airline name as the upstream reports it (case-insensitive)
+        flight_status: Optional status filter, e.g. `active`
+        min_delay: Optional minimum departure delay in minutes
+        offset: Matches to skip
+        limit: Page size, at most QUERY_MAX_LIMIT
+
+    Returns:
+        FlightListResponseSchema: One page of matches and the total
+
+    Raises:
+        HTTPException: For a blank airline name or an invalid limit
+    """
+    with tracer.start_as_current_span("get_airline_flights") as span:
+        span.set_attribute("airline.name", name)
+        if not name.strip():
+            BOARD_REQUESTS.labels(status="invalid_format", endpoint="get_airline_flights").inc()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Airline name is required")
+        return _list_flights(
+            index, settings, "get_airline_flights", "departure_time", offset, limit,
+            airline=name, flight_status=flight_status, min_delay=min_delay
+        )
@@ -1,15 +1,43 @@
-import json
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from fastapi.responses import JSONResponse
-from typing import Annotated
-from app.services.flight_service import FlightService
-from app.schemas.flight import FlightDataResponseSchema
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Annotated, AsyncIterator, Dict, Optional, Tuple
+from app.services.flight_service import FlightLeg, FlightLookup, FlightService
+from app.schemas.flight import (
+    FlightBatchRequestSchema,
+    FlightBatchResponseSchema,
+    FLIGHT_FIELDS,
+    FlightDataResponseSchema,
+    FlightLegsResponseSchema,
+    FlightPositionItemSchema,
+    FlightPositionsResponseSchema,
+    FlightTrackResponseSchema,
+    LiveDataSchema,
+    normalize_fields,
+)
 from app.schemas.error import ErrorResponseSchema
-from app.core.dependencies import get_flight_service, rate_limit
+from app.core.config import Settings
+from app.core.dependencies import (
+    get_flight_service,
+    get_geo_index,
+    get_live_stream,
+    get_refresh_scheduler,
+    get_request_timeout,
+    get_settings,
+    get_trajectories,
+    rate_limit,
+)
+from app.services.geo_index import FlightGeoIndex
+from app.services.live_stream import LiveStreamHub
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.trajectory import TrajectoryStore
+from app.core.serialization import JSONBytesResponse, dumps, loads
 from app.core.logging import logger
-# from app.core.cache import Cache
+from app.core.retry import deadline_scope
+from contextlib import aclosing
+from datetime import date, datetime, timezone
 from opentelemetry import trace
 from prometheus_client import Counter, Histogram
+import base64
 import time
 
 # Metrics
@@ -24,16 +52,530 @@ RESPONSE_TIME = Histogram(
     ['endpoint']
 )
 
+BATCH_ITEM_STATUS = {
+    status.HTTP_200_OK: "success",
+    status.HTTP_400_BAD_REQUEST: "invalid_format",
+    status.HTTP_404_NOT_FOUND: "not_found",
+    status.HTTP_429_TOO_MANY_REQUESTS: "rate_limited",
+}
+
 router = APIRouter(prefix="/v1/flights", tags=["flights"])
 tracer = trace.get_tracer(__name__)
 
+@router.post(
+    "/batch",
+    response_model=FlightBatchResponseSchema,
+    responses={
+        200: {"model": FlightBatchResponseSchema},
+        400: {"model": ErrorResponseSchema},
+        429: {"model": ErrorResponseSchema}
+    }
+)
+async def get_flight_batch(
+    payload: FlightBatchRequestSchema,
+    service: Annotated[FlightService, Depends(get_flight_service)],
+    timeout: Annotated[float, Depends(get_request_timeout)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    scheduler: Annotated[Optional[RefreshScheduler], Depends(get_refresh_scheduler)]
+):
+    """
+    Fetch and format flight data for several flights in one request.
+    
+    Parameters:
+        payload: ICAO flight identifiers to look up
+        
+    Returns:
+        FlightBatchResponseSchema: One result per unique ICAO, each with its own status
+        
+    Raises:
+        HTTPException: When the batch exceeds BATCH_MAX_ITEMS
+        
+    With `fields`, each item's `data` only carries those flight fields.
+    """
+    start_time = time.time()
+    
+    try:
+        with tracer.start_as_current_span("get_flight_batch") as span, deadline_scope(timeout):
+            span.set_attribute("flight.batch_requested", len(payload.flight_icaos))
+            
+            if len(payload.flight_icaos) > service.settings.BATCH_MAX_ITEMS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"A batch may contain at most {service.settings.BATCH_MAX_ITEMS} flights"
+                )
+
+            results = await service.get_flights(payload.flight_icaos)
+            for item in results:
+                item_status = "cache_hit" if item.cache_tier else BATCH_ITEM_STATUS.get(item.status_code, "error")
+                FLIGHT_REQUESTS.labels(status=item_status, endpoint="get_flight_batch").inc()
+                if scheduler and item.data:
+                    scheduler.track(item.flight_icao, item.data)
+            response = FlightBatchResponseSchema(results=results)
+            if payload.fields:
+                omitted = set(FLIGHT_FIELDS) - set(payload.fields)
+                return JSONBytesResponse(dumps(
+                    response.model_dump(mode="json", exclude={"results": {"__all__": {"data": omitted}}})
+                ))
+            return response
+    finally:
+        RESPONSE_TIME.labels(endpoint="get_flight_batch").observe(time.time() - start_time)
+
+
+async def _open_live_stream(
+    flight_icao: str,
+    service: FlightService,
+    hub: LiveStreamHub,
+    timeout: float
+) -> LiveDataSchema:
+    """Validate a stream request and return the current position to send first."""
+    if not service.validate_flight_icao(flight_icao):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid ICAO flight identifier format"
+        )
+    if hub.subscriber_count >= service.settings.STREAM_MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live stream subscribers"
+        )
+    with deadline_scope(timeout):
+        result = await service.get_flight(flight_icao)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Flight not found")
+    return result.flight.live
+
+async def _live_updates(hub: LiveStreamHub, flight_icao: str, first: LiveDataSchema) -> AsyncIterator[Optional[str]]:
+    """Yield serialized live updates for a flight, and None whenever a heartbeat is due."""
+    async with hub.subscribe(flight_icao, first) as subscription:
+        yield hub.message(flight_icao, first)
+        while True:
+            yield await subscription.next(hub.settings.STREAM_HEARTBEAT_INTERVAL)
+
+async def _sse_events(hub: LiveStreamHub, flight_icao: str, first: LiveDataSchema) -> AsyncIterator[str]:
+    async with aclosing(_live_updates(hub, flight_icao, first)) as updates:
+        async for message in updates:
+            yield f"event: live\ndata: {message}\n\n" if message else ": heartbeat\n\n"
+
+@router.get(
+    "/{flight_icao}/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        400: {"model": ErrorResponseSchema},
+        404: {"model": ErrorResponseSchema},
+        429: {"model": ErrorResponseSchema},
+        503: {"model": ErrorResponseSchema}
+    }
+)
+async def stream_flight_live(
+    flight_icao: str,
+    service: Annotated[FlightService, Depends(get_flight_service)],
+    hub: Annotated[LiveStreamHub, Depends(get_live_stream)],
+    timeout: Annotated[float, Depends(get_request_timeout)],
+    rate_limiter: Annotated[None, Depends(rate_limit)]
+):
+    """
+    Stream live position updates for a flight as server-sent events.
+    
+    Parameters:
+        flight_icao: ICAO flight identifier
+        
+    Returns:
+        StreamingResponse: `live` events carrying LiveDataSchema updates, with
+        heartbeat comments every STREAM_HEARTBEAT_INTERVAL seconds
+        
+    Raises:
+        HTTPException: For an invalid or unknown flight, or when the worker is at STREAM_MAX_SUBSCRIBERS
+    """
+    flight_icao = flight_icao.upper()
+    with tracer.start_as_current_span("stream_flight_live") as span:
+        span.set_attribute("flight.icao", flight_icao)
+        first = await _open_live_stream(flight_icao, service, hub, timeout)
+    FLIGHT_REQUESTS.labels(status="success", endpoint="stream_flight_live").inc()
+    return StreamingResponse(
+        _sse_events(hub, flight_icao, first),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{flight_icao}/stream")
+async def stream_flight_live_ws(
+    websocket: WebSocket,
+    flight_icao: str,
+    service: Annotated[FlightService, Depends(get_flight_service)],
+    hub: Annotated[LiveStreamHub, Depends(get_live_stream)]
+):
+    """
+    Stream live position updates for a flight over a WebSocket. Each message
+    is a JSON live update, or `{"heartbeat": true}` on quiet periods.
+    """
+    flight_icao = flight_icao.upper()
+    decision = await websocket.app.state.rate_limiter.check(websocket)
+    if not decision.allowed:
+        await websocket.close(code=1008, reason="Rate limit exceeded")
+        return
+    try:
+        first = await _open_live_stream(flight_icao, service, hub, service.settings.REQUEST_DEADLINE)
+    except HTTPException as e:
+        await websocket.close(code=1008 if e.status_code < 500 else 1013, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    FLIGHT_REQUESTS.labels(status="success", endpoint="stream_flight_live_ws").inc()
+    try:
+        async with aclosing(_live_updates(hub, flight_icao, first)) as updates:
+            async for message in updates:
+                await websocket.send_text(message or '{"heartbeat": true}')
+    except WebSocketDisconnect:
+        pass
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def _parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma-separated `fields` query parameter."""
+    if fields is None:
+        return None
+    try:
+        return normalize_fields(fields.split(","))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def _cache_headers(result: FlightLookup, service: FlightService, etag: str) -> Dict[str, str]:
+    """ETag and a Cache-Control max-age matching how long the payload stays fresh."""
+    if result.stale_reason or result.flight.live.estimated:
+        max_age = 0
+    elif result.fresh_until is not None:
+        max_age = max(0, int(result.fresh_until - time.time()))
+    elif service.cache:
+        max_age = service.cache.ttl_for_status(result.flight.flight_status)
+    else:
+        max_age = 0
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+
+NDJSON = "application/x-ndjson"
+
+def _encode_cursor(flight_icao: str, flight_date: Optional[str], offset: int) -> str:
+    raw = dumps({"icao": flight_icao, "date": flight_date, "offset": offset})
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, flight_icao: str, flight_date: Optional[str]) -> int:
+    """Upstream offset a cursor points at; the cursor must come from the same query."""
+    try:
+        state = loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = int(state["offset"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if state.get("icao") != flight_icao or state.get("date") != flight_date or offset < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match this query")
+    return offset
+
+def _next_cursor(last: Optional[FlightLeg], flight_icao: str, flight_date: Optional[str]) -> Optional[str]:
+    if last is None or last.position + 1 >= last.total:
+        return None
+    return _encode_cursor(flight_icao, flight_date, last.position + 1)
+
+async def _ndjson_legs(
+    first: FlightLeg,
+    legs: AsyncIterator[FlightLeg],
+    fields: Optional[Tuple[str, ...]],
+    flight_icao: str,
+    flight_date: Optional[str]
+) -> AsyncIterator[bytes]:
+    """
+    One JSON line per leg as upstream pages arrive. A final `next_cursor` line
+    follows when LEGS_STREAM_MAX_RECORDS cut the stream short, and an `error`
+    line replaces the rest if a later page fails.
+    """
+    include = set(fields) if fields else None
+    last = first
+    async with aclosing(legs):
+        yield dumps(first.flight.model_dump(mode="json", include=include)) + b"\n"
+        try:
+            async for last in legs:
+                yield dumps(last.flight.model_dump(mode="json", include=include)) + b"\n"
+        except HTTPException as e:
+            FLIGHT_REQUESTS.labels(status="stream_error", endpoint="get_flight_legs").inc()
+            yield dumps({"error": {"status_code": e.status_code, "detail": e.detail}}) + b"\n"
+            return
+    if next_cursor := _next_cursor(last, flight_icao, flight_date):
+        yield dumps({"next_cursor": next_cursor}) + b"\n"
+
+@router.get(
+    "/{flight_icao}/legs",
+    response_model=FlightLegsResponseSchema,
+    responses={
+        200: {"content": {NDJSON: {}}},
+        400: {"model": ErrorResponseSchema},
+        429: {"model": ErrorResponseSchema},
+        503: {"model": ErrorResponseSchema}
+    }
+)
+async def get_flight_legs(
+    flight_icao: str,
+    service: Annotated[FlightService, Depends(get_flight_service)],
+    timeout: Annotated[float, Depends(get_request_timeout)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    flight_date: Annotated[Optional[date], Query(alias="date", description="Only legs on this date")] = None,
+    cursor: Annotated[Optional[str], Query(description="next_cursor from the previous page")] = None,
+    limit: Annotated[int, Query(ge=1, description="Legs per page, at most LEGS_PAGE_SIZE")] = 25,
+    fields: Annotated[Optional[str], Query(description="Comma-separated flight fields to return")] = None,
+    accept: Annotated[Optional[str], Header()] = None
+):
+    """
+    List every upstream record matching a flight: codeshares and each day it
+    operates, not just the first match.
+    
+    Parameters:
+        flight_icao: ICAO flight identifier
+        flight_date: Optional date filter (YYYY-MM-DD)
+        cursor: Opaque cursor from a previous page
+        limit: Page size for JSON responses
+        fields: Comma-separated subset of flight fields to return
+        accept: `application/x-ndjson` streams every leg (up to
+            LEGS_STREAM_MAX_RECORDS) as newline-delimited JSON instead of one page
+        
+    Returns:
+        FlightLegsResponseSchema: One page of legs with `next_cursor`, or an NDJSON stream
+        
+    Raises:
+        HTTPException: For an invalid ICAO, fields or cursor, or when the first upstream page fails
+    """
+    flight_icao = flight_icao.upper()
+    with tracer.start_as_current_span("get_flight_legs") as span, deadline_scope(timeout):
+        span.set_attribute("flight.icao", flight_icao)
+        if not service.validate_flight_icao(flight_icao):
+            FLIGHT_REQUESTS.labels(status="invalid_format", endpoint="get_flight_legs").inc()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid ICAO flight identifier format"
+            )
+        projection = _parse_fields(fields)
+        day = flight_date.isoformat() if flight_date else None
+        offset = _decode_cursor(cursor, flight_icao, day) if cursor else 0
+
+        if accept and NDJSON in accept:
+            legs = service.iter_flight_legs(
+                flight_icao, day, offset, service.settings.LEGS_STREAM_MAX_RECORDS, projection, timeout
+            )
+            # Fetch the first page before answering, so upstream errors still get a proper status
+            first = await anext(legs, None)
+            FLIGHT_REQUESTS.labels(status="success", endpoint="get_flight_legs").inc()
+            if first is None:
+                return StreamingResponse(iter(()), media_type=NDJSON)
+            return StreamingResponse(_ndjson_legs(first, legs, projection, flight_icao, day), media_type=NDJSON)
+
+        if limit > service.settings.LEGS_PAGE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"limit may be at most {service.settings.LEGS_PAGE_SIZE}"
+            )
+        legs = [leg async for leg in service.iter_flight_legs(flight_icao, day, offset, limit, projection, timeout)]
+        FLIGHT_REQUESTS.labels(status="success", endpoint="get_flight_legs").inc()
+        response = FlightLegsResponseSchema(
+            flight_icao=flight_icao,
+            flight_date=day,
+            total=legs[-1].total if legs else offset,
+            legs=[leg.flight for leg in legs],
+            next_cursor=_next_cursor(legs[-1] if legs else None, flight_icao, day),
+        )
+        if projection:
+            omitted = set(FLIGHT_FIELDS) - set(projection)
+            return JSONBytesResponse(dumps(response.model_dump(mode="json", exclude={"legs": {"__all__": omitted}})))
+        return response
+
+@router.get(
+    "/{flight_icao}/track",
+    response_model=FlightTrackResponseSchema,
+    responses={
+        400: {"model": ErrorResponseSchema},
+        404: {"model": ErrorResponseSchema},
+        429: {"model": ErrorResponseSchema}
+    }
+)
+async def get_flight_track(
+    flight_icao: str,
+    tracks: Annotated[TrajectoryStore, Depends(get_trajectories)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    since: Annotated[Optional[datetime], Query(description="Only positions updated after this time")] = None,
+    max_points: Annotated[Optional[int], Query(ge=2, description="Downsample to at most this many points")] = None
+):
+    """
+    Return the positions recorded for a flight, oldest first.
+    
+    Every live block the service sees with a newer `updated_time` adds one
+    sample; this endpoint never calls the upstream API.
+    
+    Parameters:
+        flight_icao: ICAO flight identifier
+        since: Optional lower bound on `updated_time`
+        max_points: Evenly thin the track to this many points, keeping the latest
+        
+    Returns:
+        FlightTrackResponseSchema: Samples held and the (downsampled) points
+        
+    Raises:
+        HTTPException: For an invalid ICAO or max_points, or when no track is held
+    """
+    flight_icao = flight_icao.upper()
+    with tracer.start_as_current_span("get_flight_track") as span:
+        span.set_attribute("flight.icao", flight_icao)
+        if not FlightService.validate_flight_icao(flight_icao):
+            FLIGHT_REQUESTS.labels(status="invalid_format", endpoint="get_flight_track").inc()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid ICAO flight identifier format"
+            )
+        if max_points is not None and max_points > settings.TRACK_MAX_POINTS:
+            FLIGHT_REQUESTS.labels(status="invalid_limit", endpoint="get_flight_track").inc()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"max_points may be at most {settings.TRACK_MAX_POINTS}"
+            )
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        recorded = tracks.track(
+            flight_icao, since.timestamp() if since else None, max_points or settings.TRACK_MAX_POINTS
+        )
+        if recorded is None:
+            FLIGHT_REQUESTS.labels(status="not_found", endpoint="get_flight_track").inc()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No track recorded for this flight"
+            )
+        samples, points = recorded
+        FLIGHT_REQUESTS.labels(status="success", endpoint="get_flight_track").inc()
+        return FlightTrackResponseSchema(flight_icao=flight_icao, samples=samples, points=points)
+
+def _check_geo_limit(limit: int, settings: Settings, endpoint: str) -> None:
+    if limit > settings.GEO_MAX_RESULTS:
+        FLIGHT_REQUESTS.labels(status="invalid_limit", endpoint=endpoint).inc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit may be at most {settings.GEO_MAX_RESULTS}"
+        )
+
+@router.get(
+    "/nearby",
+    response_model=FlightPositionsResponseSchema,
+    responses={
+        400: {"model": ErrorResponseSchema},
+        429: {"model": ErrorResponseSchema}
+    }
+)
+async def get_flights_nearby(
+    geo: Annotated[FlightGeoIndex, Depends(get_geo_index)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    lat: Annotated[float, Query(ge=-90, le=90, description="Latitude of the centre")],
+    lon: Annotated[float, Query(ge=-180, le=180, description="Longitude of the centre")],
+    radius_km: Annotated[float, Query(gt=0, description="Radius in km, at most GEO_MAX_RADIUS_KM")],
+    limit: Annotated[int, Query(ge=1, description="Flights to return, at most GEO_MAX_RESULTS")] = 100
+):
+    """
+    List held flights whose last live position is within a radius, nearest first.
+    
+    Served from the in-memory spatial index; never calls the upstream API.
+    
+    Parameters:
+        lat: Latitude of the centre
+        lon: Longitude of the centre
+        radius_km: Great-circle radius in kilometres
+        limit: Maximum flights to return
+        
+    Returns:
+        FlightPositionsResponseSchema: Nearest flights with their distance, and the total in range
+        
+    Raises:
+        HTTPException: For a radius or limit over the configured maximum
+    """
+    with tracer.start_as_current_span("get_flights_nearby") as span:
+        span.set_attribute("geo.radius_km", radius_km)
+        if radius_km > settings.GEO_MAX_RADIUS_KM:
+            FLIGHT_REQUESTS.labels(status="invalid_radius", endpoint="get_flights_nearby").inc()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"radius_km may be at most {settings.GEO_MAX_RADIUS_KM}"
+            )
+        _check_geo_limit(limit, settings, "get_flights_nearby")
+        matches, total = geo.nearby(lat, lon, radius_km, limit)
+        FLIGHT_REQUESTS.labels(status="success", endpoint="get_flights_nearby").inc()
+        return FlightPositionsResponseSchema(
+            total=total,
+            results=[
+                FlightPositionItemSchema(flight_icao=e.flight_icao, distance_km=round(d, 3), data=e.flight)
+                for e, d in matches
+            ],
+        )
+
+@router.get(
+    "/bbox",
+    response_model=FlightPositionsResponseSchema,
+    responses={
+        400: {"model": ErrorResponseSchema},
+        429: {"model": ErrorResponseSchema}
+    }
+)
+async def get_flights_in_bbox(
+    geo: Annotated[FlightGeoIndex, Depends(get_geo_index)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    min_lat: Annotated[float, Query(ge=-90, le=90, description="Southern edge")],
+    min_lon: Annotated[float, Query(ge=-180, le=180, description="Western edge")],
+    max_lat: Annotated[float, Query(ge=-90, le=90, description="Northern edge")],
+    max_lon: Annotated[float, Query(ge=-180, le=180, description="Eastern edge")],
+    limit: Annotated[int, Query(ge=1, description="Flights to return, at most GEO_MAX_RESULTS")] = 100
+):
+    """
+    List held flights whose last live position is inside a map viewport.
+    
+    Served from the in-memory spatial index; never calls the upstream API.
+    
+    Parameters:
+        min_lat: Southern edge
+        min_lon: Western edge; east of `max_lon` for a box across the antimeridian
+        max_lat: Northern edge
+        max_lon: Eastern edge
+        limit: Maximum flights to return
+        
+    Returns:
+        FlightPositionsResponseSchema: Flights in the box by ICAO, and the total inside
+        
+    Raises:
+        HTTPException: For a southern edge north of the northern one, or a limit over GEO_MAX_RESULTS
+    """
+    with tracer.start_as_current_span("get_flights_in_bbox"):
+        if min_lat > max_lat:
+            FLIGHT_REQUESTS.labels(status="invalid_bbox", endpoint="get_flights_in_bbox").inc()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="min_lat may not be greater than max_lat"
+            )
+        _check_geo_limit(limit, settings, "get_flights_in_bbox")
+        matches, total = geo.within_bbox(min_lat, min_lon, max_lat, max_lon, limit)
+        FLIGHT_REQUESTS.labels(status="success", endpoint="get_flights_in_bbox").inc()
+        return FlightPositionsResponseSchema(
+            total=total,
+            results=[FlightPositionItemSchema(flight_icao=e.flight_icao, data=e.flight) for e in matches],
+        )
+
 @router.get(
     "/{flight_icao}",
     response_model=FlightDataResponseSchema,
     responses={
         200: {"model": FlightDataResponseSchema},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         404: {"model": ErrorResponseSchema},
         429: {"model": ErrorResponseSchema},
+        500: {"model": ErrorResponseSchema},
         503: {"model": ErrorResponseSchema}
     }
 )
@@ -41,17 +583,26 @@ async def get_flight_data(
     flight_icao: str,
     response: Response,
     service: Annotated[FlightService, Depends(get_flight_service)],
-    # cache: Annotated[Cache, Depends(get_cache)],
-    rate_limiter: Annotated[None, Depends(rate_limit)]
+    timeout: Annotated[float, Depends(get_request_timeout)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    scheduler: Annotated[Optional[RefreshScheduler], Depends(get_refresh_scheduler)],
+    fields: Annotated[Optional[str], Query(description="Comma-separated flight fields to return")] = None,
+    estimate: Annotated[bool, Query(description="Extrapolate an active flight's position to now")] = False,
+    if_none_match: Annotated[Optional[str], Header()] = None
 ):
     """
     Fetch and format flight data for a specific flight.
     
     Parameters:
         flight_icao: ICAO flight identifier
+        fields: Comma-separated subset of flight fields to return, e.g. `flight_status,delay,gate`
+        estimate: Dead-reckon the live position to now, flagged `live.estimated`
+            with an `error_km` bound; stale cached data is served without a
+            refresh while that bound stays under DEAD_RECKONING_MAX_ERROR_KM
+        if_none_match: ETag from an earlier response; answered with 304 while it still matches
         
     Returns:
-        FlightDataResponseSchema: Formatted flight data
+        FlightDataResponseSchema: Formatted flight data, or an empty 304 when unchanged
         
     Raises:
         HTTPException: For various error conditions with appropriate status codes
@@ -59,17 +610,9 @@ async def get_flight_data(
     start_time = time.time()
     
     try:
-        with tracer.start_as_current_span("get_flight_data") as span:
+        with tracer.start_as_current_span("get_flight_data") as span, deadline_scope(timeout):
             span.set_attribute("flight.icao", flight_icao)
             
-            # Check cache first
-            # cache_key = f"flight:{flight_icao}"
-            # cached_data = await cache.get(cache_key)
-            # if cached_data:
-            #     FLIGHT_REQUESTS.labels(status="cache_hit", endpoint="get_flight_data").inc()
-            #     # response.headers["X-Cache"] = "HIT"
-            #     return JSONResponse(content=json.loads(cached_data))
-
             # Validate ICAO format
             if not service.validate_flight_icao(flight_icao):
                 FLIGHT_REQUESTS.labels(status="invalid_format", endpoint="get_flight_data").inc()
@@ -77,29 +620,45 @@ async def get_flight_data(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid ICAO flight identifier format"
                 )
+            projection = _parse_fields(fields)
 
-            raw_data = await service.fetch_flight_data(flight_icao)
-            if raw_data is None:
+            # Served from cache, or from one upstream call shared by concurrent lookups
+            result = await service.get_flight(flight_icao, estimate=estimate)
+            if result is None:
                 FLIGHT_REQUESTS.labels(status="not_found", endpoint="get_flight_data").inc()
                 return JSONResponse(
                     status_code=status.HTTP_404_NOT_FOUND,
                     content={"detail": "Flight not found"}
                 )
+            if scheduler:
+                scheduler.track(flight_icao, result.flight, result.fresh_until)
 
-            formatted_data = await service.format_flight_data(raw_data)
-            
-            # Cache the result
-            # await cache.set(cache_key, json.dumps(formatted_data.dict()), expire=30)
-            # response.headers["X-Cache"] = "MISS"
-            
-            FLIGHT_REQUESTS.labels(status="success", endpoint="get_flight_data").inc()
-            return {"status": True, "data": formatted_data}
+            if result.cache_tier:
+                FLIGHT_REQUESTS.labels(status="cache_hit", endpoint="get_flight_data").inc()
+                response.headers["X-Cache"] = "STALE" if result.stale_reason else "HIT"
+                response.headers["X-Cache-Tier"] = result.cache_tier
+                response.headers["Age"] = str(int(result.age))
+                if result.stale_reason:
+                    response.headers["X-Cache-Stale-Reason"] = result.stale_reason
+                    response.headers["X-Cache-Staleness"] = str(int(result.staleness))
+            else:
+                FLIGHT_REQUESTS.labels(status="success", endpoint="get_flight_data").inc()
+                response.headers["X-Cache"] = "MISS"
+
+            # Cached and indexed flights carry their serialized body and memoized projections
+            body, etag = service.encode(result, projection)
+            response.headers.update(_cache_headers(result, service, etag))
+            if _etag_matches(if_none_match, etag):
+                FLIGHT_REQUESTS.labels(status="not_modified", endpoint="get_flight_data").inc()
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers))
+            return JSONBytesResponse(body, headers=dict(response.headers))
 
     except HTTPException:
         raise
-    except Exception as e:
+    except Exception:
+        # Left to the global handler: a plain 500 without cache headers or exception text
         logger.exception("Unexpected error in get_flight_data")
         FLIGHT_REQUESTS.labels(status="error", endpoint="get_flight_data").inc()
-        return {"status": False, "data": None, "error": str(e)}
+        raise
     finally:
         RESPONSE_TIME.labels(endpoint="get_flight_data").observe(time.time() - start_time)
\ No newline at end of file
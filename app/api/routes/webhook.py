@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from typing import Annotated, List, Optional
+import httpx
+from app.schemas.error import ErrorResponseSchema
+from app.schemas.webhook import WebhookSubscriptionRequestSchema, WebhookSubscriptionSchema
+from app.core.dependencies import get_caller, get_webhook_service, rate_limit
+from app.services.flight_service import FlightService
+from app.services.webhook_dispatcher import UnsafeWebhookTarget, check_webhook_target
+from app.services.webhook_service import WebhookService
+from opentelemetry import trace
+from prometheus_client import Counter
+
+WEBHOOK_REQUESTS = Counter(
+    'webhook_api_requests_total',
+    'Webhook subscription API requests',
+    ['status', 'endpoint']
+)
+
+router = APIRouter(prefix="/v1/webhooks", tags=["webhooks"])
+tracer = trace.get_tracer(__name__)
+
+@router.post(
+    "",
+    response_model=WebhookSubscriptionSchema,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        400: {"model": ErrorResponseSchema},
+        429: {"model": ErrorResponseSchema},
+        503: {"model": ErrorResponseSchema}
+    }
+)
+async def create_webhook(
+    payload: WebhookSubscriptionRequestSchema,
+    webhooks: Annotated[WebhookService, Depends(get_webhook_service)],
+    caller: Annotated[str, Depends(get_caller)],
+    rate_limiter: Annotated[None, Depends(rate_limit)]
+):
+    """
+    Register a webhook that receives a flight's field-level changes.
+
+    Parameters:
+        payload: Flight to watch, endpoint URL, watched fields and optional signing secret
+
+    Returns:
+        WebhookSubscriptionSchema: The created subscription, owned by the calling
+        API key or client IP
+
+    Raises:
+        HTTPException: For an invalid ICAO, a URL that is not allowed or does not
+            resolve to public addresses, or when WEBHOOK_MAX_SUBSCRIPTIONS is reached
+    """
+    with tracer.start_as_current_span("create_webhook") as span:
+        span.set_attribute("flight.icao", payload.flight_icao)
+        if not FlightService.validate_flight_icao(payload.flight_icao):
+            WEBHOOK_REQUESTS.labels(status="invalid_format", endpoint="create_webhook").inc()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid ICAO flight identifier format"
+            )
+        try:
+            await check_webhook_target(str(payload.url), webhooks.settings)
+        except UnsafeWebhookTarget as e:
+            WEBHOOK_REQUESTS.labels(status="unsafe_url", endpoint="create_webhook").inc()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if len(await webhooks.subscriptions()) >= webhooks.settings.WEBHOOK_MAX_SUBSCRIPTIONS:
+            WEBHOOK_REQUESTS.labels(status="full", endpoint="create_webhook").inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Webhook subscription limit reached"
+            )
+        subscription = await webhooks.subscribe(payload, caller)
+        WEBHOOK_REQUESTS.labels(status="success", endpoint="create_webhook").inc()
+        return subscription
+
+def _origin(url: str) -> str:
+    """Scheme, host and port of a URL, without credentials, path or query."""
+    parsed = httpx.URL(url)
+    return f"{parsed.scheme}://{parsed.netloc.decode()}"
+
+@router.get("", response_model=List[WebhookSubscriptionSchema])
+async def list_webhooks(
+    webhooks: Annotated[WebhookService, Depends(get_webhook_service)],
+    caller: Annotated[str, Depends(get_caller)],
+    rate_limiter: Annotated[None, Depends(rate_limit)],
+    flight_icao: Annotated[Optional[str], Query(description="Only subscriptions for this flight")] = None
+):
+    """
+    List the caller's webhook subscriptions.
+
+    Parameters:
+        flight_icao: Optional ICAO flight identifier to filter by
+
+    Returns:
+        List[WebhookSubscriptionSchema]: Matching subscriptions, without their
+        secrets and with URLs cut down to their origin
+    """
+    WEBHOOK_REQUESTS.labels(status="success", endpoint="list_webhooks").inc()
+    return [
+        WebhookSubscriptionSchema.model_validate({**s.model_dump(exclude={"secret", "owner"}), "url": _origin(s.url)})
+        for s in await webhooks.subscriptions(flight_icao, owner=caller)
+    ]
+
+@router.delete(
+    "/{subscription_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={404: {"model": ErrorResponseSchema}}
+)
+async def delete_webhook(
+    subscription_id: str,
+    webhooks: Annotated[WebhookService, Depends(get_webhook_service)],
+    caller: Annotated[str, Depends(get_caller)],
+    rate_limiter: Annotated[None, Depends(rate_limit)]
+):
+    """
+    Remove a webhook subscription.
+
+    Parameters:
+        subscription_id: Subscription identifier returned on creation
+
+    Raises:
+        HTTPException: When the subscription does not exist or belongs to another caller
+    """
+    if not await webhooks.unsubscribe(subscription_id, caller):
+        WEBHOOK_REQUESTS.labels(status="not_found", endpoint="delete_webhook").inc()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook subscription not found")
+    WEBHOOK_REQUESTS.labels(status="success", endpoint="delete_webhook").inc()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,71 @@
+from typing import List
+import hashlib
+import math
+import struct
+
+_HEADER = struct.Struct("<4sQdQ")
+_MAGIC = b"BLM1"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings, sized for `capacity` items at a
+    false-positive rate of `error_rate`. Positions come from one blake2b
+    digest split into two hashes (Kirsch-Mitzenmacher double hashing), so
+    an item costs a single hash however many probes the filter uses.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def __len__(self) -> int:
+        """Items added (approximately: an item whose bits were all already set is not counted)."""
+        return self.count
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add an item, returning whether it was (as far as the filter can tell) new."""
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self._bits[p >> 3] & mask:
+                self._bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, self.capacity, self.error_rate, self.count) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """Restore a filter saved with `to_bytes`; raises ValueError if the data is not one."""
+        if len(data) < _HEADER.size:
+            raise ValueError("Truncated Bloom filter")
+        magic, capacity, error_rate, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a Bloom filter")
+        bloom = cls(capacity, error_rate)
+        bits = data[_HEADER.size:]
+        if len(bits) != len(bloom._bits):
+            raise ValueError("Bloom filter size does not match its parameters")
+        bloom._bits[:] = bits
+        bloom.count = count
+        return bloom
+
+    def _positions(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
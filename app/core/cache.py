@@ -1,27 +1,360 @@
-# from typing import Any, Optional
-# from redis import asyncio as aioredis  # This is the modern way to use async Redis
-# from app.core.config import Settings
-# import json
-
-# class Cache:
-#     def __init__(self, settings: Settings):
-#         self.redis = aioredis.from_url(
-#             settings.REDIS_URL,
-#             encoding="utf-8",
-#             decode_responses=True
-#         )
-
-#     async def get(self, key: str) -> Optional[Any]:
-#         return await self.redis.get(key)
-
-#     async def set(
-#         self,
-#         key: str,
-#         value: Any,
-#         expire: int = 300
-#     ) -> bool:
-#         value = json.dumps(value)
-#         return await self.redis.set(key, value, ex=expire)
-
-#     async def close(self):
-#         await self.redis.close()
\ No newline at end of file
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import math
+import time
+import uuid
+from redis import asyncio as aioredis  # This is the modern way to use async Redis
+from redis.exceptions import RedisError
+from prometheus_client import Counter, Gauge
+from app.core.config import Settings
+from app.core.logging import logger
+from app.core.serialization import dumps, encode_flight, loads
+from app.schemas.flight import FlightDataResponseSchema
+
+CACHE_REQUESTS = Counter(
+    'flight_cache_requests_total',
+    'Cache lookups by tier and result',
+    ['tier', 'result']
+)
+CACHE_EVICTIONS = Counter(
+    'flight_cache_evictions_total',
+    'Entries removed from the in-process cache',
+    ['reason']
+)
+NEGATIVE_CACHE_LOOKUPS = Counter(
+    'flight_cache_negative_lookups_total',
+    'Checks for a cached upstream "not found" by tier and result',
+    ['tier', 'result']
+)
+L1_ENTRIES = Gauge('flight_cache_l1_entries', 'Entries held in the in-process cache')
+L1_BYTES = Gauge('flight_cache_l1_bytes', 'Approximate bytes held in the in-process cache')
+
+FINAL_STATUSES = {"LANDED", "CANCELLED"}
+
+
+def ttl_for_status(settings: Settings, flight_status: Optional[str]) -> int:
+    """Pick a cache TTL from how quickly a flight in this status changes."""
+    if flight_status in FINAL_STATUSES:
+        return settings.CACHE_TTL_FINAL
+    if flight_status == "ACTIVE":
+        return settings.CACHE_TTL_ACTIVE
+    if flight_status == "SCHEDULED":
+        return settings.CACHE_TTL_SCHEDULED
+    return settings.CACHE_TTL_DEFAULT
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class CacheResult(NamedTuple):
+    value: Optional[str]
+    tier: Optional[str]
+
+
+class CachedFlight(NamedTuple):
+    flight: FlightDataResponseSchema
+    tier: str
+    cached_at: float
+    fresh_until: float
+    etag: Optional[str] = None
+    body: Optional[bytes] = None
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.cached_at)
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL and a memory budget.
+    Values are strings, or decoded objects stored with the size of their
+    serialized form.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            CACHE_EVICTIONS.labels(reason="expired").inc()
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, size: Optional[int] = None) -> None:
+        self._remove(key)
+        size = len(key) + (len(value) if size is None else size)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            CACHE_EVICTIONS.labels(reason="capacity").inc()
+        self._update_gauges()
+
+    def delete(self, key: str) -> None:
+        self._remove(key)
+        self._update_gauges()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+    def _update_gauges(self) -> None:
+        L1_ENTRIES.set(len(self._entries))
+        L1_BYTES.set(self.size_bytes)
+
+
+class Cache:
+    """Two-tier cache: in-process LRU (L1) in front of Redis (L2).
+
+    Redis failures are logged and Redis is skipped for
+    CACHE_REDIS_RETRY_INTERVAL seconds, so lookups keep working from L1.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.redis = aioredis.from_url(
+            settings.REDIS_URL,
+            encoding="utf-8",
+            decode_responses=True,
+            socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+            socket_timeout=settings.CACHE_REDIS_TIMEOUT,
+        )
+        self.local = LocalCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_MAX_BYTES)
+        self._redis_retry_at = 0.0
+        # Each is called with (flight_icao, flight, expires_at) whenever a flight enters L1
+        self.flight_listeners: List[Callable[[str, FlightDataResponseSchema, float], None]] = []
+
+    async def _redis_call(self, method: str, *args, **kwargs) -> Any:
+        return await self._guarded(lambda: getattr(self.redis, method)(*args, **kwargs))
+
+    async def _guarded(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            return await call()
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            self._redis_retry_at = time.monotonic() + self.settings.CACHE_REDIS_RETRY_INTERVAL
+            logger.warning("Redis unavailable, using in-process cache only: %s", e)
+            return None
+
+    @property
+    def redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_retry_at
+
+    async def lookup(self, key: str) -> CacheResult:
+        """Look a key up in L1, then L2, recording hit/miss per tier."""
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_REQUESTS.labels(tier="l1", result="hit").inc()
+            return CacheResult(value, "L1")
+        CACHE_REQUESTS.labels(tier="l1", result="miss").inc()
+
+        value = await self._redis_call("get", key)
+        if value is not None:
+            CACHE_REQUESTS.labels(tier="l2", result="hit").inc()
+            return CacheResult(value, "L2")
+        CACHE_REQUESTS.labels(tier="l2", result="miss").inc()
+        return CacheResult(None, None)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the decoded value stored under `key` by `set`, or None."""
+        value = (await self.lookup(key)).value
+        return None if value is None else loads(value)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        expire: int = 300
+    ) -> bool:
+        """Store `value` as JSON in both tiers for `expire` seconds."""
+        value = dumps(value)
+        self.local.set(key, value, expire)
+        return bool(await self._redis_call("set", key, value, ex=expire))
+
+    async def delete(self, key: str) -> None:
+        self.local.delete(key)
+        await self._redis_call("delete", key)
+
+    @staticmethod
+    def flight_key(flight_icao: str) -> str:
+        return f"flight:{flight_icao.upper()}"
+
+    @staticmethod
+    def missing_key(flight_icao: str) -> str:
+        return f"missing:{flight_icao.upper()}"
+
+    def ttl_for_status(self, flight_status: Optional[str]) -> int:
+        return ttl_for_status(self.settings, flight_status)
+
+    async def get_flight(self, flight_icao: str) -> Optional[CachedFlight]:
+        """
+        Return a cached formatted flight and the tier it came from. L1 holds
+        entries already decoded, with their response body, so hits there do
+        no parsing at all.
+        """
+        key = self.flight_key(flight_icao)
+        entry = self.local.get(key)
+        if entry is not None:
+            CACHE_REQUESTS.labels(tier="l1", result="hit").inc()
+            return entry
+        CACHE_REQUESTS.labels(tier="l1", result="miss").inc()
+
+        value = await self._redis_call("get", key)
+        if value is None:
+            CACHE_REQUESTS.labels(tier="l2", result="miss").inc()
+            return None
+        CACHE_REQUESTS.labels(tier="l2", result="hit").inc()
+        try:
+            envelope: Dict[str, Any] = loads(value)
+            flight = FlightDataResponseSchema.model_validate(envelope["flight"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Discarding unreadable cache entry %s", key)
+            await self.delete(key)
+            return None
+        expires_at = envelope.get("expires_at", 0)
+        encoded = encode_flight(flight)
+        cached = CachedFlight(
+            flight,
+            "L1",
+            envelope.get("cached_at", time.time()),
+            envelope.get("fresh_until", expires_at),
+            encoded.etag,
+            encoded.body,
+        )
+        self.local.set(key, cached, expires_at - time.time(), size=len(value))
+        for listener in self.flight_listeners:
+            listener(flight_icao, flight, expires_at)
+        return cached._replace(tier="L2")
+
+    async def set_flight(
+        self,
+        flight_icao: str,
+        flight: FlightDataResponseSchema,
+        fresh_for: Optional[float] = None
+    ) -> None:
+        """
+        Cache a formatted flight. It is fresh for `fresh_for` seconds, or a TTL
+        chosen from its status, and kept for a further stale window so it can
+        be served while it is revalidated or while the upstream is failing.
+        The response body and its ETag are serialized here, once per payload,
+        and kept with the L1 entry.
+        """
+        now = time.time()
+        ttl = self.ttl_for_status(flight.flight_status) if fresh_for is None else fresh_for
+        stale_window = max(self.settings.CACHE_STALE_WHILE_REVALIDATE, self.settings.CACHE_STALE_IF_ERROR)
+        encoded = encode_flight(flight)
+        key = self.flight_key(flight_icao)
+        expire = math.ceil(ttl + stale_window)
+        value = dumps({
+            "cached_at": now,
+            "fresh_until": now + ttl,
+            "expires_at": now + ttl + stale_window,
+            "flight": flight.model_dump(mode="json"),
+        }).decode()
+        self.local.set(
+            key, CachedFlight(flight, "L1", now, now + ttl, encoded.etag, encoded.body), expire, size=len(value)
+        )
+        self.local.delete(self.missing_key(flight_icao))
+        for listener in self.flight_listeners:
+            listener(flight_icao, flight, now + ttl + stale_window)
+        await self._redis_call("set", key, value, ex=expire)
+
+    async def set_flight_missing(self, flight_icao: str) -> None:
+        """Remember for CACHE_NEGATIVE_TTL seconds that the upstream has no such flight."""
+        ttl = self.settings.CACHE_NEGATIVE_TTL
+        if ttl <= 0:
+            return
+        key = self.missing_key(flight_icao)
+        expires_at = time.time() + ttl
+        self.local.set(key, str(expires_at), ttl)
+        await self._redis_call("set", key, str(expires_at), px=int(ttl * 1000))
+
+    async def is_flight_missing(self, flight_icao: str) -> bool:
+        """Whether the upstream recently reported this flight as not found, here or on another worker."""
+        key = self.missing_key(flight_icao)
+        if self.local.get(key) is not None:
+            NEGATIVE_CACHE_LOOKUPS.labels(tier="l1", result="hit").inc()
+            return True
+        value = await self._redis_call("get", key)
+        if value is None:
+            NEGATIVE_CACHE_LOOKUPS.labels(tier="l2", result="miss").inc()
+            return False
+        self.local.set(key, value, float(value) - time.time())
+        NEGATIVE_CACHE_LOOKUPS.labels(tier="l2", result="hit").inc()
+        return True
+
+    def register_script(self, script: str) -> Any:
+        return self.redis.register_script(script)
+
+    async def run_script(self, script: Any, keys: List[str], args: List[Any]) -> Any:
+        """Run a registered Lua script (EVALSHA), or return None if Redis is unavailable."""
+        return await self._guarded(lambda: script(keys=keys, args=args))
+
+    async def get_shared(self, key: str) -> Optional[str]:
+        """Read worker-shared state straight from Redis, bypassing L1."""
+        return await self._redis_call("get", key)
+
+    async def set_shared(self, key: str, value: str, ttl: float) -> None:
+        await self._redis_call("set", key, value, px=int(ttl * 1000))
+
+    async def delete_shared(self, key: str) -> None:
+        await self._redis_call("delete", key)
+
+    async def get_shared_hash(self, key: str) -> Optional[Dict[str, str]]:
+        """Read a worker-shared Redis hash, or None if Redis is unavailable."""
+        return await self._redis_call("hgetall", key)
+
+    async def set_shared_field(self, key: str, field: str, value: str) -> None:
+        await self._redis_call("hset", key, field, value)
+
+    async def delete_shared_field(self, key: str, field: str) -> None:
+        await self._redis_call("hdel", key, field)
+
+    async def publish(self, channel: str, message: str) -> Optional[int]:
+        """Publish to a Redis channel, returning the receiver count or None if Redis is unavailable."""
+        return await self._redis_call("publish", channel, message)
+
+    def pubsub(self) -> Any:
+        return self.redis.pubsub()
+
+    async def acquire_lock(self, name: str, ttl: float) -> Optional[str]:
+        """Take a Redis lock, returning its owner token or None if it is held."""
+        token = uuid.uuid4().hex
+        if await self._redis_call("set", name, token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    async def release_lock(self, name: str, token: str) -> None:
+        await self._redis_call("eval", RELEASE_LOCK_SCRIPT, 1, name, token)
+
+    async def lock_held(self, name: str) -> bool:
+        return bool(await self._redis_call("exists", name))
+
+    async def close(self):
+        await self.redis.aclose()
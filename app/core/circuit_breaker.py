@@ -0,0 +1,170 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Deque, List, Optional
+import time
+from prometheus_client import Counter, Gauge
+from app.core.cache import Cache
+from app.core.config import Settings
+from app.core.logging import logger
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = Gauge(
+    'circuit_breaker_state',
+    'Circuit breaker state (0=closed, 1=half-open, 2=open)',
+    ['name']
+)
+CIRCUIT_TRANSITIONS = Counter(
+    'circuit_breaker_transitions_total',
+    'Circuit breaker state transitions',
+    ['name', 'from_state', 'to_state']
+)
+CIRCUIT_REJECTED = Counter(
+    'circuit_breaker_rejected_total',
+    'Calls rejected without reaching the upstream',
+    ['name', 'state']
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker over a rolling time window.
+
+    The circuit opens when, over the last CIRCUIT_WINDOW seconds and at least
+    CIRCUIT_MIN_CALLS calls, the failure rate or the share of calls slower
+    than CIRCUIT_SLOW_CALL_THRESHOLD crosses its limit. While open, calls fail
+    fast. After CIRCUIT_OPEN_DURATION it lets up to CIRCUIT_HALF_OPEN_PROBES
+    probe calls through, closing once that many succeed and reopening on the
+    first failed or slow probe. When a cache is given, opening is published
+    to Redis so every worker stops calling the upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        settings: Settings,
+        cache: Optional[Cache] = None,
+        is_failure: Optional[Callable[[Exception], bool]] = None
+    ):
+        self.name = name
+        self.settings = settings
+        self.cache = cache
+        self.is_failure = is_failure or (lambda exc: True)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._buckets: Deque[List[int]] = deque()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._synced_at = 0.0
+        CIRCUIT_STATE.labels(name=name).set(STATE_VALUES[CLOSED])
+
+    @property
+    def shared_key(self) -> str:
+        return f"circuit:{self.name}"
+
+    @asynccontextmanager
+    async def call(self):
+        """Guard one upstream call, raising CircuitOpenError if it is not allowed."""
+        probe = await self._before_call()
+        started = time.monotonic()
+        failed = None
+        try:
+            yield
+            failed = False
+        except Exception as e:
+            failed = self.is_failure(e)
+            raise
+        finally:
+            if probe:
+                self._probes_in_flight -= 1
+            if failed is not None:
+                await self._record(probe, failed, time.monotonic() - started)
+
+    async def _before_call(self) -> bool:
+        await self._sync()
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.settings.CIRCUIT_OPEN_DURATION:
+                CIRCUIT_REJECTED.labels(name=self.name, state=OPEN).inc()
+                raise CircuitOpenError(f"Circuit {self.name} is open")
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.settings.CIRCUIT_HALF_OPEN_PROBES:
+                CIRCUIT_REJECTED.labels(name=self.name, state=HALF_OPEN).inc()
+                raise CircuitOpenError(f"Circuit {self.name} is half-open")
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    async def _record(self, probe: bool, failed: bool, latency: float) -> None:
+        slow = latency >= self.settings.CIRCUIT_SLOW_CALL_THRESHOLD
+        if self.state == HALF_OPEN:
+            if not probe:
+                return
+            if failed or slow:
+                await self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.settings.CIRCUIT_HALF_OPEN_PROBES:
+                await self._close()
+            return
+        if self.state == OPEN:
+            return
+
+        calls, failures, slow_calls = self._add(failed, slow)
+        if calls >= self.settings.CIRCUIT_MIN_CALLS and (
+            failures / calls >= self.settings.CIRCUIT_FAILURE_RATE
+            or slow_calls / calls >= self.settings.CIRCUIT_SLOW_CALL_RATE
+        ):
+            await self._open()
+
+    def _add(self, failed: bool, slow: bool) -> List[int]:
+        """Record an outcome and return (calls, failures, slow calls) for the window."""
+        second = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        bucket[2] += failed
+        bucket[3] += slow
+        while self._buckets[0][0] <= second - self.settings.CIRCUIT_WINDOW:
+            self._buckets.popleft()
+        return [sum(b[i] for b in self._buckets) for i in (1, 2, 3)]
+
+    async def _open(self) -> None:
+        self._transition(OPEN)
+        self.opened_at = time.monotonic()
+        if self.cache:
+            await self.cache.set_shared(self.shared_key, str(time.time()), self.settings.CIRCUIT_OPEN_DURATION)
+
+    async def _close(self) -> None:
+        self._transition(CLOSED)
+        if self.cache:
+            await self.cache.delete_shared(self.shared_key)
+
+    async def _sync(self) -> None:
+        """Adopt an open circuit published by another worker."""
+        now = time.monotonic()
+        if not self.cache or self.state != CLOSED or now - self._synced_at < self.settings.CIRCUIT_SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        opened = await self.cache.get_shared(self.shared_key)
+        if opened:
+            self._transition(OPEN)
+            self.opened_at = now - max(0.0, time.time() - float(opened))
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning("Circuit %s changed from %s to %s", self.name, self.state, state)
+        CIRCUIT_TRANSITIONS.labels(name=self.name, from_state=self.state, to_state=state).inc()
+        CIRCUIT_STATE.labels(name=self.name).set(STATE_VALUES[state])
+        self.state = state
+        self._buckets.clear()
+        self._probe_successes = 0
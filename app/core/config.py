@@ -1,5 +1,6 @@
+from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # API Configuration
@@ -12,15 +13,200 @@ class Settings(BaseSettings):
     AVIATION_API_URL: str = "https://api.aviationstack.com/v1/flights"
     API_TIMEOUT: int = 10
     
+    # Upstream Connection Pool
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 30.0
+    UPSTREAM_POOL_TIMEOUT: float = 5.0
+    UPSTREAM_HTTP2: bool = False
+    UPSTREAM_SHUTDOWN_TIMEOUT: float = 10.0
+    
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Caching
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    CACHE_L1_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_REDIS_TIMEOUT: float = 0.5
+    CACHE_REDIS_RETRY_INTERVAL: float = 5.0
+    CACHE_TTL_ACTIVE: int = 15
+    CACHE_TTL_SCHEDULED: int = 300
+    CACHE_TTL_FINAL: int = 6 * 60 * 60
+    CACHE_TTL_DEFAULT: int = 60
+    CACHE_STALE_WHILE_REVALIDATE: int = 60
+    CACHE_STALE_IF_ERROR: int = 60 * 60
+    CACHE_PROJECTION_MAX_ENTRIES: int = 10000
+    CACHE_NEGATIVE_TTL: int = 60
+    
+    # Known Flights
+    KNOWN_FLIGHTS_MODE: str = "deprioritize"  # "off", "deprioritize" or "reject" unknown identifiers
+    KNOWN_FLIGHTS_CAPACITY: int = 1000000
+    KNOWN_FLIGHTS_ERROR_RATE: float = 0.01
+    KNOWN_FLIGHTS_MIN_ENTRIES: int = 1000
+    KNOWN_FLIGHTS_PATH: Optional[str] = None
+    KNOWN_AIRLINE_PREFIXES: List[str] = []
+    
+    # Request Coalescing
+    SINGLEFLIGHT_DISTRIBUTED: bool = True
+    SINGLEFLIGHT_LOCK_TTL: float = 15.0
+    SINGLEFLIGHT_LOCK_WAIT: float = 5.0
+    SINGLEFLIGHT_POLL_INTERVAL: float = 0.05
+    
+    # Deadlines and Retries
+    REQUEST_DEADLINE: float = 5.0
+    REQUEST_DEADLINE_MAX: float = 30.0
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_BACKOFF: float = 0.1
+    RETRY_MAX_BACKOFF: float = 0.8
+    RETRY_MIN_ATTEMPT_TIME: float = 0.2
+    RETRY_BUDGET_RATIO: float = 0.1
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    RETRY_BUDGET_WINDOW: int = 10
+    
+    # Upstream Quota
+    QUOTA_RATE_PER_SECOND: float = 5.0
+    QUOTA_BURST: int = 10
+    QUOTA_MONTHLY_LIMIT: Optional[int] = None
+    QUOTA_RESERVE_REFRESH: float = 0.2
+    QUOTA_RESERVE_PREFETCH: float = 0.5
+    QUOTA_MAX_WAIT_USER: float = 0.5
+    QUOTA_MAX_WAIT_REFRESH: float = 2.0
+    QUOTA_MAX_WAIT_PREFETCH: float = 0.0
+    QUOTA_FALLBACK_SHARE: float = 0.25
+    QUOTA_PROJECTION_WINDOW: int = 15 * 60
+    
+    # Request Hedging
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 0.95
+    HEDGE_MIN_DELAY: float = 0.05
+    HEDGE_MIN_SAMPLES: int = 50
+    HEDGE_MAX_RATIO: float = 0.05
+    HEDGE_LATENCY_WINDOW: int = 1000
+    
+    # Circuit Breaker
+    CIRCUIT_WINDOW: int = 30
+    CIRCUIT_MIN_CALLS: int = 20
+    CIRCUIT_FAILURE_RATE: float = 0.5
+    CIRCUIT_SLOW_CALL_THRESHOLD: float = 3.0
+    CIRCUIT_SLOW_CALL_RATE: float = 0.8
+    CIRCUIT_OPEN_DURATION: float = 30.0
+    CIRCUIT_HALF_OPEN_PROBES: int = 3
+    CIRCUIT_SHARED: bool = True
+    CIRCUIT_SYNC_INTERVAL: float = 1.0
+    
+    # Batch Lookups
+    BATCH_MAX_ITEMS: int = 50
+    BATCH_MAX_CONCURRENCY: int = 8
+    
+    # Flight Legs
+    LEGS_PAGE_SIZE: int = 100
+    LEGS_STREAM_MAX_RECORDS: int = 10000
+    
+    # Flight Queries
+    QUERY_INDEX_MAX_ENTRIES: int = 100000
+    QUERY_MAX_LIMIT: int = 100
+    
+    # Geospatial Queries
+    GEO_CELL_DEGREES: float = 1.0
+    GEO_INDEX_MAX_ENTRIES: int = 100000
+    GEO_MAX_RESULTS: int = 1000
+    GEO_MAX_RADIUS_KM: float = 2000.0
+    
+    # Dead Reckoning
+    DEAD_RECKONING_DRIFT: float = 0.05
+    DEAD_RECKONING_MAX_ERROR_KM: float = 5.0
+    DEAD_RECKONING_MAX_AGE: float = 10 * 60
+    
+    # Flight Tracks
+    TRACK_MAX_SAMPLES: int = 720
+    TRACK_MAX_BYTES: int = 64 * 1024 * 1024
+    TRACK_MAX_POINTS: int = 1000
+    
+    # Snapshot Ingestion
+    INGEST_ENABLED: bool = False
+    INGEST_AIRLINES: List[str] = []
+    INGEST_DEPARTURE_AIRPORTS: List[str] = []
+    INGEST_INTERVAL: float = 60.0
+    INGEST_PAGE_SIZE: int = 100
+    INGEST_MAX_PAGES: int = 10
+    INGEST_INDEX_TTL: float = 120.0
+    INGEST_INDEX_MAX_ENTRIES: int = 50000
+    
+    # Refresh Scheduler
+    SCHEDULER_ENABLED: bool = False
+    SCHEDULER_INTERVAL_ACTIVE: float = 12.0
+    SCHEDULER_INTERVAL_DEFAULT: float = 45.0
+    SCHEDULER_INTERVAL_MIN: float = 10.0
+    SCHEDULER_INTERVAL_MAX: float = 30 * 60
+    SCHEDULER_DEPARTURE_FRACTION: float = 0.1
+    SCHEDULER_LEAD: float = 2.0
+    SCHEDULER_MAX_STRETCH: float = 5.0
+    SCHEDULER_RATE_WINDOW: float = 5 * 60
+    SCHEDULER_IDLE_TIMEOUT: float = 15 * 60
+    SCHEDULER_MAX_TRACKED: int = 5000
+    SCHEDULER_MAX_CONCURRENCY: int = 4
+    SCHEDULER_REFRESH_TIMEOUT: float = 10.0
+    
+    # Live Streaming
+    STREAM_POLL_INTERVAL: float = 5.0
+    STREAM_HEARTBEAT_INTERVAL: float = 15.0
+    STREAM_QUEUE_SIZE: int = 8
+    STREAM_MAX_SUBSCRIBERS: int = 10000
+    
+    # Webhooks
+    WEBHOOK_POLL_INTERVAL: float = 30.0
+    WEBHOOK_CHECK_CONCURRENCY: int = 8
+    WEBHOOK_SNAPSHOT_TTL: int = 24 * 60 * 60
+    WEBHOOK_MAX_SUBSCRIPTIONS: int = 10000
+    WEBHOOK_BATCH_WINDOW: float = 0.5
+    WEBHOOK_BATCH_MAX: int = 50
+    WEBHOOK_QUEUE_SIZE: int = 1000
+    WEBHOOK_ENDPOINT_CONCURRENCY: int = 2
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_TIMEOUT: float = 5.0
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_BASE_BACKOFF: float = 0.5
+    WEBHOOK_MAX_BACKOFF: float = 30.0
+    WEBHOOK_ALLOWED_HOSTS: List[str] = []
+    WEBHOOK_IDLE_TIMEOUT: float = 5 * 60
+    
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60
+    RATE_LIMIT_API_KEYS: Dict[str, int] = {}
+    RATE_LIMIT_LOCAL_FRACTION: float = 0.1
+    RATE_LIMIT_MAX_CLIENTS: int = 10000
+    
+    # Logging
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_WINDOW: float = 10.0
+    LOG_SAMPLE_BURST: int = 5
+    LOG_SAMPLE_MAX_KEYS: int = 1000
     
     # Monitoring
     SENTRY_DSN: Optional[str] = None
     
+    @field_validator("RATE_LIMIT_REQUESTS", "RATE_LIMIT_WINDOW")
+    @classmethod
+    def _positive_limit(cls, value: int) -> int:
+        if value <= 0:
+            raise ValueError("must be greater than 0")
+        return value
+    
+    @model_validator(mode="after")
+    def _ordered_scheduler_intervals(self) -> "Settings":
+        low, high = self.SCHEDULER_INTERVAL_MIN, self.SCHEDULER_INTERVAL_MAX
+        for name in ("SCHEDULER_INTERVAL_ACTIVE", "SCHEDULER_INTERVAL_DEFAULT"):
+            if not low <= getattr(self, name) <= high:
+                raise ValueError(f"{name} must lie between SCHEDULER_INTERVAL_MIN and SCHEDULER_INTERVAL_MAX")
+        return self
+    
+    @field_validator("RATE_LIMIT_API_KEYS")
+    @classmethod
+    def _positive_key_limits(cls, value: Dict[str, int]) -> Dict[str, int]:
+        if any(limit <= 0 for limit in value.values()):
+            raise ValueError("every API key limit must be greater than 0")
+        return value
+    
     class Config:
         env_file = ".env"
\ No newline at end of file
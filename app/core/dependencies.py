@@ -1,41 +1,99 @@
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from starlette.requests import HTTPConnection
 from app.services.flight_service import FlightService
+from app.services.geo_index import FlightGeoIndex
+from app.services.live_stream import LiveStreamHub
+from app.services.query_index import FlightQueryIndex
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.trajectory import TrajectoryStore
+from app.services.webhook_service import WebhookService
+from app.core.cache import Cache
 from app.core.config import Settings
 import logging
-from typing import AsyncGenerator
 from datetime import datetime
+from functools import lru_cache
+from typing import Annotated, Optional
 
 logger = logging.getLogger(__name__)
 
+@lru_cache
 def get_settings() -> Settings:
     return Settings()
 
-async def get_flight_service(
-    settings: Settings = Depends(get_settings)
-) -> AsyncGenerator[FlightService, None]:
-    service = FlightService(settings)
+def get_request_timeout(
+    settings: Annotated[Settings, Depends(get_settings)],
+    x_request_timeout: Annotated[Optional[str], Header()] = None
+) -> float:
+    """
+    Time budget for this request in seconds: the client's X-Request-Timeout
+    header capped at REQUEST_DEADLINE_MAX, or REQUEST_DEADLINE by default.
+    """
     try:
-        yield service
-    finally:
-        await service.client.aclose()
+        timeout = float(x_request_timeout)
+    except (TypeError, ValueError):
+        return settings.REQUEST_DEADLINE
+    if timeout <= 0:
+        return settings.REQUEST_DEADLINE
+    return min(timeout, settings.REQUEST_DEADLINE_MAX)
+
+def get_flight_service(request: HTTPConnection) -> FlightService:
+    """Return the application-scoped FlightService created in the lifespan."""
+    return request.app.state.flight_service
+
+def get_refresh_scheduler(request: Request) -> Optional[RefreshScheduler]:
+    """Return the refresh scheduler, or None when SCHEDULER_ENABLED is off."""
+    return getattr(request.app.state, "refresh_scheduler", None)
+
+def get_live_stream(request: HTTPConnection) -> LiveStreamHub:
+    """Return the application-scoped live position fan-out hub."""
+    return request.app.state.live_stream
+
+def get_webhook_service(request: Request) -> WebhookService:
+    """Return the application-scoped webhook subscription service."""
+    return request.app.state.webhooks
+
+def get_query_index(request: Request) -> FlightQueryIndex:
+    """Return the application-scoped secondary indexes over held flights."""
+    return request.app.state.query_index
+
+def get_geo_index(request: Request) -> FlightGeoIndex:
+    """Return the application-scoped spatial index over held live positions."""
+    return request.app.state.geo_index
+
+def get_trajectories(request: Request) -> TrajectoryStore:
+    """Return the application-scoped per-flight trajectory store."""
+    return request.app.state.trajectories
+
+def get_cache(request: Request) -> Cache:
+    """Return the application-scoped two-tier cache created in the lifespan."""
+    return request.app.state.cache
+
+def get_caller(request: Request) -> str:
+    """Return who is calling: the rate limit identity, a known API key's digest or else the client IP."""
+    identity, _ = request.app.state.rate_limiter.identify(request)
+    return identity
 
 async def rate_limit(
-    request: Request
+    request: Request,
+    response: Response
 ) -> None:
     """
-    Rate limiting middleware that allows 100 requests per minute per IP.
+    Rate limiting dependency allowing RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW
+    seconds per client IP, or a per-key limit for API keys listed in
+    RATE_LIMIT_API_KEYS.
     
     Args:
         request: FastAPI request object
+        response: Response whose headers receive the X-RateLimit-* values
     
     Raises:
         HTTPException: When rate limit is exceeded
     """
-    client_ip = request.client.host
-    requests = 0  
-
-    if requests > 100:
+    decision = await request.app.state.rate_limiter.check(request)
+    if not decision.allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded. Please try again in a minute."
-        )
\ No newline at end of file
+            detail=f"Rate limit exceeded. Please try again in {decision.headers['Retry-After']} seconds.",
+            headers=decision.headers
+        )
+    response.headers.update(decision.headers)
@@ -0,0 +1,127 @@
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, TypeVar
+import asyncio
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.config import Settings
+from app.core.retry import RetryBudget
+
+T = TypeVar("T")
+
+HEDGE_REQUESTS = Counter(
+    'aviation_api_hedges_total',
+    'Hedged aviation API requests by outcome',
+    ['outcome']
+)
+UPSTREAM_LATENCY = Histogram(
+    'aviation_api_latency_seconds',
+    'Aviation API response time as seen by the caller, by whether a hedge was sent',
+    ['hedged'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+)
+LATENCY_QUANTILE = Gauge(
+    'aviation_api_latency_quantile_seconds',
+    'Live aviation API latency quantiles over the recent sample window',
+    ['quantile']
+)
+
+REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyTracker:
+    """Sliding window of recent upstream latencies with cheap quantile lookups."""
+
+    def __init__(self, window: int, refresh_every: int = 50):
+        self.refresh_every = refresh_every
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._since_refresh = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+        self._since_refresh += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        if not self._sorted or self._since_refresh >= self.refresh_every:
+            self._sorted = sorted(self._samples)
+            self._since_refresh = 0
+            for reported in REPORTED_QUANTILES:
+                LATENCY_QUANTILE.labels(quantile=str(reported)).set(self._value_at(reported))
+        return self._value_at(q)
+
+    def _value_at(self, q: float) -> float:
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+class Hedger:
+    """
+    Send a second identical request when the first is slower than the live
+    HEDGE_PERCENTILE latency, and take whichever answers first.
+
+    Hedges are capped at HEDGE_MAX_RATIO of recent requests so they cannot
+    eat the upstream quota, and are only sent once HEDGE_MIN_SAMPLES
+    latencies have been observed.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.latency = LatencyTracker(settings.HEDGE_LATENCY_WINDOW)
+        self.budget = RetryBudget(settings.HEDGE_MAX_RATIO, 0, settings.RETRY_BUDGET_WINDOW)
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.settings.HEDGE_ENABLED or len(self.latency) < self.settings.HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.settings.HEDGE_MIN_DELAY, self.latency.quantile(self.settings.HEDGE_PERCENTILE))
+
+    async def run(
+        self,
+        request: Callable[[], Awaitable[T]],
+        admit: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> T:
+        """Run `request`, hedging it if slow; `admit` is asked before a hedge is sent."""
+        started = time.monotonic()
+        self.budget.record_request()
+        delay = self.hedge_delay()
+        if delay is None:
+            result = await request()
+            self._observe(started, hedged=False)
+            return result
+
+        primary = asyncio.ensure_future(request())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                result = primary.result()
+                self._observe(started, hedged=False)
+                return result
+            if not self.budget.try_spend() or (admit and not await admit()):
+                HEDGE_REQUESTS.labels(outcome="skipped_budget").inc()
+                result = await primary
+                self._observe(started, hedged=False)
+                return result
+
+            HEDGE_REQUESTS.labels(outcome="sent").inc()
+            hedge = asyncio.ensure_future(request())
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        HEDGE_REQUESTS.labels(outcome="won" if task is hedge else "lost").inc()
+                        self._observe(started, hedged=True)
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _observe(self, started: float, hedged: bool) -> None:
+        elapsed = time.monotonic() - started
+        self.latency.record(elapsed)
+        UPSTREAM_LATENCY.labels(hedged=str(hedged).lower()).observe(elapsed)
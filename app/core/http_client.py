@@ -0,0 +1,89 @@
+import time
+from typing import Any, Dict
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.config import Settings
+from app.core.logging import logger
+
+UPSTREAM_CONNECTIONS = Counter(
+    'aviation_api_connections_total',
+    'Upstream requests by whether they opened a new connection or reused a pooled one',
+    ['connection']
+)
+CONNECTION_REUSE_RATIO = Gauge(
+    'aviation_api_connection_reuse_ratio',
+    'Share of upstream requests served on a reused pooled connection'
+)
+POOL_WAIT_TIME = Histogram(
+    'aviation_api_pool_wait_seconds',
+    'Time spent waiting for a pooled upstream connection',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+_connection_counts: Dict[str, int] = {"new": 0, "reused": 0}
+
+
+class PoolTrace:
+    """httpcore trace hook recording pool wait time and connection reuse for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.new_connection = False
+        self.waited = False
+        self.recorded = False
+
+    def _observe_wait(self) -> None:
+        if not self.waited:
+            self.waited = True
+            POOL_WAIT_TIME.observe(time.perf_counter() - self.started)
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        if self.recorded:
+            return
+        if event_name == "connection.connect_tcp.started":
+            self.new_connection = True
+            self._observe_wait()
+        elif event_name.endswith("send_request_headers.started"):
+            self._observe_wait()
+            self.recorded = True
+            record_connection(reused=not self.new_connection)
+
+
+def record_connection(reused: bool) -> None:
+    """Count a connection checkout and refresh the reuse ratio gauge."""
+    label = "reused" if reused else "new"
+    _connection_counts[label] += 1
+    UPSTREAM_CONNECTIONS.labels(connection=label).inc()
+    total = _connection_counts["new"] + _connection_counts["reused"]
+    CONNECTION_REUSE_RATIO.set(_connection_counts["reused"] / total)
+
+
+async def _attach_pool_trace(request: httpx.Request) -> None:
+    request.extensions.setdefault("trace", PoolTrace())
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_upstream_client(settings: Settings) -> httpx.AsyncClient:
+    """Build the long-lived, pooled HTTP client used for aviation API calls."""
+    http2 = settings.UPSTREAM_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("UPSTREAM_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.API_TIMEOUT, pool=settings.UPSTREAM_POOL_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+        event_hooks={"request": [_attach_pool_trace]},
+    )
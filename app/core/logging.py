@@ -1,41 +1,172 @@
 import logging
-import json
+import logging.handlers
+import atexit
+import copy
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 import sys
+import orjson
+from app.core.config import Settings
 
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging."""
-    
+
     def format(self, record: logging.LogRecord) -> str:
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat(),
+            # The record's own time: with the queue pipeline it is formatted later, on another thread
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
             "level": record.levelname,
             "message": record.getMessage(),
             "module": record.module,
             "function": record.funcName,
         }
-        
+
         if hasattr(record, "props"):
             log_data.update(record.props)
-            
+
+        if getattr(record, "suppressed", None):
+            log_data["suppressed"] = record.suppressed
+
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
-            
-        return json.dumps(log_data)
+        elif record.exc_text:
+            # Already formatted by AsyncQueueHandler on the logging thread
+            log_data["exception"] = record.exc_text
+
+        return orjson.dumps(log_data, default=str).decode()
+
+class RepeatFilter(logging.Filter):
+    """
+    Rate-limit repeated warnings and errors: each call site, identified by
+    logger, level and unformatted message, passes at most `burst` times per
+    `window` seconds whatever its arguments. The first one let through after
+    a quiet spell carries `suppressed`, the number dropped meanwhile; `flush`
+    reports counts nobody has reported yet.
+    """
+
+    def __init__(self, window: float, burst: int, max_keys: int = 1000):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # (logger, level, message template) -> [window start, passed in window, suppressed since last report]
+        self._seen: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._seen.get(key)
+            if state is None:
+                if len(self._seen) >= self.max_keys:
+                    self._prune(now)
+                state = self._seen[key] = [now, 0, 0]
+            elif now - state[0] >= self.window:
+                state[0], state[1] = now, 0
+            if state[1] >= self.burst:
+                state[2] += 1
+                return False
+            state[1] += 1
+            if state[2]:
+                record.suppressed, state[2] = state[2], 0
+        return True
+
+    def flush(self, target: logging.Logger) -> None:
+        """Log one summary per message that still has unreported suppressions."""
+        with self._lock:
+            pending = [(key, state[2]) for key, state in self._seen.items() if state[2]]
+            self._seen.clear()
+        for (_, level, message), count in pending:
+            target.log(level, message, extra={"suppressed": count})
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, state in self._seen.items() if now - state[0] >= self.window and not state[2]]
+        for key in expired or list(self._seen)[: len(self._seen) // 2]:
+            del self._seen[key]
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves JSON encoding and the write to the listener
+    thread. Like the stdlib handler it enqueues a copy of the record with the
+    message and any traceback already rendered, since arguments and
+    exceptions may change before the listener gets to them. A full queue
+    drops the record rather than blocking the event loop.
+    """
 
-def setup_logging() -> None:
-    """Configure application logging."""
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_traceback_formatter = logging.Formatter()
+
+_pipeline: Optional[Tuple[logging.handlers.QueueListener, AsyncQueueHandler, RepeatFilter]] = None
+
+def setup_logging(settings: Settings) -> None:
+    """
+    Configure application logging: records are queued by the calling thread
+    and formatted as JSON and written to stdout by a background listener.
+    Repeated warnings and errors are sampled per LOG_SAMPLE_WINDOW. Does
+    nothing if the pipeline is already running.
+    """
+    global _pipeline
+    if _pipeline is not None:
+        return
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
-    
-    # Console handler with JSON formatting
+
+    # Console handler with JSON formatting, run by the listener thread
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(JSONFormatter())
-    logger.addHandler(console_handler)
-    
+
+    log_queue: queue.Queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    repeats = RepeatFilter(settings.LOG_SAMPLE_WINDOW, settings.LOG_SAMPLE_BURST, settings.LOG_SAMPLE_MAX_KEYS)
+    queue_handler = AsyncQueueHandler(log_queue)
+    queue_handler.addFilter(repeats)
+    listener = logging.handlers.QueueListener(log_queue, console_handler, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    _pipeline = (listener, queue_handler, repeats)
+
     # Suppress external library logging
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("asyncio").setLevel(logging.WARNING)
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+def shutdown_logging() -> None:
+    """Report pending suppression counts, drain the queue and stop the listener thread."""
+    global _pipeline
+    if _pipeline is None:
+        return
+    listener, queue_handler, repeats = _pipeline
+    _pipeline = None
+    repeats.flush(logging.getLogger(__name__))
+    listener.stop()
+    logging.getLogger().removeHandler(queue_handler)
+    if queue_handler.dropped:
+        sys.stderr.write(f"{queue_handler.dropped} log records dropped on a full queue\n")
+
+# Safety net for exits that skip the application lifespan
+atexit.register(shutdown_logging)
+
+logger = logging.getLogger(__name__)
@@ -0,0 +1,201 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Deque, Optional, Tuple
+import asyncio
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.cache import Cache
+from app.core.config import Settings
+from app.core.rate_limit import TokenBucket
+from app.core.retry import remaining_time
+
+QUOTA_DECISIONS = Counter(
+    'aviation_quota_decisions_total',
+    'Upstream quota requests by priority and result',
+    ['priority', 'result']
+)
+QUOTA_WAIT = Histogram(
+    'aviation_quota_wait_seconds',
+    'Time spent queued for upstream quota',
+    ['priority'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+)
+QUOTA_MONTHLY_USED = Gauge('aviation_quota_monthly_used', 'Aviation API calls made this month across all workers')
+QUOTA_MONTHLY_REMAINING = Gauge('aviation_quota_monthly_remaining', 'Aviation API calls left in the monthly quota')
+QUOTA_EXHAUSTION_SECONDS = Gauge(
+    'aviation_quota_projected_exhaustion_seconds',
+    'Projected seconds until the monthly quota runs out at the current call rate'
+)
+
+
+class Priority(IntEnum):
+    USER = 0
+    REFRESH = 1
+    PREFETCH = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("upstream_priority", default=Priority.USER)
+
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """Run upstream calls made in this block at the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+class QuotaExhausted(Exception):
+    """Raised when no upstream quota can be granted in time."""
+
+
+# Token bucket (per-second cap) plus monthly counter. ARGV[3] is the number of
+# tokens that must be left in the bucket for this priority and ARGV[4] the
+# monthly call count it may not reach, which is how lower priorities leave
+# headroom for user-facing calls. Returns {allowed, wait_ms (-1: monthly
+# quota exhausted), calls used this month}.
+QUOTA_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local floor = tonumber(ARGV[3])
+local month_cap = tonumber(ARGV[4])
+local used = tonumber(redis.call("GET", KEYS[2]) or "0")
+if used >= month_cap then
+    return {0, -1, used}
+end
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+if tokens - 1 < floor then
+    redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+    redis.call("EXPIRE", KEYS[1], 60)
+    return {0, math.ceil((floor + 1 - tokens) / rate * 1000), used}
+end
+redis.call("HSET", KEYS[1], "tokens", tokens - 1, "ts", now)
+redis.call("EXPIRE", KEYS[1], 60)
+used = redis.call("INCR", KEYS[2])
+if used == 1 then
+    redis.call("EXPIRE", KEYS[2], ARGV[5])
+end
+return {1, 0, used}
+"""
+
+
+class QuotaGovernor:
+    """
+    Cluster-wide budget for aviation API calls.
+
+    Every worker draws from one token bucket in Redis (QUOTA_RATE_PER_SECOND,
+    bursting to QUOTA_BURST) and one monthly call counter. User-facing calls
+    may drain both; background refreshes and prefetches must leave a reserve
+    of QUOTA_RESERVE_REFRESH / QUOTA_RESERVE_PREFETCH of each. Callers queue
+    for up to their priority's maximum wait, then get QuotaExhausted so the
+    caller can fall back to cached data. Without Redis each worker enforces
+    QUOTA_FALLBACK_SHARE of the rate locally.
+    """
+
+    def __init__(self, settings: Settings, cache: Optional[Cache] = None):
+        self.settings = settings
+        self.cache = cache
+        self._script = cache.register_script(QUOTA_SCRIPT) if cache else None
+        share = settings.QUOTA_FALLBACK_SHARE if cache else 1.0
+        self._local = TokenBucket(settings.QUOTA_BURST * share, settings.QUOTA_RATE_PER_SECOND * share)
+        self._usage: Deque[Tuple[float, int]] = deque()
+        self.max_wait = {
+            Priority.USER: settings.QUOTA_MAX_WAIT_USER,
+            Priority.REFRESH: settings.QUOTA_MAX_WAIT_REFRESH,
+            Priority.PREFETCH: settings.QUOTA_MAX_WAIT_PREFETCH,
+        }
+        self.reserve = {
+            Priority.USER: 0.0,
+            Priority.REFRESH: settings.QUOTA_RESERVE_REFRESH,
+            Priority.PREFETCH: settings.QUOTA_RESERVE_PREFETCH,
+        }
+
+    async def acquire(self, priority: Optional[Priority] = None) -> None:
+        """Wait for one upstream call's worth of quota, or raise QuotaExhausted."""
+        priority = current_priority() if priority is None else priority
+        started = time.monotonic()
+        max_wait = self.max_wait[priority]
+        remaining = remaining_time()
+        if remaining is not None:
+            max_wait = min(max_wait, remaining)
+
+        while True:
+            allowed, wait = await self._take(priority)
+            if allowed:
+                QUOTA_DECISIONS.labels(priority=priority.name.lower(), result="granted").inc()
+                QUOTA_WAIT.labels(priority=priority.name.lower()).observe(time.monotonic() - started)
+                return
+            if wait is None or time.monotonic() + wait - started > max_wait:
+                reason = "monthly_exhausted" if wait is None else "denied"
+                QUOTA_DECISIONS.labels(priority=priority.name.lower(), result=reason).inc()
+                raise QuotaExhausted(f"No upstream quota for {priority.name.lower()} call")
+            await asyncio.sleep(wait)
+
+    async def try_acquire(self, priority: Optional[Priority] = None) -> bool:
+        """Take quota only if it is available right now."""
+        priority = current_priority() if priority is None else priority
+        allowed, _ = await self._take(priority)
+        QUOTA_DECISIONS.labels(priority=priority.name.lower(), result="granted" if allowed else "denied").inc()
+        return allowed
+
+    async def _take(self, priority: Priority) -> Tuple[bool, Optional[float]]:
+        """Try to take a token, returning (allowed, seconds to wait or None if the month is used up)."""
+        reserve = self.reserve[priority]
+        if self._script is not None and self.cache.redis_available:
+            monthly_limit = self.settings.QUOTA_MONTHLY_LIMIT
+            month_cap = monthly_limit * (1 - reserve) if monthly_limit else 2 ** 53
+            result = await self.cache.run_script(
+                self._script,
+                keys=["quota:bucket", f"quota:month:{datetime.now(timezone.utc):%Y-%m}"],
+                args=[
+                    self.settings.QUOTA_RATE_PER_SECOND,
+                    self.settings.QUOTA_BURST,
+                    self.settings.QUOTA_BURST * reserve,
+                    month_cap,
+                    40 * 24 * 60 * 60,
+                ]
+            )
+            if result is not None:
+                allowed, wait_ms, used = (int(v) for v in result)
+                self._record_usage(used)
+                if wait_ms < 0:
+                    return False, None
+                return bool(allowed), wait_ms / 1000
+
+        floor = self._local.capacity * reserve
+        if self._local.take(floor):
+            return True, None
+        return False, self._local.wait_time(floor)
+
+    def _record_usage(self, used: int) -> None:
+        """Track cluster-wide monthly usage and project when it runs out."""
+        now = time.monotonic()
+        self._usage.append((now, used))
+        while len(self._usage) > 1 and self._usage[0][0] < now - self.settings.QUOTA_PROJECTION_WINDOW:
+            self._usage.popleft()
+        QUOTA_MONTHLY_USED.set(used)
+
+        limit = self.settings.QUOTA_MONTHLY_LIMIT
+        if not limit:
+            return
+        left = max(0, limit - used)
+        QUOTA_MONTHLY_REMAINING.set(left)
+        first_time, first_used = self._usage[0]
+        if now - first_time < 1:
+            return
+        rate = (used - first_used) / (now - first_time)
+        QUOTA_EXHAUSTION_SECONDS.set(left / rate if rate > 0 else float("inf"))
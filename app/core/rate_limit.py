@@ -0,0 +1,184 @@
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+import hashlib
+import math
+import time
+from fastapi import Request
+from prometheus_client import Counter
+from app.core.cache import Cache
+from app.core.config import Settings
+
+RATE_LIMIT_DECISIONS = Counter(
+    'rate_limit_decisions_total',
+    'Rate limit decisions by result and where they were made',
+    ['result', 'path']
+)
+
+# GCRA over a theoretical arrival time (TAT) in milliseconds, using the Redis
+# clock so every worker agrees. ARGV[3] requests already admitted locally are
+# charged unconditionally before the current request is evaluated.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local served = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tat = math.max(tonumber(redis.call("GET", KEYS[1])) or now, now) + served * emission
+local new_tat = tat + emission
+if new_tat - burst > now then
+    if tat > now then
+        redis.call("SET", KEYS[1], tat, "PX", math.ceil(tat - now))
+    end
+    return {0, 0, new_tat - burst - now, tat - now}
+end
+redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now))
+return {1, math.floor((now + burst - new_tat) / emission), 0, new_tat - now}
+"""
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
+
+    @property
+    def headers(self) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.remaining)),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, floor: float = 0.0) -> bool:
+        """Take a token if at least `floor` tokens would remain afterwards."""
+        self._refill()
+        if self.tokens - 1 >= floor:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, floor: float = 0.0) -> float:
+        """Seconds until a token can be taken while leaving `floor` tokens."""
+        return max(0.0, (floor + 1 - self.tokens) / self.rate)
+
+    @property
+    def retry_after(self) -> float:
+        return self.wait_time()
+
+    @property
+    def reset_after(self) -> float:
+        return (self.capacity - self.tokens) / self.rate
+
+
+class _ClientState:
+    __slots__ = ("precheck", "fallback", "pending", "remaining")
+
+    def __init__(self, limit: int, window: int, local_fraction: float):
+        rate = limit / window
+        self.precheck = TokenBucket(max(0.0, math.floor(limit * local_fraction)), rate * local_fraction)
+        self.fallback = TokenBucket(limit, rate)
+        self.pending = 0
+        # Capacity Redis last reported; local admits never run past it
+        self.remaining = limit
+
+
+class RateLimiter:
+    """
+    Sliding-window (GCRA) rate limiter shared across workers through Redis.
+
+    Each worker first draws from a small local token bucket holding
+    RATE_LIMIT_LOCAL_FRACTION of a client's limit, so clients well under
+    their limit never touch Redis; those requests are charged to Redis on
+    the client's next Redis check, which happens at the latest once the
+    local bucket's capacity worth of requests is pending, or as many as
+    Redis last reported remaining. A client Redis reports as out of capacity
+    therefore goes to Redis on every request until Redis has room for it again.
+    When Redis is unavailable every worker enforces the full limit locally.
+    """
+
+    def __init__(self, settings: Settings, cache: Optional[Cache] = None):
+        self.settings = settings
+        self.cache = cache
+        self.window = settings.RATE_LIMIT_WINDOW
+        self._script = cache.register_script(GCRA_SCRIPT) if cache else None
+        self._clients: "OrderedDict[str, _ClientState]" = OrderedDict()
+
+    def identify(self, request: Request) -> Tuple[str, int]:
+        """Return the rate limit key and limit for a request: known API key, else client IP."""
+        api_key = request.headers.get("X-API-Key")
+        if api_key and api_key in self.settings.RATE_LIMIT_API_KEYS:
+            digest = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+            return f"key:{digest}", self.settings.RATE_LIMIT_API_KEYS[api_key]
+        host = request.client.host if request.client else "unknown"
+        return f"ip:{host}", self.settings.RATE_LIMIT_REQUESTS
+
+    async def check(self, request: Request) -> RateLimitDecision:
+        identity, limit = self.identify(request)
+        state = self._state(identity, limit)
+
+        redis_usable = self._script is not None and self.cache.redis_available
+        if (
+            redis_usable
+            and state.pending < min(state.precheck.capacity, state.remaining)
+            and state.precheck.take()
+        ):
+            state.pending += 1
+            RATE_LIMIT_DECISIONS.labels(result="allowed", path="local").inc()
+            return RateLimitDecision(True, limit, state.remaining - state.pending, self.window)
+
+        if redis_usable:
+            emission = self.window * 1000 / limit
+            result = await self.cache.run_script(
+                self._script,
+                keys=[f"ratelimit:{identity}"],
+                args=[emission, emission * limit, state.pending]
+            )
+            if result is not None:
+                allowed, remaining, retry_after, reset_after = (int(v) for v in result)
+                state.pending = 0
+                state.remaining = remaining
+                decision = RateLimitDecision(bool(allowed), limit, remaining, reset_after / 1000, retry_after / 1000)
+                RATE_LIMIT_DECISIONS.labels(result="allowed" if allowed else "limited", path="redis").inc()
+                return decision
+
+        state.pending = 0
+        allowed = state.fallback.take()
+        RATE_LIMIT_DECISIONS.labels(result="allowed" if allowed else "limited", path="fallback").inc()
+        return RateLimitDecision(
+            allowed,
+            limit,
+            int(state.fallback.tokens),
+            state.fallback.reset_after,
+            state.fallback.retry_after
+        )
+
+    def _state(self, identity: str, limit: int) -> _ClientState:
+        state = self._clients.get(identity)
+        if state is None:
+            state = _ClientState(limit, self.window, self.settings.RATE_LIMIT_LOCAL_FRACTION)
+            self._clients[identity] = state
+            if len(self._clients) > self.settings.RATE_LIMIT_MAX_CLIENTS:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(identity)
+        return state
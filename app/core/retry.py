@@ -0,0 +1,92 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Deque, List, Optional
+import random
+import time
+from prometheus_client import Counter
+
+RETRIES = Counter(
+    'aviation_api_retries_total',
+    'Retried aviation API attempts'
+)
+RETRIES_SKIPPED = Counter(
+    'aviation_api_retries_skipped_total',
+    'Failed attempts that were not retried',
+    ['reason']
+)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the caller's deadline leaves no time for an upstream call."""
+
+
+@contextmanager
+def deadline_scope(timeout: float):
+    """Give the code in this block, and tasks it starts, `timeout` seconds to finish."""
+    deadline = time.monotonic() + timeout
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def detached_context() -> Context:
+    """Copy of the current context without a deadline, for background tasks."""
+    context = copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given (1-based) retry attempt."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries as a share of recent requests.
+
+    Every request deposits `ratio` of a retry over a rolling `window` of
+    seconds, on top of a floor of `min_per_second` retries, so retries stay
+    a bounded fraction of traffic during an outage.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, window: int):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._buckets: Deque[List[int]] = deque()
+
+    def _bucket(self) -> List[int]:
+        second = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        while self._buckets[0][0] <= second - self.window:
+            self._buckets.popleft()
+        return self._buckets[-1]
+
+    def record_request(self) -> None:
+        self._bucket()[1] += 1
+
+    def try_spend(self) -> bool:
+        """Withdraw one retry from the budget if there is one left."""
+        bucket = self._bucket()
+        requests = sum(b[1] for b in self._buckets)
+        retries = sum(b[2] for b in self._buckets)
+        if retries + 1 > self.min_per_second * self.window + self.ratio * requests:
+            return False
+        bucket[2] += 1
+        return True
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from typing import Any, NamedTuple, Tuple
+import hashlib
+import orjson
+from fastapi.responses import Response
+from prometheus_client import Counter
+from app.schemas.flight import FlightDataResponseSchema
+
+PROJECTION_CACHE = Counter(
+    'flight_projection_cache_requests_total',
+    'Lookups of serialized field projections by result',
+    ['result']
+)
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON with orjson."""
+    return orjson.dumps(value)
+
+
+def loads(value: Any) -> Any:
+    return orjson.loads(value)
+
+
+class EncodedFlight(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def encode_flight(flight: FlightDataResponseSchema) -> EncodedFlight:
+    """
+    Serialize a formatted flight to its final response body, and the strong
+    ETag of that body. Done once per cached or indexed payload so hits can
+    be sent without validating or serializing again.
+    """
+    return _encoded(dumps(flight.model_dump(mode="json")))
+
+
+def encode_projection(flight: FlightDataResponseSchema, fields: Tuple[str, ...]) -> EncodedFlight:
+    """Serialize only `fields` of a flight; the ETag identifies this projection."""
+    return _encoded(dumps(flight.model_dump(mode="json", include=set(fields))))
+
+
+def _encoded(body: bytes) -> EncodedFlight:
+    return EncodedFlight(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+
+class ProjectionCache:
+    """
+    Bounded LRU of serialized field projections, keyed by the full payload's
+    ETag and the field set, so a repeated `?fields=` request for an unchanged
+    flight is a dictionary lookup. A new payload has a new ETag, so stale
+    projections are never served and simply age out.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Tuple[str, ...]], EncodedFlight]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def encode(self, flight: FlightDataResponseSchema, etag: str, fields: Tuple[str, ...]) -> EncodedFlight:
+        key = (etag, fields)
+        encoded = self._entries.get(key)
+        if encoded is not None:
+            PROJECTION_CACHE.labels(result="hit").inc()
+            self._entries.move_to_end(key)
+            return encoded
+        PROJECTION_CACHE.labels(result="miss").inc()
+        encoded = self._entries[key] = encode_projection(flight, fields)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return encoded
+
+
+class JSONBytesResponse(Response):
+    """A JSON response whose body is already serialized."""
+    media_type = "application/json"
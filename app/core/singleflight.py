@@ -0,0 +1,63 @@
+from typing import Awaitable, Callable, Dict, TypeVar
+import asyncio
+from prometheus_client import Counter, Gauge
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = Counter(
+    'flight_singleflight_calls_total',
+    'Lookups that started a shared upstream call (leader) or joined one (follower)',
+    ['role']
+)
+SINGLEFLIGHT_INFLIGHT = Gauge(
+    'flight_singleflight_inflight_keys',
+    'Keys with a shared upstream call in progress'
+)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key onto one shared task.
+
+    The work runs in its own task so that cancelling the caller which
+    started it does not cancel the other callers; it is only cancelled
+    once every caller waiting on it has gone away. Results and
+    exceptions are delivered to all callers.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            SINGLEFLIGHT_CALLS.labels(role="leader").inc()
+            SINGLEFLIGHT_INFLIGHT.set(len(self._calls))
+        else:
+            SINGLEFLIGHT_CALLS.labels(role="follower").inc()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        SINGLEFLIGHT_INFLIGHT.set(len(self._calls))
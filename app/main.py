@@ -2,14 +2,27 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from app.api.routes import flight
+from app.api.routes import board, flight, webhook
+from app.core.cache import Cache
 from app.core.config import Settings
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, shutdown_logging
 from app.core.monitoring import setup_monitoring
+from app.core.rate_limit import RateLimiter
+from app.services.flight_index import FlightIndex
+from app.services.flight_service import FlightService
+from app.services.geo_index import FlightGeoIndex
+from app.services.ingestion_service import SnapshotIngestor
+from app.services.known_flights import KnownFlights
+from app.services.live_stream import LiveStreamHub
+from app.services.query_index import FlightQueryIndex
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.trajectory import TrajectoryStore
+from app.services.webhook_dispatcher import WebhookDispatcher
+from app.services.webhook_service import WebhookService
+import asyncio
 import time
 
 settings = Settings()
-setup_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -53,10 +66,51 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 # Include routers
 app.include_router(flight.router, prefix="/api")
+app.include_router(webhook.router, prefix="/api")
+app.include_router(board.router, prefix="/api")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_logging(settings)
+    app.state.cache = Cache(settings)
+    app.state.flight_index = FlightIndex(settings.INGEST_INDEX_MAX_ENTRIES)
+    app.state.query_index = FlightQueryIndex(settings.QUERY_INDEX_MAX_ENTRIES)
+    app.state.geo_index = FlightGeoIndex(settings.GEO_CELL_DEGREES, settings.GEO_INDEX_MAX_ENTRIES)
+    app.state.trajectories = TrajectoryStore(settings.TRACK_MAX_SAMPLES, settings.TRACK_MAX_BYTES)
+    app.state.known_flights = KnownFlights(settings)
+    for listener in (
+        app.state.query_index.upsert,
+        app.state.geo_index.upsert,
+        app.state.trajectories.record,
+        app.state.known_flights.record,
+    ):
+        app.state.cache.flight_listeners.append(listener)
+        app.state.flight_index.listeners.append(listener)
+    app.state.flight_service = FlightService(
+        settings, cache=app.state.cache, index=app.state.flight_index, known=app.state.known_flights
+    )
+    app.state.rate_limiter = RateLimiter(settings, app.state.cache)
+    app.state.live_stream = LiveStreamHub(settings, app.state.flight_service, app.state.cache)
+    app.state.ingestor = SnapshotIngestor(settings, app.state.flight_service, app.state.flight_index, app.state.cache)
+    if settings.INGEST_ENABLED:
+        app.state.ingestor.start()
+    app.state.webhooks = WebhookService(
+        settings, app.state.flight_service, WebhookDispatcher(settings), app.state.cache
+    )
+    app.state.webhooks.start()
+    app.state.refresh_scheduler = None
+    if settings.SCHEDULER_ENABLED:
+        app.state.refresh_scheduler = RefreshScheduler(settings, app.state.flight_service)
+        app.state.refresh_scheduler.start()
     yield
-    # TODO: Add cleanup code
+    if app.state.refresh_scheduler:
+        await app.state.refresh_scheduler.stop()
+    await app.state.ingestor.stop()
+    await app.state.live_stream.close()
+    await app.state.webhooks.stop()
+    await app.state.flight_service.aclose()
+    await asyncio.to_thread(app.state.known_flights.save)
+    await app.state.cache.close()
+    shutdown_logging()
 
 app.router.lifespan_context = lifespan
\ No newline at end of file
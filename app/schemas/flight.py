@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, SerializerFunctionWrapHandler, field_validator, model_serializer
+from typing import Iterable, List, Optional, Tuple
+from app.schemas.error import ErrorResponseSchema
 
 
 class LiveDataSchema(BaseModel):
@@ -10,13 +11,27 @@ class LiveDataSchema(BaseModel):
     direction: Optional[float] = Field(None, description="Direction of the flight.")
     speed_horizontal: Optional[float] = Field(None, description="Horizontal speed of the flight.")
     speed_vertical: Optional[float] = Field(None, description="Vertical speed of the flight.")
+    estimated: bool = Field(False, description="Whether the position was extrapolated from the last report.")
+    error_km: Optional[float] = Field(None, description="Error bound of an extrapolated position, in km.")
+
+    @model_serializer(mode="wrap")
+    def _omit_estimate_fields(self, handler: SerializerFunctionWrapHandler):
+        # Reported positions serialize exactly as before estimates existed, so
+        # stream messages, webhooks, tracks and ETags are unchanged by them
+        data = handler(self)
+        if not self.estimated:
+            data.pop("estimated", None)
+            data.pop("error_km", None)
+        return data
 
 
 class FlightDataResponseSchema(BaseModel):
     flight_number: Optional[str] = Field(None, description="Flight number.")
     airline: Optional[str] = Field(None, description="Airline name.")
     departure_airport: Optional[str] = Field(None, description="Departure airport.")
+    departure_icao: Optional[str] = Field(None, description="Departure airport ICAO code.")
     arrival_airport: Optional[str] = Field(None, description="Arrival airport.")
+    arrival_icao: Optional[str] = Field(None, description="Arrival airport ICAO code.")
     flight_status: Optional[str] = Field(None, description="Current flight status.")
     departure_time: Optional[str] = Field(None, description="Scheduled departure time.")
     arrival_time: Optional[str] = Field(None, description="Scheduled arrival time.")
@@ -26,3 +41,77 @@ class FlightDataResponseSchema(BaseModel):
     terminal: Optional[str] = Field(None, description="Departure terminal.")
     live: LiveDataSchema = Field(default_factory=LiveDataSchema, description="Live flight data.")
     description: Optional[str] = Field(None, description="Summary description of the flight details.")
+
+
+FLIGHT_FIELDS = tuple(FlightDataResponseSchema.model_fields)
+
+
+def normalize_fields(fields: Iterable[str]) -> Tuple[str, ...]:
+    """Validate a field projection and put it in schema order, so equal sets share one cache key."""
+    requested = {field.strip() for field in fields if field.strip()}
+    unknown = requested - set(FLIGHT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown flight fields: {', '.join(sorted(unknown))}")
+    if not requested:
+        raise ValueError("At least one field is required")
+    return tuple(field for field in FLIGHT_FIELDS if field in requested)
+
+
+class FlightBatchRequestSchema(BaseModel):
+    flight_icaos: List[str] = Field(..., min_length=1, description="ICAO flight identifiers to look up.")
+    fields: Optional[List[str]] = Field(None, description="Only return (and compute) these flight fields.")
+
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, fields: Optional[List[str]]) -> Optional[List[str]]:
+        return None if fields is None else list(normalize_fields(fields))
+
+
+class FlightBatchItemSchema(BaseModel):
+    flight_icao: str = Field(..., description="Normalized ICAO flight identifier.")
+    status_code: int = Field(..., description="HTTP status of this lookup.")
+    cache_tier: Optional[str] = Field(None, description="Cache tier that served the flight, if any.")
+    stale: bool = Field(False, description="Whether a cached flight past its fresh TTL was served.")
+    data: Optional[FlightDataResponseSchema] = Field(None, description="Flight data when the lookup succeeded.")
+    error: Optional[ErrorResponseSchema] = Field(None, description="Error details when the lookup failed.")
+
+
+class FlightBatchResponseSchema(BaseModel):
+    results: List[FlightBatchItemSchema] = Field(..., description="One result per unique requested ICAO, in request order.")
+
+
+class FlightLegsResponseSchema(BaseModel):
+    flight_icao: str = Field(..., description="Normalized ICAO flight identifier.")
+    flight_date: Optional[str] = Field(None, description="Date filter applied, if any (YYYY-MM-DD).")
+    total: int = Field(..., description="Matching records upstream.")
+    legs: List[FlightDataResponseSchema] = Field(..., description="Matching flight records on this page.")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, absent on the last page.")
+
+
+class FlightListItemSchema(BaseModel):
+    flight_icao: str = Field(..., description="ICAO flight identifier.")
+    data: FlightDataResponseSchema = Field(..., description="Flight data as last held by this service.")
+
+
+class FlightListResponseSchema(BaseModel):
+    total: int = Field(..., description="Held flights matching the filters.")
+    offset: int = Field(..., description="Offset of this page.")
+    limit: int = Field(..., description="Page size requested.")
+    results: List[FlightListItemSchema] = Field(..., description="Matching flights on this page.")
+
+
+class FlightPositionItemSchema(BaseModel):
+    flight_icao: str = Field(..., description="ICAO flight identifier.")
+    distance_km: Optional[float] = Field(None, description="Great-circle distance from the query point, for radius queries.")
+    data: FlightDataResponseSchema = Field(..., description="Flight data as last held by this service.")
+
+
+class FlightPositionsResponseSchema(BaseModel):
+    total: int = Field(..., description="Held flights inside the area.")
+    results: List[FlightPositionItemSchema] = Field(..., description="Flights inside the area, at most GEO_MAX_RESULTS.")
+
+
+class FlightTrackResponseSchema(BaseModel):
+    flight_icao: str = Field(..., description="Normalized ICAO flight identifier.")
+    samples: int = Field(..., description="Position samples held for the flight.")
+    points: List[LiveDataSchema] = Field(..., description="Recorded positions, oldest first, downsampled if requested.")
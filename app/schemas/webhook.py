@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+from typing import Any, List, Optional
+from app.schemas.flight import FlightDataResponseSchema
+
+WATCHABLE_FIELDS = frozenset(
+    name for name in FlightDataResponseSchema.model_fields if name not in ("live", "description")
+)
+DEFAULT_WATCHED_FIELDS = ["flight_status", "gate", "terminal", "delay"]
+
+
+class WebhookSubscriptionRequestSchema(BaseModel):
+    flight_icao: str = Field(..., description="ICAO flight identifier to watch.")
+    url: HttpUrl = Field(..., description="Endpoint that receives change events by POST.")
+    fields: List[str] = Field(
+        default_factory=lambda: list(DEFAULT_WATCHED_FIELDS),
+        min_length=1,
+        description="Flight fields whose changes are delivered."
+    )
+    secret: Optional[str] = Field(None, description="Shared secret used to sign deliveries (X-Webhook-Signature).")
+
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, fields: List[str]) -> List[str]:
+        unknown = set(fields) - WATCHABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown flight fields: {', '.join(sorted(unknown))}")
+        return list(dict.fromkeys(fields))
+
+
+class WebhookSubscriptionSchema(BaseModel):
+    id: str = Field(..., description="Subscription identifier.")
+    flight_icao: str = Field(..., description="Normalized ICAO flight identifier.")
+    url: str = Field(..., description="Endpoint that receives change events.")
+    fields: List[str] = Field(..., description="Flight fields whose changes are delivered.")
+    created_at: float = Field(..., description="Creation time as a Unix timestamp.")
+
+
+class FlightChangeSchema(BaseModel):
+    field: str = Field(..., description="Changed flight field.")
+    previous: Any = Field(None, description="Value before the change.")
+    current: Any = Field(None, description="Value after the change.")
+
+
+class WebhookEventSchema(BaseModel):
+    subscription_id: str = Field(..., description="Subscription the event was delivered for.")
+    flight_icao: str = Field(..., description="Normalized ICAO flight identifier.")
+    detected_at: float = Field(..., description="When the change was detected, as a Unix timestamp.")
+    changes: List[FlightChangeSchema] = Field(..., description="Field-level changes since the last delivery.")
+    flight: FlightDataResponseSchema = Field(..., description="The flight after the changes.")
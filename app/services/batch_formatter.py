@@ -0,0 +1,175 @@
+"""
+Columnar formatting of whole pages of raw aviationstack records.
+
+`format_records` produces exactly what `FlightService.format_flight_data`
+produces record by record, but works column by column: each field is pulled
+out of the page as one list, coerced and range-checked in a single pass,
+repeated datetime strings (schedules, snapshot times) are parsed once per
+page, and the schema objects are validated in one call at the end.
+"""
+from datetime import datetime
+from typing import Any, Collection, Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
+from app.schemas.flight import FLIGHT_FIELDS, FlightDataResponseSchema
+
+STATUS_MAP = {
+    'scheduled': 'SCHEDULED',
+    'active': 'ACTIVE',
+    'landed': 'LANDED',
+    'cancelled': 'CANCELLED',
+    'diverted': 'DIVERTED',
+    'incident': 'INCIDENT',
+    'unknown': 'UNKNOWN'
+}
+
+_FLIGHTS = TypeAdapter(List[FlightDataResponseSchema])
+_NUMBER_TYPES = (int, float)
+_Parsed = Tuple[Optional[datetime], Optional[str]]
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _numeric(column: List[Any]) -> List[Optional[float]]:
+    # Plain ints and floats, almost every value, skip the try/except path
+    return [float(v) if type(v) in _NUMBER_TYPES else _to_float(v) for v in column]
+
+
+def _coordinates(column: List[Any]) -> List[Optional[float]]:
+    return [v if v is not None and -180 <= v <= 180 else None for v in _numeric(column)]
+
+
+def _directions(column: List[Any]) -> List[Optional[float]]:
+    return [v if v is not None and 0 <= v < 360 else None for v in _numeric(column)]
+
+
+def _datetimes(column: List[Any], memo: Dict[str, _Parsed]) -> List[_Parsed]:
+    """Parse a column of ISO timestamps into (datetime, isoformat) pairs, each distinct string once."""
+    parsed = []
+    for value in column:
+        if not value:
+            parsed.append((None, None))
+            continue
+        entry = memo.get(value)
+        if entry is None:
+            try:
+                moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                entry = (moment, moment.isoformat())
+            except (ValueError, TypeError):
+                entry = (None, None)
+            memo[value] = entry
+        parsed.append(entry)
+    return parsed
+
+
+def _statuses(column: List[Any]) -> List[Optional[str]]:
+    return [STATUS_MAP.get(s.lower(), 'UNKNOWN') if s else None for s in column]
+
+
+def _description(
+    number: Any,
+    airline: Any,
+    dep: Any,
+    arr: Any,
+    status: Optional[str],
+    delay: Any,
+    gate: Any,
+    terminal: Any
+) -> str:
+    parts = []
+    if number:
+        parts.append(f"{airline} flight {number}" if airline else f"Flight {number}")
+    if dep and arr:
+        parts.append(f"from {dep} to {arr}")
+    if status:
+        parts.append(f"is {status.lower()}")
+    if delay:
+        parts.append(f"with a {delay} minute delay")
+    if gate and terminal:
+        parts.append(f"at gate {gate}, terminal {terminal}")
+    elif gate:
+        parts.append(f"at gate {gate}")
+    elif terminal:
+        parts.append(f"at terminal {terminal}")
+    return " ".join(parts)
+
+
+def format_records(
+    records: List[Dict],
+    fields: Optional[Collection[str]] = None
+) -> List[FlightDataResponseSchema]:
+    """
+    Format a page of raw flight records. Raises like the scalar formatter
+    does (e.g. on malformed nested objects or schema validation errors); the
+    caller maps that to its error response.
+    """
+    wanted = set(FLIGHT_FIELDS if fields is None else fields)
+    departures = [r.get("departure", {}) for r in records]
+    arrivals = [r.get("arrival", {}) for r in records]
+    numbers = [r.get("flight", {}).get("number") for r in records]
+    airlines = [r.get("airline", {}).get("name") for r in records]
+    dep_airports = [d.get("airport") for d in departures]
+    arr_airports = [a.get("airport") for a in arrivals]
+    statuses = _statuses([r.get("flight_status") for r in records])
+    raw_delays = [d.get("delay") for d in departures]
+    gates = [d.get("gate") for d in departures]
+    terminals = [d.get("terminal") for d in departures]
+
+    columns: Dict[str, List[Any]] = {
+        "flight_number": numbers,
+        "airline": airlines,
+        "departure_airport": dep_airports,
+        "departure_icao": [d.get("icao") for d in departures],
+        "arrival_airport": arr_airports,
+        "arrival_icao": [a.get("icao") for a in arrivals],
+        "flight_status": statuses,
+        "delay": _numeric(raw_delays),
+        "gate": gates,
+        "terminal": terminals,
+    }
+    durations: Optional[List[Optional[str]]] = None
+    memo: Dict[str, _Parsed] = {}
+
+    if wanted & {"departure_time", "arrival_time", "duration"}:
+        dep_times = _datetimes([d.get("scheduled") for d in departures], memo)
+        arr_times = _datetimes([a.get("scheduled") for a in arrivals], memo)
+        columns["departure_time"] = [iso for _, iso in dep_times]
+        columns["arrival_time"] = [iso for _, iso in arr_times]
+        durations = [
+            str(arr - dep) if dep and arr else None
+            for (dep, _), (arr, _) in zip(dep_times, arr_times)
+        ]
+
+    if "live" in wanted:
+        live = [r.get("live", {}) for r in records]
+        updated = _datetimes([l.get("updated") for l in live], memo)
+        live_columns = {
+            "updated_time": [iso for _, iso in updated],
+            "latitude": _coordinates([l.get("latitude") for l in live]),
+            "longitude": _coordinates([l.get("longitude") for l in live]),
+            "altitude": _numeric([l.get("altitude") for l in live]),
+            "direction": _directions([l.get("direction") for l in live]),
+            "speed_horizontal": _numeric([l.get("speed_horizontal") for l in live]),
+            "speed_vertical": _numeric([l.get("speed_vertical") for l in live]),
+        }
+        columns["live"] = [dict(zip(live_columns, row)) for row in zip(*live_columns.values())]
+
+    if "description" in wanted:
+        columns["description"] = [
+            _description(*row)
+            for row in zip(numbers, airlines, dep_airports, arr_airports, statuses, raw_delays, gates, terminals)
+        ]
+
+    names = [name for name in columns if name in wanted]
+    rows = [dict(zip(names, row)) for row in zip(*(columns[name] for name in names))]
+    if durations is not None and "duration" in wanted:
+        for row, duration in zip(rows, durations):
+            if duration is not None:
+                row["duration"] = duration
+    return _FLIGHTS.validate_python(rows)
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Tuple
+import math
+from app.schemas.flight import LiveDataSchema
+from app.services.geo_index import EARTH_RADIUS_KM
+from app.services.trajectory import parse_updated_time
+
+
+class Estimate(NamedTuple):
+    live: LiveDataSchema
+    elapsed: float
+    error_km: float
+
+
+def destination(latitude: float, longitude: float, bearing: float, distance_km: float) -> Tuple[float, float]:
+    """Point reached from (latitude, longitude) along a great circle at `bearing` degrees."""
+    delta = distance_km / EARTH_RADIUS_KM
+    phi1, lam1, theta = math.radians(latitude), math.radians(longitude), math.radians(bearing)
+    phi2 = math.asin(
+        math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta)
+    )
+    lam2 = lam1 + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi1),
+        math.cos(delta) - math.sin(phi1) * math.sin(phi2)
+    )
+    return math.degrees(phi2), (math.degrees(lam2) + 540) % 360 - 180
+
+
+def extrapolate(live: LiveDataSchema, now: float, drift: float) -> Optional[Estimate]:
+    """
+    Project a reported position forward to `now` along its heading at its
+    ground speed (km/h), climbing or descending at its vertical speed (km/h).
+    The error bound grows with the distance flown since the report: `drift`
+    is the fraction of it a turn or speed change could put the aircraft off.
+    Returns None when the report lacks a time, position, heading or speed.
+    """
+    updated = parse_updated_time(live.updated_time)
+    if updated is None or None in (live.latitude, live.longitude, live.direction, live.speed_horizontal):
+        return None
+    elapsed = max(0.0, now - updated)
+    distance = live.speed_horizontal * elapsed / 3600
+    latitude, longitude = destination(live.latitude, live.longitude, live.direction, distance)
+    altitude = live.altitude
+    if altitude is not None and live.speed_vertical:
+        altitude = max(0.0, altitude + live.speed_vertical / 3.6 * elapsed)
+    error_km = distance * drift
+    estimated = live.model_copy(update={
+        "updated_time": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+        "latitude": round(latitude, 6),
+        "longitude": round(longitude, 6),
+        "altitude": altitude,
+        "estimated": True,
+        "error_km": round(error_km, 3),
+    })
+    return Estimate(estimated, elapsed, error_km)
@@ -0,0 +1,82 @@
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+import heapq
+import time
+from prometheus_client import Gauge
+from app.schemas.flight import FlightDataResponseSchema
+
+# An index entry: a NamedTuple with at least flight_icao, flight and expires_at
+_E = TypeVar("_E")
+
+
+class ExpiringFlightIndex(Generic[_E]):
+    """
+    Base for the in-memory flight indexes whose entries live as long as the
+    data they came from. Entries are keyed by flight ICAO and kept in a
+    min-heap on their expiry; due entries are dropped lazily on writes and
+    queries, and past `max_entries` the soonest to expire go first.
+
+    Subclasses build their entries and keep their own lookup structures in
+    step through `_attach` and `_detach`.
+    """
+
+    def __init__(self, max_entries: int, size_gauge: Gauge):
+        self.max_entries = max_entries
+        self._size_gauge = size_gauge
+        self._entries: Dict[str, _E] = {}
+        self._expiry: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def remove(self, flight_icao: str) -> None:
+        entry = self._entries.pop(flight_icao.upper(), None)
+        if entry is not None:
+            self._detach(entry)
+            self._size_gauge.set(len(self._entries))
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Drop every entry whose data has expired and return how many were dropped."""
+        now = time.time() if now is None else now
+        dropped = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            dropped += self._pop_soonest()
+        if dropped:
+            self._size_gauge.set(len(self._entries))
+        return dropped
+
+    def _is_current(self, flight_icao: str, flight: FlightDataResponseSchema, expires_at: float) -> bool:
+        """Whether the held entry already has this flight and outlives `expires_at`."""
+        previous = self._entries.get(flight_icao)
+        return previous is not None and previous.expires_at > expires_at and previous.flight == flight
+
+    def _store(self, entry: _E) -> None:
+        """Make `entry` the flight's current one, then expire and evict as needed."""
+        previous = self._entries.get(entry.flight_icao)
+        if previous is not None:
+            self._detach(previous)
+        self._entries[entry.flight_icao] = entry
+        self._attach(entry)
+        heapq.heappush(self._expiry, (entry.expires_at, entry.flight_icao))
+        if len(self._expiry) > 2 * len(self._entries) + 64:
+            # Refreshes leave superseded expiry items behind; rebuild before they pile up
+            self._expiry = [(e.expires_at, e.flight_icao) for e in self._entries.values()]
+            heapq.heapify(self._expiry)
+        self.purge_expired()
+        while len(self._entries) > self.max_entries:
+            self._pop_soonest()
+        self._size_gauge.set(len(self._entries))
+
+    def _pop_soonest(self) -> int:
+        """Drop the entry at the top of the expiry heap, if it is still current; returns 1 if one was dropped."""
+        expires_at, flight_icao = heapq.heappop(self._expiry)
+        entry = self._entries.get(flight_icao)
+        if entry is None or entry.expires_at != expires_at:
+            return 0
+        self._detach(self._entries.pop(flight_icao))
+        return 1
+
+    def _attach(self, entry: _E) -> None:
+        raise NotImplementedError
+
+    def _detach(self, entry: _E) -> None:
+        raise NotImplementedError
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Callable, Iterator, List, NamedTuple, Optional
+import time
+from prometheus_client import Gauge
+from app.core.serialization import encode_flight
+from app.schemas.flight import FlightDataResponseSchema
+
+INDEX_SIZE = Gauge('flight_index_entries', 'Flights held in the in-memory flight index')
+
+
+class IndexedFlight(NamedTuple):
+    flight: FlightDataResponseSchema
+    indexed_at: float
+    fresh_until: float
+    etag: str
+    body: bytes
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+
+class FlightIndex:
+    """
+    In-memory formatted flights keyed by flight ICAO, filled from snapshot
+    ingestion and consulted before any per-flight cache or upstream lookup.
+
+    Entries are dropped once their freshness runs out; past `max_entries`
+    the least recently updated flight goes first.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._flights: "OrderedDict[str, IndexedFlight]" = OrderedDict()
+        # Each is called with (flight_icao, flight, fresh_until) on every upsert
+        self.listeners: List[Callable[[str, FlightDataResponseSchema, float], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def __contains__(self, flight_icao: str) -> bool:
+        return self.get(flight_icao) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._flights))
+
+    def get(self, flight_icao: str) -> Optional[IndexedFlight]:
+        entry = self._flights.get(flight_icao.upper())
+        if entry is None:
+            return None
+        if not entry.is_fresh:
+            self.remove(flight_icao)
+            return None
+        return entry
+
+    def upsert(self, flight_icao: str, flight: FlightDataResponseSchema, ttl: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        flight_icao = flight_icao.upper()
+        self._flights[flight_icao] = IndexedFlight(flight, now, now + ttl, *encode_flight(flight))
+        self._flights.move_to_end(flight_icao)
+        while len(self._flights) > self.max_entries:
+            self._flights.popitem(last=False)
+        INDEX_SIZE.set(len(self._flights))
+        for listener in self.listeners:
+            listener(flight_icao, flight, now + ttl)
+
+    def remove(self, flight_icao: str) -> None:
+        if self._flights.pop(flight_icao.upper(), None) is not None:
+            INDEX_SIZE.set(len(self._flights))
+
+    def purge_expired(self) -> int:
+        """Drop every entry past its freshness and return how many were dropped."""
+        expired = [icao for icao, entry in self._flights.items() if not entry.is_fresh]
+        for icao in expired:
+            del self._flights[icao]
+        INDEX_SIZE.set(len(self._flights))
+        return len(expired)
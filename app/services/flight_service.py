@@ -1,133 +1,649 @@
-from typing import Optional, Dict
+from typing import Any, AsyncIterator, Collection, List, NamedTuple, Optional, Dict, Tuple
 import httpx
 from fastapi import HTTPException, status
-from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
+from app.schemas.error import ErrorResponseSchema
+from app.schemas.flight import FLIGHT_FIELDS, FlightBatchItemSchema, FlightDataResponseSchema, LiveDataSchema
+from app.core.cache import Cache, CachedFlight
+from app.core.serialization import EncodedFlight, ProjectionCache, encode_flight, encode_projection
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.hedging import Hedger
 from app.core.config import Settings
+from app.core.http_client import create_upstream_client
 from app.core.logging import logger
+from app.core.quota import Priority, QuotaExhausted, QuotaGovernor, priority_scope
+from app.core.retry import (
+    RETRIES,
+    RETRIES_SKIPPED,
+    DeadlineExceeded,
+    RetryBudget,
+    backoff_delay,
+    deadline_scope,
+    detached_context,
+    remaining_time,
+)
+from app.core.singleflight import SingleFlight
+from app.services.batch_formatter import format_records
+from app.services.dead_reckoning import extrapolate
+from app.services.flight_index import FlightIndex
+from app.services.known_flights import UNKNOWN, UNKNOWN_LOOKUPS, KnownFlights
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 from datetime import datetime
 import re
+import time
 from opentelemetry import trace
 from prometheus_client import Counter
 import asyncio
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type
-)
 
 API_REQUESTS = Counter(
     'aviation_api_requests_total',
     'Total number of requests to the aviation API',
     ['status']
 )
+STALE_RESPONSES = Counter(
+    'flight_stale_responses_total',
+    'Cached flights served past their fresh TTL',
+    ['reason']
+)
+ESTIMATED_RESPONSES = Counter(
+    'flight_estimated_responses_total',
+    'Lookups asking for an extrapolated position, by how they were served',
+    ['result']
+)
+BACKGROUND_REFRESHES = Counter(
+    'flight_background_refreshes_total',
+    'Background revalidations of stale cached flights',
+    ['result']
+)
+
+ERROR_CODES = {
+    status.HTTP_400_BAD_REQUEST: "INVALID_FORMAT",
+    status.HTTP_404_NOT_FOUND: "NOT_FOUND",
+    status.HTTP_429_TOO_MANY_REQUESTS: "RATE_LIMITED",
+    status.HTTP_503_SERVICE_UNAVAILABLE: "UPSTREAM_UNAVAILABLE",
+    status.HTTP_504_GATEWAY_TIMEOUT: "UPSTREAM_TIMEOUT",
+}
+
+class FlightLookup(NamedTuple):
+    flight: FlightDataResponseSchema
+    cache_tier: Optional[str] = None
+    cached_at: Optional[float] = None
+    fresh_until: Optional[float] = None
+    stale_reason: Optional[str] = None
+    etag: Optional[str] = None
+    body: Optional[bytes] = None
+
+    @classmethod
+    def from_cache(cls, cached: CachedFlight) -> "FlightLookup":
+        return cls(
+            cached.flight, cached.tier, cached.cached_at, cached.fresh_until, etag=cached.etag, body=cached.body
+        )
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.cached_at is None else max(0.0, time.time() - self.cached_at)
+
+    @property
+    def staleness(self) -> float:
+        """Seconds since the entry stopped being fresh (0 while fresh)."""
+        return 0.0 if self.fresh_until is None else max(0.0, time.time() - self.fresh_until)
+
+
+class FlightLeg(NamedTuple):
+    position: int
+    total: int
+    flight: FlightDataResponseSchema
+
 
 class FlightService:
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[Cache] = None,
+        index: Optional[FlightIndex] = None,
+        known: Optional[KnownFlights] = None
+    ):
         self.settings = settings
-        self.client = httpx.AsyncClient(
-            timeout=settings.API_TIMEOUT,
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+        self.client = client or create_upstream_client(settings)
+        self.cache = cache
+        self.index = index
+        self.known = known
+        self.projections = ProjectionCache(settings.CACHE_PROJECTION_MAX_ENTRIES)
+        self.singleflight = SingleFlight()
+        self.retry_budget = RetryBudget(
+            settings.RETRY_BUDGET_RATIO,
+            settings.RETRY_BUDGET_MIN_PER_SECOND,
+            settings.RETRY_BUDGET_WINDOW
+        )
+        self.hedger = Hedger(settings)
+        self.quota = QuotaGovernor(settings, cache)
+        self.breaker = CircuitBreaker(
+            "aviationstack",
+            settings,
+            cache=cache if settings.CIRCUIT_SHARED else None,
+            is_failure=self._is_upstream_failure
         )
         self.tracer = trace.get_tracer(__name__)
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Drain in-flight upstream calls, then close the connection pool."""
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        if self._inflight:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=self.settings.UPSTREAM_SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Closing upstream client with %s requests still in flight", self._inflight)
         await self.client.aclose()
 
+    @asynccontextmanager
+    async def _track_inflight(self):
+        self._inflight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            if not self._inflight:
+                self._idle.set()
+
     @staticmethod
     def validate_flight_icao(flight_icao: str) -> bool:
         """Validate ICAO flight identifier format."""
         return bool(re.match(r'^[A-Z0-9]{6,8}$', flight_icao.upper()))
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError))
-    )
+    async def get_flight(self, flight_icao: str, estimate: bool = False) -> Optional[FlightLookup]:
+        """
+        Return a formatted flight from cache, or from one upstream call shared
+        by every concurrent lookup of the same ICAO.
+
+        With `estimate`, an active flight's position is dead-reckoned to now.
+        A cached flight past its fresh TTL is then served without a refresh
+        for as long as the estimate stays within DEAD_RECKONING_MAX_ERROR_KM.
+        """
+        flight_icao = flight_icao.upper()
+        cached = await self.get_cached_flight(flight_icao)
+        if estimate and cached and cached.staleness and (estimated := self.estimate_position(cached)):
+            ESTIMATED_RESPONSES.labels(result="extended").inc()
+            return estimated
+        result = self._serve_cached(flight_icao, cached) or await self._resolve_flight(flight_icao, cached)
+        if estimate and result:
+            estimated = self.estimate_position(result)
+            ESTIMATED_RESPONSES.labels(result="estimated" if estimated else "reported").inc()
+            return estimated or result
+        return result
+
+    def estimate_position(self, lookup: FlightLookup) -> Optional[FlightLookup]:
+        """
+        The lookup with its live position extrapolated to now, or None if the
+        flight is not active, lacks what dead reckoning needs, or the estimate
+        is past its error or age bound and a real refresh is due.
+        """
+        if lookup.flight.flight_status != "ACTIVE":
+            return None
+        estimate = extrapolate(lookup.flight.live, time.time(), self.settings.DEAD_RECKONING_DRIFT)
+        if (
+            estimate is None
+            or estimate.error_km > self.settings.DEAD_RECKONING_MAX_ERROR_KM
+            or estimate.elapsed > self.settings.DEAD_RECKONING_MAX_AGE
+        ):
+            return None
+        flight = lookup.flight.model_copy(update={"live": estimate.live})
+        # The body and ETag belonged to the reported position
+        return lookup._replace(flight=flight, stale_reason=None, etag=None, body=None)
+
+    async def get_cached_flight(self, flight_icao: str) -> Optional[FlightLookup]:
+        """Return a flight from the snapshot index or cache, fresh or stale, without going upstream."""
+        if self.index and (indexed := self.index.get(flight_icao)):
+            return FlightLookup(
+                indexed.flight, "index", indexed.indexed_at, indexed.fresh_until, etag=indexed.etag, body=indexed.body
+            )
+        if not self.cache:
+            return None
+        cached = await self.cache.get_flight(flight_icao.upper())
+        return FlightLookup.from_cache(cached) if cached else None
+
+    def _serve_cached(self, flight_icao: str, cached: Optional[FlightLookup]) -> Optional[FlightLookup]:
+        """
+        Return the cached flight if it can be served as is: while fresh, or for
+        CACHE_STALE_WHILE_REVALIDATE seconds after that while a background
+        refresh runs.
+        """
+        if cached is None:
+            return None
+        if not cached.staleness:
+            return cached
+        if cached.staleness <= self.settings.CACHE_STALE_WHILE_REVALIDATE:
+            self._refresh_in_background(flight_icao)
+            STALE_RESPONSES.labels(reason="revalidating").inc()
+            return cached._replace(stale_reason="revalidating")
+        return None
+
+    async def _resolve_flight(self, flight_icao: str, cached: Optional[FlightLookup]) -> Optional[FlightLookup]:
+        """
+        Load a flight upstream, falling back to a stale cached copy if that
+        fails. Identifiers the upstream recently reported missing are not
+        looked up again, and ones the known-flight filter has never seen are
+        rejected or looked up at prefetch priority, per KNOWN_FLIGHTS_MODE.
+        """
+        priority = nullcontext()
+        if cached is None:
+            if self.cache and await self.cache.is_flight_missing(flight_icao):
+                return None
+            mode = self.settings.KNOWN_FLIGHTS_MODE
+            if self.known and mode != "off" and self.known.classify(flight_icao) == UNKNOWN:
+                if mode == "reject":
+                    UNKNOWN_LOOKUPS.labels(action="rejected").inc()
+                    return None
+                UNKNOWN_LOOKUPS.labels(action="deprioritized").inc()
+                priority = priority_scope(Priority.PREFETCH)
+        try:
+            with priority:
+                return await self.load_flight(flight_icao)
+        except Exception as e:
+            if isinstance(e, HTTPException) and e.status_code < status.HTTP_429_TOO_MANY_REQUESTS:
+                raise
+            if cached is None or cached.staleness > self.settings.CACHE_STALE_IF_ERROR:
+                raise
+            logger.warning("Upstream lookup for %s failed, serving stale cache entry", flight_icao)
+            STALE_RESPONSES.labels(reason="upstream_error").inc()
+            return cached._replace(stale_reason="upstream_error")
+
+    def _refresh_in_background(self, flight_icao: str) -> None:
+        if flight_icao in self._refreshing:
+            return
+        task = asyncio.create_task(self._background_refresh(flight_icao), context=detached_context())
+        self._refreshing[flight_icao] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(flight_icao, None))
+
+    async def _background_refresh(self, flight_icao: str) -> None:
+        try:
+            with priority_scope(Priority.REFRESH):
+                await self.load_flight(flight_icao)
+            BACKGROUND_REFRESHES.labels(result="success").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            BACKGROUND_REFRESHES.labels(result="error").inc()
+            logger.warning("Background refresh of %s failed", flight_icao)
+
+    def encode(self, lookup: FlightLookup, fields: Optional[Tuple[str, ...]] = None) -> EncodedFlight:
+        """
+        Response body and ETag for a looked-up flight, limited to `fields` when
+        given. Cached payloads reuse their stored body, and their projections
+        are memoized per field set.
+        """
+        if fields is None:
+            return EncodedFlight(lookup.body, lookup.etag) if lookup.body else encode_flight(lookup.flight)
+        if lookup.etag is None:
+            return encode_projection(lookup.flight, fields)
+        return self.projections.encode(lookup.flight, lookup.etag, fields)
+
+    async def load_flight(self, flight_icao: str) -> Optional[FlightLookup]:
+        """Load a flight from upstream, sharing the call with concurrent lookups."""
+        flight_icao = flight_icao.upper()
+        flight = await self.singleflight.do(flight_icao, lambda: self._load_flight(flight_icao))
+        return FlightLookup(flight) if flight else None
+
+    async def get_flights(self, flight_icaos: List[str]) -> List[FlightBatchItemSchema]:
+        """
+        Look up many flights at once. Identifiers are validated and deduplicated,
+        cache hits are served first and the remaining lookups fan out upstream
+        with at most BATCH_MAX_CONCURRENCY in flight. Failures are reported per
+        item instead of failing the batch.
+        """
+        with self.tracer.start_as_current_span("get_flights") as span:
+            icaos = list(dict.fromkeys(icao.upper() for icao in flight_icaos))
+            span.set_attribute("flight.batch_size", len(icaos))
+            results: Dict[str, FlightBatchItemSchema] = {}
+
+            valid = []
+            for icao in icaos:
+                if self.validate_flight_icao(icao):
+                    valid.append(icao)
+                else:
+                    results[icao] = self._batch_error(
+                        icao, status.HTTP_400_BAD_REQUEST, "Invalid ICAO flight identifier format"
+                    )
+
+            misses: Dict[str, Optional[FlightLookup]] = {}
+            for icao, cached in zip(valid, await asyncio.gather(*map(self.get_cached_flight, valid))):
+                if hit := self._serve_cached(icao, cached):
+                    results[icao] = self._batch_item(icao, hit)
+                else:
+                    misses[icao] = cached
+            span.set_attribute("flight.batch_misses", len(misses))
+
+            semaphore = asyncio.Semaphore(self.settings.BATCH_MAX_CONCURRENCY)
+
+            async def load(icao: str) -> FlightBatchItemSchema:
+                async with semaphore:
+                    try:
+                        lookup = await self._resolve_flight(icao, misses[icao])
+                    except HTTPException as e:
+                        return self._batch_error(icao, e.status_code, e.detail)
+                    except Exception:
+                        logger.exception("Unexpected error loading %s in batch", icao)
+                        return self._batch_error(icao, status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error")
+                if lookup is None:
+                    return self._batch_error(icao, status.HTTP_404_NOT_FOUND, "Flight not found")
+                return self._batch_item(icao, lookup)
+
+            for item in await asyncio.gather(*map(load, misses)):
+                results[item.flight_icao] = item
+            return [results[icao] for icao in icaos]
+
+    @staticmethod
+    def _batch_item(flight_icao: str, lookup: FlightLookup) -> FlightBatchItemSchema:
+        return FlightBatchItemSchema(
+            flight_icao=flight_icao,
+            status_code=status.HTTP_200_OK,
+            cache_tier=lookup.cache_tier,
+            stale=bool(lookup.stale_reason),
+            data=lookup.flight,
+        )
+
+    @staticmethod
+    def _batch_error(flight_icao: str, status_code: int, detail: str) -> FlightBatchItemSchema:
+        return FlightBatchItemSchema(
+            flight_icao=flight_icao,
+            status_code=status_code,
+            error=ErrorResponseSchema(detail=detail, code=ERROR_CODES.get(status_code, "INTERNAL_ERROR")),
+        )
+
+    async def _load_flight(self, flight_icao: str) -> Optional[FlightDataResponseSchema]:
+        """Fetch, format and cache one flight, coordinating with other workers via Redis."""
+        lock, token = None, None
+        if self.cache and self.settings.SINGLEFLIGHT_DISTRIBUTED:
+            lock = f"lock:{Cache.flight_key(flight_icao)}"
+            token = await self.cache.acquire_lock(lock, self.settings.SINGLEFLIGHT_LOCK_TTL)
+            if token is None and self.cache.redis_available:
+                with self._upstream_errors(flight_icao):
+                    settled, flight = await self._wait_for_peer(flight_icao, lock)
+                if settled:
+                    return flight
+
+        try:
+            raw_data = await self.fetch_flight_data(flight_icao)
+            if raw_data is None:
+                if self.cache:
+                    await self.cache.set_flight_missing(flight_icao)
+                return None
+            flight = await self.format_flight_data(raw_data)
+            if self.cache:
+                await self.cache.set_flight(flight_icao, flight)
+            return flight
+        finally:
+            if token:
+                await self.cache.release_lock(lock, token)
+
+    async def _wait_for_peer(self, flight_icao: str, lock: str) -> Tuple[bool, Optional[FlightDataResponseSchema]]:
+        """
+        Wait for the worker holding the lock to cache the flight or its absence,
+        for at most SINGLEFLIGHT_LOCK_WAIT and never past the caller's deadline.
+        Returns whether the peer settled the lookup, and the flight it cached
+        (None when it found no such flight).
+        """
+        loop = asyncio.get_running_loop()
+        wait = self.settings.SINGLEFLIGHT_LOCK_WAIT
+        remaining = remaining_time()
+        capped = remaining is not None and remaining < wait
+        deadline = loop.time() + (remaining if capped else wait)
+        while (left := deadline - loop.time()) > 0:
+            await asyncio.sleep(min(self.settings.SINGLEFLIGHT_POLL_INTERVAL, left))
+            cached = await self.cache.get_flight(flight_icao)
+            if cached and cached.is_fresh:
+                return True, cached.flight
+            if await self.cache.is_flight_missing(flight_icao):
+                return True, None
+            if not await self.cache.lock_held(lock):
+                return False, None
+        if capped:
+            raise DeadlineExceeded(f"No time left waiting for {flight_icao}")
+        return False, None
+
     async def fetch_flight_data(self, flight_icao: str) -> Optional[Dict]:
         """
-        Fetch flight data from the aviation API with retry logic and circuit breaking.
+        Fetch flight data from the aviation API with deadline-aware retries and circuit breaking.
         """
         with self.tracer.start_as_current_span("fetch_flight_data") as span:
             span.set_attribute("flight.icao", flight_icao)
             
-            try:
-                response = await self.client.get(
-                    self.settings.AVIATION_API_URL,
-                    params={
-                        "access_key": self.settings.AVIATION_STACK_API_KEY,
-                        "flight_icao": flight_icao,
-                    }
-                )
-                response.raise_for_status()
+            with self._upstream_errors(flight_icao):
+                response = await self._request_with_retries({"flight_icao": flight_icao}, flight_icao)
                 data = response.json()
 
-                API_REQUESTS.labels(status="success").inc()
-                
-                if not data or "data" not in data:
-                    return None
+            API_REQUESTS.labels(status="success").inc()
+            
+            if not data or "data" not in data:
+                return None
 
-                flights = data.get("data", [])
-                return flights[0] if flights else None
+            flights = data.get("data", [])
+            return flights[0] if flights else None
 
-            except httpx.HTTPStatusError as e:
-                API_REQUESTS.labels(status="error").inc()
-                logger.error(f"API request failed with status {e.response.status_code}")
-                if e.response.status_code == 429:
-                    raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail="Rate limit exceeded"
-                    )
+    async def fetch_flights_page(self, params: Dict[str, str], offset: int = 0, limit: int = 100) -> Tuple[List[Dict], int]:
+        """
+        Fetch one page of raw flight records matching `params` (e.g. airline_icao
+        or dep_icao), returning the records and the upstream total.
+        """
+        label = ",".join(f"{k}={v}" for k, v in params.items())
+        with self.tracer.start_as_current_span("fetch_flights_page") as span:
+            span.set_attribute("flight.query", label)
+            span.set_attribute("flight.offset", offset)
+
+            with self._upstream_errors(label):
+                response = await self._request_with_retries({**params, "limit": limit, "offset": offset}, label)
+                data = response.json()
+
+            API_REQUESTS.labels(status="success").inc()
+            records = (data or {}).get("data") or []
+            total = ((data or {}).get("pagination") or {}).get("total", offset + len(records))
+            return records, total
+
+    async def iter_flight_legs(
+        self,
+        flight_icao: str,
+        flight_date: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[Collection[str]] = None,
+        page_timeout: Optional[float] = None
+    ) -> AsyncIterator[FlightLeg]:
+        """
+        Yield every upstream record matching a flight ICAO (codeshares, daily
+        operations), optionally on one `flight_date`, starting at `offset` and
+        stopping after `limit`. Upstream pages of LEGS_PAGE_SIZE are fetched
+        only as the consumer reaches them, and each record is formatted only
+        when it is yielded, so memory stays at one page. Each page gets
+        `page_timeout` (default REQUEST_DEADLINE) within any outer deadline.
+        """
+        params = {"flight_icao": flight_icao.upper()}
+        if flight_date:
+            params["flight_date"] = flight_date
+        yielded = 0
+        while limit is None or yielded < limit:
+            page_size = self.settings.LEGS_PAGE_SIZE
+            if limit is not None:
+                page_size = min(page_size, limit - yielded)
+            with deadline_scope(page_timeout or self.settings.REQUEST_DEADLINE):
+                records, total = await self.fetch_flights_page(params, offset, page_size)
+            for record in records:
+                yield FlightLeg(offset, total, await self.format_flight_data(record, fields))
+                offset += 1
+                yielded += 1
+            if not records or offset >= total:
+                return
+
+    @contextmanager
+    def _upstream_errors(self, label: str):
+        """Translate a failed aviation API call into the matching HTTPException."""
+        try:
+            yield
+        except QuotaExhausted:
+            API_REQUESTS.labels(status="quota_exhausted").inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Upstream quota exhausted"
+            )
+        except CircuitOpenError:
+            API_REQUESTS.labels(status="circuit_open").inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="External service unavailable"
+            )
+        except httpx.HTTPStatusError as e:
+            API_REQUESTS.labels(status="error").inc()
+            logger.error("API request failed with status %s", e.response.status_code)
+            if e.response.status_code == 429:
                 raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="External service unavailable"
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Rate limit exceeded"
                 )
-            except Exception as e:
-                API_REQUESTS.labels(status="error").inc()
-                logger.exception("Unexpected error in fetch_flight_data")
-                raise
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="External service unavailable"
+            )
+        except (DeadlineExceeded, TimeoutError, httpx.TimeoutException):
+            API_REQUESTS.labels(status="timeout").inc()
+            logger.error("API request for %s timed out", label)
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="External service timed out"
+            )
+        except httpx.TransportError as e:
+            API_REQUESTS.labels(status="error").inc()
+            logger.error("API request for %s failed: %r", label, e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="External service unavailable"
+            )
+        except Exception:
+            API_REQUESTS.labels(status="error").inc()
+            logger.exception("Unexpected error calling the aviation API for %s", label)
+            raise
+
+    async def _request_with_retries(self, params: Dict[str, Any], label: str) -> httpx.Response:
+        """
+        Call the aviation API, retrying timeouts and network errors with jittered
+        backoff only while the retry fits in the caller's remaining deadline, the
+        attempt limit allows it and the process-wide retry budget has room.
+        """
+        self.retry_budget.record_request()
+        attempt = 1
+        while True:
+            if remaining_time() == 0:
+                raise DeadlineExceeded(f"No time left to fetch {label}")
+            try:
+                return await self._request_upstream(params)
+            except (httpx.TimeoutException, httpx.NetworkError, TimeoutError):
+                delay = backoff_delay(attempt, self.settings.RETRY_BASE_BACKOFF, self.settings.RETRY_MAX_BACKOFF)
+                reason = self._retry_refusal(attempt, delay)
+                if reason:
+                    RETRIES_SKIPPED.labels(reason=reason).inc()
+                    raise
+            RETRIES.inc()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _retry_refusal(self, attempt: int, delay: float) -> Optional[str]:
+        """Return why a failed attempt must not be retried, or None to retry it."""
+        if attempt >= self.settings.RETRY_MAX_ATTEMPTS:
+            return "attempts"
+        remaining = remaining_time()
+        if remaining is not None and remaining < delay + self.settings.RETRY_MIN_ATTEMPT_TIME:
+            return "deadline"
+        if not self.retry_budget.try_spend():
+            return "budget"
+        return None
+
+    async def _request_upstream(self, params: Dict[str, Any]) -> httpx.Response:
+        """Make one (possibly hedged) upstream attempt, bounded by the caller's remaining deadline."""
+        await self.quota.acquire()
+        # The deadline wraps the breaker: a caller running out of time cancels the
+        # call, which the breaker does not count against the upstream
+        async with self._track_inflight(), asyncio.timeout(remaining_time()), self.breaker.call():
+            return await self.hedger.run(lambda: self._get(params), admit=self.quota.try_acquire)
 
-    async def format_flight_data(self, raw_data: Dict) -> FlightDataResponseSchema:
-        """Format raw flight data into the response schema with additional validation."""
+    async def _get(self, params: Dict[str, Any]) -> httpx.Response:
+        response = await self.client.get(
+            self.settings.AVIATION_API_URL,
+            params={"access_key": self.settings.AVIATION_STACK_API_KEY, **params}
+        )
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _is_upstream_failure(exc: Exception) -> bool:
+        """Whether an upstream error says the aviation API is unhealthy."""
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code >= 500
+        return isinstance(exc, httpx.TransportError)
+
+    async def format_flight_data(
+        self,
+        raw_data: Dict,
+        fields: Optional[Collection[str]] = None
+    ) -> FlightDataResponseSchema:
+        """
+        Format raw flight data into the response schema with additional validation.
+        With `fields`, only those fields are returned, and the costly ones are
+        only computed when asked for: live data for `live`, the description
+        for `description`, datetimes for the times and duration.
+        """
         with self.tracer.start_as_current_span("format_flight_data"):
             try:
                 flight_info = raw_data
-                departure_time = self._parse_datetime(flight_info.get("departure", {}).get("scheduled"))
-                arrival_time = self._parse_datetime(flight_info.get("arrival", {}).get("scheduled"))
-                
-                duration = None
-                if departure_time and arrival_time:
-                    duration = str(arrival_time - departure_time)
-
-                live_data = flight_info.get("live", {})
-                live = LiveDataSchema(
-                    updated_time=self._parse_datetime(live_data.get("updated")).isoformat() if self._parse_datetime(live_data.get("updated")) else None,
-                    latitude=self._validate_coordinate(live_data.get("latitude")),
-                    longitude=self._validate_coordinate(live_data.get("longitude")),
-                    altitude=self._validate_numeric(live_data.get("altitude")),
-                    direction=self._validate_direction(live_data.get("direction")),
-                    speed_horizontal=self._validate_numeric(live_data.get("speed_horizontal")),
-                    speed_vertical=self._validate_numeric(live_data.get("speed_vertical")),
-                )
+                wanted = set(FLIGHT_FIELDS if fields is None else fields)
+                departure = flight_info.get("departure", {})
+                arrival = flight_info.get("arrival", {})
+                values: Dict[str, Any] = {
+                    "flight_number": flight_info.get("flight", {}).get("number"),
+                    "airline": flight_info.get("airline", {}).get("name"),
+                    "departure_airport": departure.get("airport"),
+                    "departure_icao": departure.get("icao"),
+                    "arrival_airport": arrival.get("airport"),
+                    "arrival_icao": arrival.get("icao"),
+                    "flight_status": self._normalize_status(flight_info.get("flight_status")),
+                    "delay": self._validate_numeric(departure.get("delay")),
+                    "gate": departure.get("gate"),
+                    "terminal": departure.get("terminal"),
+                }
 
-                return FlightDataResponseSchema(
-                    flight_number=flight_info.get("flight", {}).get("number"),
-                    airline=flight_info.get("airline", {}).get("name"),
-                    departure_airport=flight_info.get("departure", {}).get("airport"),
-                    arrival_airport=flight_info.get("arrival", {}).get("airport"),
-                    flight_status=self._normalize_status(flight_info.get("flight_status")),
-                    departure_time=departure_time.isoformat() if departure_time else None,
-                    arrival_time=arrival_time.isoformat() if arrival_time else None,
-                    duration=duration,
-                    delay=self._validate_numeric(flight_info.get("departure", {}).get("delay")),
-                    gate=flight_info.get("departure", {}).get("gate"),
-                    terminal=flight_info.get("departure", {}).get("terminal"),
-                    live=live,
-                    description=self._generate_description(flight_info)
-                )
+                if wanted & {"departure_time", "arrival_time", "duration"}:
+                    departure_time = self._parse_datetime(departure.get("scheduled"))
+                    arrival_time = self._parse_datetime(arrival.get("scheduled"))
+                    values["departure_time"] = departure_time.isoformat() if departure_time else None
+                    values["arrival_time"] = arrival_time.isoformat() if arrival_time else None
+                    if departure_time and arrival_time:
+                        values["duration"] = str(arrival_time - departure_time)
+
+                if "live" in wanted:
+                    live_data = flight_info.get("live", {})
+                    updated_time = self._parse_datetime(live_data.get("updated"))
+                    values["live"] = LiveDataSchema(
+                        updated_time=updated_time.isoformat() if updated_time else None,
+                        latitude=self._validate_coordinate(live_data.get("latitude")),
+                        longitude=self._validate_coordinate(live_data.get("longitude")),
+                        altitude=self._validate_numeric(live_data.get("altitude")),
+                        direction=self._validate_direction(live_data.get("direction")),
+                        speed_horizontal=self._validate_numeric(live_data.get("speed_horizontal")),
+                        speed_vertical=self._validate_numeric(live_data.get("speed_vertical")),
+                    )
+
+                if "description" in wanted:
+                    values["description"] = self._generate_description(flight_info)
+
+                return FlightDataResponseSchema(**{field: value for field, value in values.items() if field in wanted})
             except Exception as e:
                 logger.exception("Error formatting flight data")
                 raise HTTPException(
@@ -135,6 +651,27 @@ class FlightService:
                     detail="Error processing flight data"
                 )
 
+    async def format_flight_batch(
+        self,
+        records: List[Dict],
+        fields: Optional[Collection[str]] = None
+    ) -> List[FlightDataResponseSchema]:
+        """
+        Format a whole page of raw records column by column (see
+        batch_formatter). The result matches format_flight_data on each record
+        and it fails the same way.
+        """
+        with self.tracer.start_as_current_span("format_flight_batch") as span:
+            span.set_attribute("flight.batch_size", len(records))
+            try:
+                return format_records(records, fields)
+            except Exception:
+                logger.exception("Error formatting flight data")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error processing flight data"
+                )
+
     @staticmethod
     def _parse_datetime(dt_str: Optional[str]) -> Optional[datetime]:
         """Parse datetime string with error handling."""
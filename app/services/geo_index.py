@@ -0,0 +1,174 @@
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+import math
+from prometheus_client import Gauge
+from app.schemas.flight import FlightDataResponseSchema
+from app.services.expiring_index import ExpiringFlightIndex
+
+GEO_INDEX_SIZE = Gauge('flight_geo_index_entries', 'Flights with a live position in the geospatial index')
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_Cell = Tuple[int, int]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoEntry(NamedTuple):
+    flight_icao: str
+    flight: FlightDataResponseSchema
+    latitude: float
+    longitude: float
+    expires_at: float
+    cell: _Cell
+    # Radians and cos(latitude), kept so radius queries skip the conversions
+    phi: float
+    lam: float
+    cos_phi: float
+
+
+class FlightGeoIndex(ExpiringFlightIndex[GeoEntry]):
+    """
+    Uniform lat/lon grid over the live position of every flight this worker
+    holds, fed from the same cache and snapshot writes as the query indexes.
+    A refresh moves a flight to its new cell; flights without a position, or
+    whose data has expired, drop out. Past `max_entries` the soonest to
+    expire go first.
+
+    Bounding-box and radius queries visit only the cells they overlap (or
+    every occupied cell, when that is fewer) and check exact coordinates
+    in those.
+    """
+
+    def __init__(self, cell_degrees: float, max_entries: int):
+        super().__init__(max_entries, GEO_INDEX_SIZE)
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[_Cell, Dict[str, GeoEntry]] = {}
+        self._rows = math.ceil(180 / cell_degrees)
+        self._columns = math.ceil(360 / cell_degrees)
+
+    def cell_for(self, latitude: float, longitude: float) -> _Cell:
+        row = min(int((latitude + 90) // self.cell_degrees), self._rows - 1)
+        column = int(((longitude + 180) % 360) // self.cell_degrees) % self._columns
+        return row, column
+
+    def upsert(self, flight_icao: str, flight: FlightDataResponseSchema, expires_at: float) -> None:
+        flight_icao = flight_icao.upper()
+        latitude, longitude = flight.live.latitude, flight.live.longitude
+        if latitude is None or longitude is None or not -90 <= latitude <= 90:
+            self.remove(flight_icao)
+            return
+        if self._is_current(flight_icao, flight, expires_at):
+            return
+        phi, lam = math.radians(latitude), math.radians(longitude)
+        self._store(GeoEntry(
+            flight_icao, flight, latitude, longitude, expires_at, self.cell_for(latitude, longitude),
+            phi, lam, math.cos(phi)
+        ))
+
+    def within_bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        limit: int
+    ) -> Tuple[List[GeoEntry], int]:
+        """
+        Flights inside a bounding box, ordered by ICAO, up to `limit`, and the
+        total number inside. A box whose `min_lon` is east of `max_lon`
+        crosses the antimeridian.
+        """
+        self.purge_expired()
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        if min_lon > max_lon:
+            matches = [
+                e for e in candidates
+                if min_lat <= e.latitude <= max_lat and (e.longitude >= min_lon or e.longitude <= max_lon)
+            ]
+        else:
+            matches = [
+                e for e in candidates if min_lat <= e.latitude <= max_lat and min_lon <= e.longitude <= max_lon
+            ]
+        matches.sort(key=lambda e: e.flight_icao)
+        return matches[:limit], len(matches)
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int
+    ) -> Tuple[List[Tuple[GeoEntry, float]], int]:
+        """
+        Flights within `radius_km` great-circle distance of a point, nearest
+        first, up to `limit`, with their distances, and the total number in range.
+        """
+        self.purge_expired()
+        span_lat = radius_km / KM_PER_DEGREE
+        min_lat, max_lat = max(-90.0, latitude - span_lat), min(90.0, latitude + span_lat)
+        widest = max(abs(min_lat), abs(max_lat))
+        if widest >= 90 or span_lat >= 90:
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            span_lon = span_lat / math.cos(math.radians(widest))
+            if span_lon >= 180:
+                min_lon, max_lon = -180.0, 180.0
+            else:
+                min_lon = (longitude - span_lon + 180) % 360 - 180
+                max_lon = (longitude + span_lon + 180) % 360 - 180
+
+        # Compare haversine terms rather than distances: asin and sqrt only for the page returned
+        phi0, lam0 = math.radians(latitude), math.radians(longitude)
+        cos_phi0 = math.cos(phi0)
+        bound = math.sin(min(math.pi / 2, radius_km / (2 * EARTH_RADIUS_KM))) ** 2
+        sin = math.sin
+        matches = []
+        for entry in self._candidates(min_lat, min_lon, max_lat, max_lon):
+            if not min_lat <= entry.latitude <= max_lat:
+                continue
+            a = sin((entry.phi - phi0) / 2) ** 2 + cos_phi0 * entry.cos_phi * sin((entry.lam - lam0) / 2) ** 2
+            if a <= bound:
+                matches.append((a, entry.flight_icao, entry))
+        matches.sort(key=lambda match: match[:2])
+        page = [
+            (entry, 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a))))
+            for a, _, entry in matches[:limit]
+        ]
+        return page, len(matches)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> Iterable[GeoEntry]:
+        """Entries in every cell the box overlaps; coordinates still need an exact check."""
+        bottom, left = self.cell_for(min_lat, min_lon)
+        top, right = self.cell_for(max_lat, max_lon)
+        if min_lon > max_lon or left > right:
+            columns = list(range(left, self._columns)) + list(range(0, right + 1))
+        elif min_lon == -180 and max_lon == 180:
+            columns = list(range(self._columns))
+        else:
+            columns = list(range(left, right + 1))
+        rows = range(bottom, top + 1)
+        if len(rows) * len(columns) > len(self._cells):
+            row_set, column_set = set(rows), set(columns)
+            cells = [cell for cell in self._cells if cell[0] in row_set and cell[1] in column_set]
+        else:
+            cells = [(row, column) for row in rows for column in columns if (row, column) in self._cells]
+        return [entry for cell in cells for entry in self._cells[cell].values()]
+
+    def _attach(self, entry: GeoEntry) -> None:
+        self._cells.setdefault(entry.cell, {})[entry.flight_icao] = entry
+
+    def _detach(self, entry: GeoEntry) -> None:
+        members = self._cells.get(entry.cell)
+        if members is not None:
+            members.pop(entry.flight_icao, None)
+            if not members:
+                del self._cells[entry.cell]
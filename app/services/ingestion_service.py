@@ -0,0 +1,151 @@
+from typing import Dict, List, NamedTuple, Optional
+import asyncio
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.cache import Cache, ttl_for_status
+from app.core.config import Settings
+from app.core.logging import logger
+from app.core.quota import Priority, priority_scope
+from app.core.serialization import dumps, loads
+from app.schemas.flight import FlightDataResponseSchema
+from app.services.flight_index import FlightIndex
+from app.services.flight_service import FlightService
+
+INGEST_POLLS = Counter(
+    'flight_ingest_polls_total',
+    'Snapshot ingestion rounds by slice and how they ended',
+    ['slice', 'result']
+)
+INGEST_RECORDS = Histogram(
+    'flight_ingest_records_per_poll',
+    'Flight records indexed per snapshot poll',
+    ['slice'],
+    buckets=(0, 10, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+INGEST_LAG = Gauge(
+    'flight_ingest_lag_seconds',
+    'Seconds since the indexed snapshot of a slice was fetched upstream',
+    ['slice']
+)
+
+
+class SnapshotSlice(NamedTuple):
+    name: str
+    params: Dict[str, str]
+
+
+class SnapshotIngestor:
+    """
+    Periodically pull whole airline and departure-airport slices from the
+    aviation API, page by page, into the shared FlightIndex.
+
+    One paginated query returns up to INGEST_PAGE_SIZE flights for a single
+    call, against one flight per call for ICAO lookups. With Redis, only one
+    worker polls each slice per round (whoever takes the slice's lock) and
+    publishes the formatted snapshot for the other workers to index.
+    """
+
+    def __init__(self, settings: Settings, service: FlightService, index: FlightIndex, cache: Optional[Cache] = None):
+        self.settings = settings
+        self.service = service
+        self.index = index
+        self.cache = cache
+        self.slices = [
+            SnapshotSlice(f"airline:{code.upper()}", {"airline_icao": code.upper()})
+            for code in settings.INGEST_AIRLINES
+        ] + [
+            SnapshotSlice(f"departure:{code.upper()}", {"dep_icao": code.upper()})
+            for code in settings.INGEST_DEPARTURE_AIRPORTS
+        ]
+        self._polled_at: Dict[str, float] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        for snapshot_slice in self.slices:
+            polled_at = self._polled_at
+            INGEST_LAG.labels(slice=snapshot_slice.name).set_function(
+                lambda name=snapshot_slice.name: time.time() - polled_at[name] if name in polled_at else float("nan")
+            )
+            self._tasks.append(asyncio.create_task(self._run(snapshot_slice)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, snapshot_slice: SnapshotSlice) -> None:
+        while True:
+            try:
+                await self.poll(snapshot_slice)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                INGEST_POLLS.labels(slice=snapshot_slice.name, result="error").inc()
+                logger.warning("Snapshot ingestion of %s failed", snapshot_slice.name)
+            self.index.purge_expired()
+            await asyncio.sleep(self.settings.INGEST_INTERVAL)
+
+    async def poll(self, snapshot_slice: SnapshotSlice) -> int:
+        """Index the latest snapshot of one slice, fetching it only if no other worker is; returns flights indexed."""
+        lock, token = f"lock:ingest:{snapshot_slice.name}", None
+        if self.cache:
+            token = await self.cache.acquire_lock(lock, self.settings.INGEST_INTERVAL * 0.9)
+            if token is None and self.cache.redis_available:
+                return await self._load_shared(snapshot_slice)
+
+        polled_at = time.time()
+        with priority_scope(Priority.REFRESH):
+            records = await self._fetch_slice(snapshot_slice)
+        records = [record for record in records if (record.get("flight") or {}).get("icao")]
+        formatted = await self.service.format_flight_batch(records)
+        flights: Dict[str, FlightDataResponseSchema] = {
+            record["flight"]["icao"].upper(): flight for record, flight in zip(records, formatted)
+        }
+
+        self._index(snapshot_slice, flights, polled_at)
+        INGEST_POLLS.labels(slice=snapshot_slice.name, result="fetched").inc()
+        if self.cache:
+            snapshot = dumps({
+                "polled_at": polled_at,
+                "flights": {icao: flight.model_dump(mode="json") for icao, flight in flights.items()},
+            })
+            await self.cache.set_shared(f"ingest:{snapshot_slice.name}", snapshot, self.settings.INGEST_INDEX_TTL)
+        return len(flights)
+
+    async def _fetch_slice(self, snapshot_slice: SnapshotSlice) -> List[Dict]:
+        records: List[Dict] = []
+        for _ in range(self.settings.INGEST_MAX_PAGES):
+            page, total = await self.service.fetch_flights_page(
+                snapshot_slice.params, offset=len(records), limit=self.settings.INGEST_PAGE_SIZE
+            )
+            records.extend(page)
+            if not page or len(records) >= total:
+                break
+        return records
+
+    async def _load_shared(self, snapshot_slice: SnapshotSlice) -> int:
+        """Index the snapshot another worker published, if it is newer than ours."""
+        raw = await self.cache.get_shared(f"ingest:{snapshot_slice.name}")
+        if not raw:
+            INGEST_POLLS.labels(slice=snapshot_slice.name, result="skipped").inc()
+            return 0
+        snapshot = loads(raw)
+        if snapshot["polled_at"] <= self._polled_at.get(snapshot_slice.name, 0):
+            INGEST_POLLS.labels(slice=snapshot_slice.name, result="unchanged").inc()
+            return 0
+        flights = {
+            icao: FlightDataResponseSchema.model_validate(flight)
+            for icao, flight in snapshot["flights"].items()
+        }
+        self._index(snapshot_slice, flights, snapshot["polled_at"])
+        INGEST_POLLS.labels(slice=snapshot_slice.name, result="shared").inc()
+        return len(flights)
+
+    def _index(self, snapshot_slice: SnapshotSlice, flights: Dict[str, FlightDataResponseSchema], polled_at: float) -> None:
+        for flight_icao, flight in flights.items():
+            # Never fresher than the cache would keep the same flight, e.g. ACTIVE ones
+            ttl = min(self.settings.INGEST_INDEX_TTL, ttl_for_status(self.settings, flight.flight_status))
+            self.index.upsert(flight_icao, flight, ttl, now=polled_at)
+        self._polled_at[snapshot_slice.name] = polled_at
+        INGEST_RECORDS.labels(slice=snapshot_slice.name).observe(len(flights))
@@ -0,0 +1,105 @@
+from typing import Optional
+import os
+import re
+from prometheus_client import Counter, Gauge
+from app.core.bloom import BloomFilter
+from app.core.config import Settings
+from app.core.logging import logger
+from app.schemas.flight import FlightDataResponseSchema
+
+KNOWN_FLIGHTS_ENTRIES = Gauge('known_flights_entries', 'Identifiers and airline prefixes in the known-flight filter')
+UNKNOWN_LOOKUPS = Counter(
+    'known_flights_unknown_lookups_total',
+    'Upstream lookups for identifiers neither seen before nor of a known airline, by action taken',
+    ['action']
+)
+
+KNOWN = "known"
+PLAUSIBLE = "plausible"
+UNKNOWN = "unknown"
+
+_PREFIX = re.compile(r'^[A-Z]{2,3}')
+
+
+def airline_prefix(flight_icao: str) -> Optional[str]:
+    """The airline designator a flight identifier starts with, e.g. BAW for BAW117."""
+    match = _PREFIX.match(flight_icao.upper())
+    return match.group() if match else None
+
+
+class KnownFlights:
+    """
+    Bloom filter of flight identifiers the service has found upstream or
+    ingested, and of their airline prefixes, used to spot identifiers that
+    cannot be real before spending an upstream call on them.
+
+    A known identifier, or a new flight number of a known airline, is looked
+    up as usual. Anything else is unknown, but only once the filter holds
+    KNOWN_FLIGHTS_MIN_ENTRIES items; before that it is too cold to judge.
+    The filter is saved to KNOWN_FLIGHTS_PATH at shutdown and reloaded at
+    startup, or started afresh when that file is missing, unreadable or was
+    sized differently; KNOWN_AIRLINE_PREFIXES are added either way.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.filter = self._load() or BloomFilter(settings.KNOWN_FLIGHTS_CAPACITY, settings.KNOWN_FLIGHTS_ERROR_RATE)
+        for prefix in settings.KNOWN_AIRLINE_PREFIXES:
+            self.filter.add(f"prefix:{prefix.upper()}")
+        KNOWN_FLIGHTS_ENTRIES.set(len(self.filter))
+
+    @property
+    def warm(self) -> bool:
+        return len(self.filter) >= self.settings.KNOWN_FLIGHTS_MIN_ENTRIES
+
+    def record(
+        self,
+        flight_icao: str,
+        flight: Optional[FlightDataResponseSchema] = None,
+        expires_at: Optional[float] = None
+    ) -> None:
+        """Remember a flight identifier that resolved to a real flight, and its airline prefix."""
+        flight_icao = flight_icao.upper()
+        self.filter.add(f"icao:{flight_icao}")
+        if prefix := airline_prefix(flight_icao):
+            self.filter.add(f"prefix:{prefix}")
+        KNOWN_FLIGHTS_ENTRIES.set(len(self.filter))
+
+    def classify(self, flight_icao: str) -> str:
+        flight_icao = flight_icao.upper()
+        if f"icao:{flight_icao}" in self.filter:
+            return KNOWN
+        prefix = airline_prefix(flight_icao)
+        if not self.warm or (prefix and f"prefix:{prefix}" in self.filter):
+            return PLAUSIBLE
+        return UNKNOWN
+
+    def save(self) -> None:
+        """Write the filter to KNOWN_FLIGHTS_PATH, atomically, if a path is configured."""
+        path = self.settings.KNOWN_FLIGHTS_PATH
+        if not path:
+            return
+        partial = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(partial, "wb") as f:
+                f.write(self.filter.to_bytes())
+            os.replace(partial, path)
+        except OSError as e:
+            logger.warning("Could not save known-flight filter to %s: %s", path, e)
+
+    def _load(self) -> Optional[BloomFilter]:
+        path = self.settings.KNOWN_FLIGHTS_PATH
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                bloom = BloomFilter.from_bytes(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning("Rebuilding known-flight filter, could not load %s: %s", path, e)
+            return None
+        if (bloom.capacity, bloom.error_rate) != (
+            self.settings.KNOWN_FLIGHTS_CAPACITY, self.settings.KNOWN_FLIGHTS_ERROR_RATE
+        ):
+            logger.info("Rebuilding known-flight filter for new capacity or error rate")
+            return None
+        return bloom
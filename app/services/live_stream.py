@@ -0,0 +1,237 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import asyncio
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from redis.exceptions import RedisError
+from app.core.cache import Cache
+from app.core.config import Settings
+from app.core.logging import logger
+from app.core.quota import Priority, priority_scope
+from app.core.retry import deadline_scope
+from app.core.serialization import dumps, loads
+from app.schemas.flight import LiveDataSchema
+from app.services.flight_service import FlightService
+
+STREAM_SUBSCRIBERS = Gauge('flight_stream_subscribers', 'Live stream subscribers connected to this worker')
+STREAM_FLIGHTS = Gauge('flight_stream_flights', 'Flights with at least one live stream subscriber on this worker')
+STREAM_PUBLISHED = Counter(
+    'flight_stream_updates_published_total',
+    'Live position updates published after a poll, by where they were sent',
+    ['path']
+)
+STREAM_DROPPED = Counter(
+    'flight_stream_updates_dropped_total',
+    'Updates discarded because a subscriber was not keeping up'
+)
+STREAM_FANOUT_LATENCY = Histogram(
+    'flight_stream_fanout_latency_seconds',
+    'Time from publishing a live update to queueing it for local subscribers',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+class LiveSubscription:
+    """
+    One client's bounded queue of serialized live updates. A subscriber that
+    falls behind loses its oldest updates rather than slowing the fan-out;
+    only the latest positions matter to a map. An update carrying the same
+    `live` block as the last one offered is skipped.
+    """
+
+    def __init__(self, flight_icao: str, queue_size: int, last_live: Optional[Dict[str, Any]] = None):
+        self.flight_icao = flight_icao
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.last_live = last_live
+
+    def offer(self, message: str, live: Optional[Dict[str, Any]] = None) -> None:
+        if live is not None:
+            if live == self.last_live:
+                return
+            self.last_live = live
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            STREAM_DROPPED.inc()
+        self.queue.put_nowait(message)
+
+    async def next(self, timeout: float) -> Optional[str]:
+        """Wait up to `timeout` seconds for the next update, returning None on a quiet period."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveStreamHub:
+    """
+    Fan live position updates for each streamed flight out to every subscriber.
+
+    Each flight with local subscribers gets a feed task. Every
+    STREAM_POLL_INTERVAL one worker per flight wins a short Redis lock, looks
+    the flight up (cache first, upstream only when stale) and publishes the
+    `live` block on the flight's Redis channel when it changed. Every worker
+    relays the channel to its own subscribers, so viewers on any number of
+    workers cost one poll. Without Redis each worker polls and fans out locally.
+    """
+
+    def __init__(self, settings: Settings, service: FlightService, cache: Optional[Cache] = None):
+        self.settings = settings
+        self.service = service
+        self.cache = cache
+        self._subscribers: Dict[str, Set[LiveSubscription]] = {}
+        self._feeds: Dict[str, asyncio.Task] = {}
+        # Last `live` block sent for each flight, as JSON-mode dicts
+        self._last_published: Dict[str, Dict[str, Any]] = {}
+        self._pubsub = cache.pubsub() if cache else None
+        self._reader: Optional[asyncio.Task] = None
+        self._shared: Set[str] = set()
+
+    @staticmethod
+    def channel(flight_icao: str) -> str:
+        return f"live:{flight_icao}"
+
+    @classmethod
+    def message(cls, flight_icao: str, live: LiveDataSchema) -> str:
+        """Serialize one live update; every subscriber is sent the same string."""
+        return cls._encode(flight_icao, live.model_dump(mode="json"))
+
+    @staticmethod
+    def _encode(flight_icao: str, live: Dict[str, Any]) -> str:
+        return dumps({"flight_icao": flight_icao, "published_at": time.time(), "live": live}).decode()
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, flight_icao: str, current: Optional[LiveDataSchema] = None) -> AsyncIterator[LiveSubscription]:
+        """
+        Subscribe to a flight's updates. `current` is the position the caller
+        already sent the client: it is not delivered again, and a feed started
+        for this subscriber only publishes once the position changes.
+        """
+        flight_icao = flight_icao.upper()
+        last_live = current.model_dump(mode="json") if current is not None else None
+        subscription = LiveSubscription(flight_icao, self.settings.STREAM_QUEUE_SIZE, last_live)
+        subscribers = self._subscribers.setdefault(flight_icao, set())
+        subscribers.add(subscription)
+        if len(subscribers) == 1:
+            if last_live is not None:
+                self._last_published.setdefault(flight_icao, last_live)
+            await self._start_feed(flight_icao)
+        self._update_gauges()
+        try:
+            yield subscription
+        finally:
+            subscribers.discard(subscription)
+            if not subscribers and self._subscribers.get(flight_icao) is subscribers:
+                del self._subscribers[flight_icao]
+                await self._stop_feed(flight_icao)
+            self._update_gauges()
+
+    async def close(self) -> None:
+        for flight_icao in list(self._feeds):
+            await self._stop_feed(flight_icao)
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except (RedisError, OSError):
+                pass
+
+    async def _start_feed(self, flight_icao: str) -> None:
+        if self._pubsub is not None and self.cache.redis_available:
+            try:
+                await self._pubsub.subscribe(self.channel(flight_icao))
+                self._shared.add(flight_icao)
+                if self._reader is None:
+                    self._reader = asyncio.create_task(self._read_channels())
+            except (RedisError, OSError) as e:
+                logger.warning("Live stream for %s falling back to local fan-out: %s", flight_icao, e)
+        self._feeds[flight_icao] = asyncio.create_task(self._feed(flight_icao))
+
+    async def _stop_feed(self, flight_icao: str) -> None:
+        task = self._feeds.pop(flight_icao, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._last_published.pop(flight_icao, None)
+        if flight_icao in self._shared:
+            self._shared.discard(flight_icao)
+            try:
+                await self._pubsub.unsubscribe(self.channel(flight_icao))
+            except (RedisError, OSError):
+                pass
+
+    async def _feed(self, flight_icao: str) -> None:
+        interval = self.settings.STREAM_POLL_INTERVAL
+        while True:
+            try:
+                if await self._should_poll(flight_icao, interval):
+                    await self._poll(flight_icao, interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Live stream poll of %s failed", flight_icao)
+            await asyncio.sleep(interval)
+
+    async def _should_poll(self, flight_icao: str, interval: float) -> bool:
+        """Whether this worker polls the flight this round: it holds the round's lock, or Redis is down."""
+        if self.cache is None:
+            return True
+        token = await self.cache.acquire_lock(f"lock:{self.channel(flight_icao)}", interval)
+        return token is not None or not self.cache.redis_available
+
+    async def _poll(self, flight_icao: str, interval: float) -> None:
+        with deadline_scope(interval), priority_scope(Priority.REFRESH):
+            lookup = await self.service.get_flight(flight_icao)
+        if lookup is None:
+            return
+        live = lookup.flight.live.model_dump(mode="json")
+        if live == self._last_published.get(flight_icao):
+            return
+        self._last_published[flight_icao] = live
+        message = self._encode(flight_icao, live)
+        if flight_icao in self._shared:
+            if await self.cache.publish(self.channel(flight_icao), message) is not None:
+                STREAM_PUBLISHED.labels(path="redis").inc()
+                return
+        STREAM_PUBLISHED.labels(path="local").inc()
+        self.dispatch(flight_icao, message)
+
+    async def _read_channels(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as e:
+                logger.warning("Live stream channel read failed: %s", e)
+                await asyncio.sleep(self.settings.CACHE_REDIS_RETRY_INTERVAL)
+                continue
+            if message and message.get("type") == "message":
+                self.dispatch(message["channel"].split(":", 1)[1], message["data"])
+
+    def dispatch(self, flight_icao: str, message: str) -> None:
+        """Queue a serialized update for every local subscriber of the flight that lacks it."""
+        subscribers = self._subscribers.get(flight_icao)
+        if not subscribers:
+            return
+        try:
+            update = loads(message)
+            live, published_at = update["live"], update["published_at"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Discarding unreadable live update for %s", flight_icao)
+            return
+        self._last_published[flight_icao] = live
+        for subscription in subscribers:
+            subscription.offer(message, live)
+        STREAM_FANOUT_LATENCY.observe(max(0.0, time.time() - published_at))
+
+    def _update_gauges(self) -> None:
+        STREAM_SUBSCRIBERS.set(self.subscriber_count)
+        STREAM_FLIGHTS.set(len(self._subscribers))
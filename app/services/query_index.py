@@ -0,0 +1,121 @@
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from prometheus_client import Gauge
+from app.schemas.flight import FlightDataResponseSchema
+from app.services.expiring_index import ExpiringFlightIndex
+
+QUERY_INDEX_SIZE = Gauge('flight_query_index_entries', 'Flights held in the secondary query indexes')
+
+# Lower bounds, in minutes, of the delay buckets flights are indexed under
+DELAY_BUCKETS = (0, 15, 30, 60, 120, 240)
+
+_Key = Tuple[str, str]
+
+
+def delay_bucket(delay: Optional[float]) -> Optional[int]:
+    """Lower bound of the bucket a delay falls in, or None for no or a negative delay."""
+    if delay is None or delay < 0:
+        return None
+    return max(bound for bound in DELAY_BUCKETS if bound <= delay)
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    return value.strip().casefold() if value and value.strip() else None
+
+
+class QueryEntry(NamedTuple):
+    flight_icao: str
+    flight: FlightDataResponseSchema
+    expires_at: float
+    keys: Tuple[_Key, ...]
+
+
+class FlightQueryIndex(ExpiringFlightIndex[QueryEntry]):
+    """
+    Secondary indexes over every flight this worker holds: flights written to
+    or promoted into the cache and flights indexed from snapshots. Each
+    flight is posted under its departure and arrival airport (ICAO code),
+    airline name, status and delay bucket, and re-posted whenever a newer
+    copy arrives. Entries go when the data they came from expires; past
+    `max_entries` the soonest to expire go first.
+
+    Queries intersect posting sets, so they cost in proportion to the
+    smallest matching set, never a scan, and never reach the upstream.
+    """
+
+    def __init__(self, max_entries: int):
+        super().__init__(max_entries, QUERY_INDEX_SIZE)
+        self._postings: Dict[_Key, Set[str]] = {}
+
+    @staticmethod
+    def keys_for(flight: FlightDataResponseSchema) -> Tuple[_Key, ...]:
+        keys = [
+            ("departure", _normalize(flight.departure_icao)),
+            ("arrival", _normalize(flight.arrival_icao)),
+            ("airline", _normalize(flight.airline)),
+            ("status", _normalize(flight.flight_status)),
+        ]
+        bucket = delay_bucket(flight.delay)
+        if bucket is not None:
+            keys.append(("delay", str(bucket)))
+        return tuple(key for key in keys if key[1] is not None)
+
+    def upsert(self, flight_icao: str, flight: FlightDataResponseSchema, expires_at: float) -> None:
+        flight_icao = flight_icao.upper()
+        if not self._is_current(flight_icao, flight, expires_at):
+            self._store(QueryEntry(flight_icao, flight, expires_at, self.keys_for(flight)))
+
+    def query(
+        self,
+        departure: Optional[str] = None,
+        arrival: Optional[str] = None,
+        airline: Optional[str] = None,
+        flight_status: Optional[str] = None,
+        min_delay: Optional[float] = None,
+        order_by: str = "departure_time",
+        offset: int = 0,
+        limit: int = 50
+    ) -> Tuple[List[QueryEntry], int]:
+        """
+        Flights matching every given filter, ordered by `order_by` (missing
+        values last) then ICAO, as one page and the total number of matches.
+        """
+        self.purge_expired()
+        candidates: List[Set[str]] = [
+            self._postings.get((dimension, _normalize(value)), set())
+            for dimension, value in (
+                ("departure", departure), ("arrival", arrival), ("airline", airline), ("status", flight_status)
+            )
+            if value is not None
+        ]
+        if min_delay is not None:
+            floor = delay_bucket(max(0.0, min_delay))
+            candidates.append(set().union(*(
+                self._postings.get(("delay", str(bound)), set()) for bound in DELAY_BUCKETS if bound >= floor
+            )))
+        if not candidates:
+            raise ValueError("At least one filter is required")
+
+        candidates.sort(key=len)
+        matches = candidates[0].intersection(*candidates[1:])
+        entries = [self._entries[icao] for icao in matches]
+        if min_delay is not None:
+            entries = [e for e in entries if e.flight.delay is not None and e.flight.delay >= min_delay]
+
+        def order(entry: QueryEntry) -> Tuple[bool, str, str]:
+            value = getattr(entry.flight, order_by)
+            return value is None, value or "", entry.flight_icao
+
+        entries.sort(key=order)
+        return entries[offset:offset + limit], len(entries)
+
+    def _attach(self, entry: QueryEntry) -> None:
+        for key in entry.keys:
+            self._postings.setdefault(key, set()).add(entry.flight_icao)
+
+    def _detach(self, entry: QueryEntry) -> None:
+        for key in entry.keys:
+            postings = self._postings.get(key)
+            if postings is not None:
+                postings.discard(entry.flight_icao)
+                if not postings:
+                    del self._postings[key]
@@ -0,0 +1,212 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import math
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.cache import FINAL_STATUSES
+from app.core.config import Settings
+from app.core.logging import logger
+from app.core.quota import Priority, priority_scope
+from app.core.retry import deadline_scope
+from app.schemas.flight import FlightDataResponseSchema
+from app.services.flight_service import FlightService
+
+SCHEDULED_REFRESHES = Counter(
+    'flight_scheduled_refreshes_total',
+    'Proactive refreshes of tracked flights by result',
+    ['result']
+)
+TRACKED_FLIGHTS = Gauge('flight_scheduler_tracked', 'Flights the refresh scheduler is tracking')
+REFRESH_INTERVAL = Histogram(
+    'flight_scheduler_interval_seconds',
+    'Refresh intervals chosen for tracked flights',
+    ['status'],
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+
+
+class _Tracked:
+    __slots__ = ("rate", "last_seen", "due_at", "status")
+
+    def __init__(self, now: float):
+        self.rate = 0.0
+        self.last_seen = now
+        self.due_at = math.inf
+        self.status: Optional[str] = None
+
+
+class RefreshScheduler:
+    """
+    Proactively refresh the flights clients are asking about, each on its own
+    interval, so reads find a fresh cache entry.
+
+    The interval follows how fast the flight changes: SCHEDULER_INTERVAL_ACTIVE
+    for airborne flights, a fraction of the time left before departure for
+    scheduled ones, and never for landed or cancelled flights. Flights read
+    less than once per interval are refreshed up to SCHEDULER_MAX_STRETCH
+    times less often, and flights nobody has read for SCHEDULER_IDLE_TIMEOUT
+    are dropped. Due flights are kept in a min-heap on their due time;
+    rescheduling pushes a new entry and stale heap entries are skipped.
+    """
+
+    def __init__(self, settings: Settings, service: FlightService):
+        self.settings = settings
+        self.service = service
+        self._tracked: Dict[str, _Tracked] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(settings.SCHEDULER_MAX_CONCURRENCY)
+
+    def __len__(self) -> int:
+        return len(self._tracked)
+
+    def __contains__(self, flight_icao: str) -> bool:
+        return flight_icao.upper() in self._tracked
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def track(self, flight_icao: str, flight: FlightDataResponseSchema, fresh_until: Optional[float] = None) -> None:
+        """Record a client read of a flight, scheduling it for refresh if it is new."""
+        flight_icao = flight_icao.upper()
+        now = time.monotonic()
+        tracked = self._tracked.get(flight_icao)
+        if tracked is None:
+            if len(self._tracked) >= self.settings.SCHEDULER_MAX_TRACKED:
+                return
+            tracked = self._tracked[flight_icao] = _Tracked(now)
+            TRACKED_FLIGHTS.set(len(self._tracked))
+        tracked.rate = self._read_rate(tracked, now) + 1 / self.settings.SCHEDULER_RATE_WINDOW
+        tracked.last_seen = now
+        if tracked.due_at == math.inf:
+            if flight.flight_status in FINAL_STATUSES:
+                self._untrack(flight_icao)
+                return
+            tracked.status = flight.flight_status
+            first = self._refresh_in(fresh_until) if fresh_until else self.interval_for(flight, tracked.rate)
+            self._schedule(flight_icao, tracked, first)
+
+    def _read_rate(self, tracked: _Tracked, now: float) -> float:
+        """Exponentially decayed reads per second over SCHEDULER_RATE_WINDOW, as of `now`."""
+        return tracked.rate * math.exp(-(now - tracked.last_seen) / self.settings.SCHEDULER_RATE_WINDOW)
+
+    def interval_for(self, flight: FlightDataResponseSchema, rate: float) -> Optional[float]:
+        """Seconds until a flight should be refreshed, or None if it no longer changes."""
+        interval = self._base_interval(flight)
+        if interval is None:
+            return None
+        expected_reads = rate * interval
+        if expected_reads < 1:
+            interval *= min(self.settings.SCHEDULER_MAX_STRETCH, 1 / max(expected_reads, 1e-9))
+        return interval
+
+    def _base_interval(self, flight: FlightDataResponseSchema) -> Optional[float]:
+        """Refresh interval from the flight's status and time to departure alone."""
+        flight_status = flight.flight_status
+        if flight_status in FINAL_STATUSES:
+            return None
+        if flight_status == "ACTIVE":
+            return self.settings.SCHEDULER_INTERVAL_ACTIVE
+        until_departure = self._until_departure(flight) if flight_status == "SCHEDULED" else None
+        if until_departure is None:
+            return self.settings.SCHEDULER_INTERVAL_DEFAULT
+        return min(
+            self.settings.SCHEDULER_INTERVAL_MAX,
+            max(self.settings.SCHEDULER_INTERVAL_MIN, until_departure * self.settings.SCHEDULER_DEPARTURE_FRACTION)
+        )
+
+    def _refresh_in(self, fresh_until: Optional[float]) -> float:
+        """Seconds until SCHEDULER_LEAD before a cache entry stops being fresh."""
+        if fresh_until is None:
+            return 0.0
+        return max(0.0, fresh_until - time.time() - self.settings.SCHEDULER_LEAD)
+
+    @staticmethod
+    def _until_departure(flight: FlightDataResponseSchema) -> Optional[float]:
+        departure = FlightService._parse_datetime(flight.departure_time)
+        if departure is None:
+            return None
+        if departure.tzinfo is None:
+            departure = departure.replace(tzinfo=timezone.utc)
+        return max(0.0, (departure - datetime.now(timezone.utc)).total_seconds())
+
+    def _schedule(self, flight_icao: str, tracked: _Tracked, interval: Optional[float]) -> None:
+        if interval is None:
+            self._untrack(flight_icao)
+            return
+        REFRESH_INTERVAL.labels(status=str(tracked.status or "UNKNOWN")).observe(interval)
+        tracked.due_at = time.monotonic() + interval
+        heapq.heappush(self._heap, (tracked.due_at, flight_icao))
+        if self._heap[0][1] == flight_icao:
+            self._wakeup.set()
+
+    def _untrack(self, flight_icao: str) -> None:
+        if self._tracked.pop(flight_icao, None) is not None:
+            TRACKED_FLIGHTS.set(len(self._tracked))
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                due_at, flight_icao = heapq.heappop(self._heap)
+                tracked = self._tracked.get(flight_icao)
+                if tracked is None or tracked.due_at != due_at or flight_icao in self._running:
+                    continue
+                if now - tracked.last_seen > self.settings.SCHEDULER_IDLE_TIMEOUT:
+                    self._untrack(flight_icao)
+                    SCHEDULED_REFRESHES.labels(result="idle").inc()
+                    continue
+                self._running[flight_icao] = asyncio.create_task(self._refresh(flight_icao, tracked))
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, flight_icao: str, tracked: _Tracked) -> None:
+        try:
+            cached = await self.service.get_cached_flight(flight_icao)
+            if cached and self._refresh_in(cached.fresh_until) > 0:
+                # Another worker refreshed it since we scheduled this run
+                SCHEDULED_REFRESHES.labels(result="peer").inc()
+                self._schedule(flight_icao, tracked, self._refresh_in(cached.fresh_until))
+                return
+
+            async with self._semaphore:
+                with deadline_scope(self.settings.SCHEDULER_REFRESH_TIMEOUT), priority_scope(Priority.REFRESH):
+                    lookup = await self.service.load_flight(flight_icao)
+            SCHEDULED_REFRESHES.labels(result="success" if lookup else "not_found").inc()
+            if lookup is None:
+                self._untrack(flight_icao)
+                return
+
+            flight = lookup.flight
+            tracked.status = flight.flight_status
+            base = self._base_interval(flight)
+            cache = self.service.cache
+            if base is not None and cache and base > cache.ttl_for_status(flight.flight_status):
+                # Slow-changing flight: keep it fresh until its next refresh rather than its status TTL
+                await cache.set_flight(flight_icao, flight, fresh_for=base + self.settings.SCHEDULER_LEAD)
+            rate = self._read_rate(tracked, time.monotonic())
+            self._schedule(flight_icao, tracked, self.interval_for(flight, rate))
+        except Exception:
+            SCHEDULED_REFRESHES.labels(result="error").inc()
+            logger.warning("Scheduled refresh of %s failed", flight_icao)
+            self._schedule(flight_icao, tracked, self.settings.SCHEDULER_INTERVAL_DEFAULT)
+        finally:
+            self._running.pop(flight_icao, None)
@@ -0,0 +1,193 @@
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import math
+from prometheus_client import Counter, Gauge
+from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
+
+TRACK_FLIGHTS = Gauge('flight_track_flights', 'Flights with a recorded trajectory')
+TRACK_SAMPLES = Gauge('flight_track_samples', 'Position samples held across all trajectories')
+TRACK_BYTES = Gauge('flight_track_bytes', 'Bytes held in trajectory sample arrays')
+TRACK_BYTES_PER_SAMPLE = Gauge('flight_track_bytes_per_sample', 'Array bytes used per stored position sample')
+TRACK_EVICTIONS = Counter('flight_track_evictions_total', 'Trajectories evicted to stay under TRACK_MAX_BYTES')
+
+# (column, array typecode): time and position in doubles, the rest in singles
+COLUMNS = (
+    ("time", "d"),
+    ("latitude", "d"),
+    ("longitude", "d"),
+    ("altitude", "f"),
+    ("direction", "f"),
+    ("speed_horizontal", "f"),
+    ("speed_vertical", "f"),
+)
+
+_Sample = Tuple[float, ...]
+
+
+def parse_updated_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _nan(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def _none(value: float) -> Optional[float]:
+    # Single-precision columns: round off the float32 noise rather than echo it
+    return None if math.isnan(value) else round(value, 2)
+
+
+class TrackBuffer:
+    """
+    Ring buffer of one flight's position samples, one typed array per column
+    with missing values stored as NaN. Arrays grow until `capacity`, then
+    the oldest sample is overwritten.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns = [array(code) for _, code in COLUMNS]
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.buffer_info()[1] * column.itemsize for column in self.columns)
+
+    @property
+    def last_time(self) -> Optional[float]:
+        if not len(self):
+            return None
+        return self.columns[0][(self._head - 1) % len(self)]
+
+    def append(self, sample: _Sample) -> None:
+        if len(self) < self.capacity:
+            for column, value in zip(self.columns, sample):
+                column.append(value)
+            return
+        for column, value in zip(self.columns, sample):
+            column[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+
+    def samples(self, since: Optional[float] = None, max_points: Optional[int] = None) -> List[_Sample]:
+        """
+        Samples oldest first, optionally only those after `since`, thinned to
+        at most `max_points` evenly spaced ones that keep the latest.
+        """
+        size = len(self)
+        order = [(self._head + i) % size for i in range(size)] if size == self.capacity else range(size)
+        times = self.columns[0]
+        positions = [i for i in order if since is None or times[i] > since]
+        if max_points is not None and len(positions) > max_points:
+            step = (len(positions) - 1) / max(1, max_points - 1)
+            positions = [positions[round(len(positions) - 1 - k * step)] for k in range(max_points)][::-1]
+        return [tuple(column[i] for column in self.columns) for i in positions]
+
+
+class TrajectoryStore:
+    """
+    Per-flight trajectories built from every live block the service sees:
+    each cache write or snapshot that carries a newer position `updated_time`
+    appends one sample. Tracks outlive the cached payloads they came from
+    and are bounded by `max_bytes` overall, evicting the least recently
+    updated or read flights first.
+    """
+
+    def __init__(self, samples_per_flight: int, max_bytes: int):
+        self.samples_per_flight = samples_per_flight
+        self.max_bytes = max_bytes
+        self._tracks: "OrderedDict[str, TrackBuffer]" = OrderedDict()
+        self._bytes = 0
+        self._samples = 0
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def record(self, flight_icao: str, flight: FlightDataResponseSchema, expires_at: Optional[float] = None) -> None:
+        """Append the flight's live position if it is newer than the last one recorded."""
+        live = flight.live
+        updated = parse_updated_time(live.updated_time)
+        if updated is None or live.latitude is None or live.longitude is None:
+            return
+        flight_icao = flight_icao.upper()
+        track = self._tracks.get(flight_icao)
+        if track is None:
+            track = self._tracks[flight_icao] = TrackBuffer(self.samples_per_flight)
+        elif track.last_time is not None and updated <= track.last_time:
+            return
+        self._tracks.move_to_end(flight_icao)
+
+        before, count = track.nbytes, len(track)
+        track.append((
+            updated,
+            live.latitude,
+            live.longitude,
+            _nan(live.altitude),
+            _nan(live.direction),
+            _nan(live.speed_horizontal),
+            _nan(live.speed_vertical),
+        ))
+        self._bytes += track.nbytes - before
+        self._samples += len(track) - count
+        while self._bytes > self.max_bytes and len(self._tracks) > 1:
+            _, evicted = self._tracks.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._samples -= len(evicted)
+            TRACK_EVICTIONS.inc()
+        self._report()
+
+    def remove(self, flight_icao: str) -> None:
+        track = self._tracks.pop(flight_icao.upper(), None)
+        if track is not None:
+            self._bytes -= track.nbytes
+            self._samples -= len(track)
+            self._report()
+
+    def track(
+        self,
+        flight_icao: str,
+        since: Optional[float] = None,
+        max_points: Optional[int] = None
+    ) -> Optional[Tuple[int, List[LiveDataSchema]]]:
+        """The number of samples held for a flight and its (thinned) points, or None if it has no track."""
+        flight_icao = flight_icao.upper()
+        track = self._tracks.get(flight_icao)
+        if track is None:
+            return None
+        self._tracks.move_to_end(flight_icao)
+        return len(track), [self._point(sample) for sample in track.samples(since, max_points)]
+
+    @staticmethod
+    def _point(sample: _Sample) -> LiveDataSchema:
+        updated, latitude, longitude, altitude, direction, speed_horizontal, speed_vertical = sample
+        return LiveDataSchema(
+            updated_time=datetime.fromtimestamp(updated, timezone.utc).isoformat(),
+            latitude=latitude,
+            longitude=longitude,
+            altitude=_none(altitude),
+            direction=_none(direction),
+            speed_horizontal=_none(speed_horizontal),
+            speed_vertical=_none(speed_vertical),
+        )
+
+    def _report(self) -> None:
+        TRACK_FLIGHTS.set(len(self._tracks))
+        TRACK_SAMPLES.set(self._samples)
+        TRACK_BYTES.set(self._bytes)
+        TRACK_BYTES_PER_SAMPLE.set(self._bytes / self._samples if self._samples else 0)
@@ -0,0 +1,212 @@
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import socket
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+from app.core.config import Settings
+from app.core.logging import logger
+from app.core.retry import backoff_delay
+from app.core.serialization import dumps
+
+WEBHOOK_DELIVERIES = Counter(
+    'webhook_deliveries_total',
+    'Webhook batch deliveries by result',
+    ['result']
+)
+WEBHOOK_ATTEMPTS = Counter(
+    'webhook_delivery_attempts_total',
+    'Webhook POST attempts, including retries'
+)
+WEBHOOK_BATCH_SIZE = Histogram(
+    'webhook_batch_events',
+    'Events sent per webhook delivery',
+    buckets=(1, 2, 5, 10, 25, 50, 100)
+)
+WEBHOOK_QUEUED = Gauge('webhook_queued_events', 'Change events waiting to be delivered')
+WEBHOOK_DROPPED = Counter('webhook_events_dropped_total', 'Change events dropped because an endpoint queue was full')
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+_Endpoint = Tuple[str, str]
+
+
+class UnsafeWebhookTarget(ValueError):
+    """Raised for a webhook URL the server must not send requests to."""
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_webhook_target(url: str, settings: Settings) -> None:
+    """
+    Raise UnsafeWebhookTarget unless `url` may receive webhook deliveries.
+    With WEBHOOK_ALLOWED_HOSTS set, only those hosts may, and they are trusted
+    as they are. Otherwise every address the host resolves to must be public:
+    loopback, link-local (e.g. cloud metadata), private and reserved ranges
+    are refused. Checked at subscription and again before each delivery,
+    since DNS answers can change in between.
+    """
+    parsed = httpx.URL(url)
+    host = parsed.host
+    allowed = {h.lower() for h in settings.WEBHOOK_ALLOWED_HOSTS}
+    if allowed:
+        if host.lower() not in allowed:
+            raise UnsafeWebhookTarget(f"{host} is not an allowed webhook host")
+        return
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise UnsafeWebhookTarget(f"Cannot resolve webhook host {host}") from e
+    if not addresses or not all(_is_public(address[4][0]) for address in addresses):
+        raise UnsafeWebhookTarget(f"Webhook host {host} resolves to a non-public address")
+
+
+class _UrlLimit:
+    """Delivery concurrency for one URL, kept while any worker or delivery uses it."""
+
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.users = 0
+
+
+class WebhookDispatcher:
+    """
+    Deliver change events to webhook endpoints over one pooled HTTP client.
+
+    Events are queued per endpoint and sent as batches: the first event
+    waits up to WEBHOOK_BATCH_WINDOW for up to WEBHOOK_BATCH_MAX others. At
+    most WEBHOOK_ENDPOINT_CONCURRENCY deliveries are in flight per URL, and
+    failed deliveries are retried with jittered exponential backoff up to
+    WEBHOOK_MAX_ATTEMPTS. Deliveries are signed with HMAC-SHA256 when the
+    subscription has a secret, and skipped when the URL no longer passes
+    check_webhook_target. An endpoint's worker exits once its queue has been
+    empty for WEBHOOK_IDLE_TIMEOUT, and is started again by the next event.
+    """
+
+    def __init__(self, settings: Settings, client: Optional[httpx.AsyncClient] = None):
+        self.settings = settings
+        self.client = client or httpx.AsyncClient(
+            timeout=settings.WEBHOOK_TIMEOUT,
+            limits=httpx.Limits(max_connections=settings.WEBHOOK_MAX_CONNECTIONS),
+            follow_redirects=False,
+        )
+        self._queues: Dict[_Endpoint, "asyncio.Queue[dict]"] = {}
+        self._workers: Dict[_Endpoint, asyncio.Task] = {}
+        self._limits: Dict[str, _UrlLimit] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+
+    def enqueue(self, url: str, secret: Optional[str], event: dict) -> bool:
+        """Queue an event for delivery, returning False if the endpoint's queue is full."""
+        endpoint = (url, secret or "")
+        queue = self._queues.get(endpoint)
+        if queue is None:
+            queue = self._queues[endpoint] = asyncio.Queue(maxsize=self.settings.WEBHOOK_QUEUE_SIZE)
+            self._workers[endpoint] = asyncio.create_task(self._drain(endpoint, queue))
+        if queue.full():
+            WEBHOOK_DROPPED.inc()
+            logger.warning("Webhook queue for %s is full, dropping event", url)
+            return False
+        queue.put_nowait(event)
+        WEBHOOK_QUEUED.inc()
+        return True
+
+    async def aclose(self) -> None:
+        """Stop batching, give in-flight deliveries WEBHOOK_TIMEOUT to finish and close the client."""
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        if self._deliveries:
+            await asyncio.wait(self._deliveries, timeout=self.settings.WEBHOOK_TIMEOUT)
+        for task in self._deliveries:
+            task.cancel()
+        await self.client.aclose()
+
+    async def _drain(self, endpoint: _Endpoint, queue: "asyncio.Queue[dict]") -> None:
+        loop = asyncio.get_running_loop()
+        limit = self._hold_limit(endpoint[0])
+        try:
+            while True:
+                try:
+                    batch = [await asyncio.wait_for(queue.get(), self.settings.WEBHOOK_IDLE_TIMEOUT)]
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        return
+                    continue
+                closes_at = loop.time() + self.settings.WEBHOOK_BATCH_WINDOW
+                while len(batch) < self.settings.WEBHOOK_BATCH_MAX:
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), max(0.0, closes_at - loop.time())))
+                    except asyncio.TimeoutError:
+                        break
+                WEBHOOK_QUEUED.dec(len(batch))
+                await limit.semaphore.acquire()
+                self._hold_limit(endpoint[0])
+                task = asyncio.create_task(self._deliver(endpoint, batch, limit))
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+        finally:
+            # No await between the empty-queue check and here, so no event can slip in
+            if self._queues.get(endpoint) is queue:
+                del self._queues[endpoint]
+                del self._workers[endpoint]
+            self._drop_limit(endpoint[0], limit)
+
+    def _hold_limit(self, url: str) -> _UrlLimit:
+        limit = self._limits.get(url)
+        if limit is None:
+            limit = self._limits[url] = _UrlLimit(self.settings.WEBHOOK_ENDPOINT_CONCURRENCY)
+        limit.users += 1
+        return limit
+
+    def _drop_limit(self, url: str, limit: _UrlLimit) -> None:
+        limit.users -= 1
+        if not limit.users and self._limits.get(url) is limit:
+            del self._limits[url]
+
+    async def _deliver(self, endpoint: _Endpoint, batch: List[dict], limit: _UrlLimit) -> None:
+        url, secret = endpoint
+        body = dumps({"events": batch})
+        headers = {"Content-Type": "application/json"}
+        if secret:
+            signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Webhook-Signature"] = f"sha256={signature}"
+        WEBHOOK_BATCH_SIZE.observe(len(batch))
+        try:
+            try:
+                await check_webhook_target(url, self.settings)
+            except UnsafeWebhookTarget as e:
+                WEBHOOK_DELIVERIES.labels(result="blocked").inc()
+                logger.warning("Not delivering webhook to %s: %s", url, e)
+                return
+            for attempt in range(1, self.settings.WEBHOOK_MAX_ATTEMPTS + 1):
+                WEBHOOK_ATTEMPTS.inc()
+                try:
+                    response = await self.client.post(url, content=body, headers=headers)
+                    if response.status_code < 300:
+                        WEBHOOK_DELIVERIES.labels(result="delivered").inc()
+                        return
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        WEBHOOK_DELIVERIES.labels(result="rejected").inc()
+                        logger.warning("Webhook %s rejected delivery with status %s", url, response.status_code)
+                        return
+                except httpx.HTTPError as e:
+                    logger.warning("Webhook delivery to %s failed: %r", url, e)
+                if attempt < self.settings.WEBHOOK_MAX_ATTEMPTS:
+                    await asyncio.sleep(
+                        backoff_delay(attempt, self.settings.WEBHOOK_BASE_BACKOFF, self.settings.WEBHOOK_MAX_BACKOFF)
+                    )
+            WEBHOOK_DELIVERIES.labels(result="failed").inc()
+            logger.error("Giving up on webhook delivery to %s after %s attempts", url, self.settings.WEBHOOK_MAX_ATTEMPTS)
+        finally:
+            limit.semaphore.release()
+            self._drop_limit(url, limit)
@@ -0,0 +1,222 @@
+from typing import Dict, List, Optional
+import asyncio
+import time
+import uuid
+from prometheus_client import Counter
+from app.core.cache import Cache
+from app.core.config import Settings
+from app.core.logging import logger
+from app.core.quota import Priority, priority_scope
+from app.core.retry import deadline_scope
+from app.core.serialization import loads
+from app.schemas.flight import FlightDataResponseSchema
+from app.schemas.webhook import (
+    FlightChangeSchema,
+    WebhookEventSchema,
+    WebhookSubscriptionRequestSchema,
+    WebhookSubscriptionSchema,
+)
+from app.services.flight_service import FlightService
+from app.services.webhook_dispatcher import WebhookDispatcher
+
+FLIGHT_CHANGES = Counter(
+    'flight_changes_detected_total',
+    'Field-level flight changes detected for webhook subscriptions',
+    ['field']
+)
+WEBHOOK_CHECKS = Counter(
+    'webhook_change_checks_total',
+    'Change checks of subscribed flights by result',
+    ['result']
+)
+
+SUBSCRIPTIONS_KEY = "webhooks:subscriptions"
+
+
+def diff_flights(
+    previous: FlightDataResponseSchema,
+    current: FlightDataResponseSchema,
+    fields: List[str]
+) -> List[FlightChangeSchema]:
+    """Field-level differences between two versions of a flight, limited to `fields`."""
+    return [
+        FlightChangeSchema(field=field, previous=getattr(previous, field), current=getattr(current, field))
+        for field in fields
+        if getattr(previous, field) != getattr(current, field)
+    ]
+
+
+class StoredSubscription(WebhookSubscriptionSchema):
+    secret: Optional[str] = None
+    owner: Optional[str] = None
+
+
+class WebhookService:
+    """
+    Webhook subscriptions for flight changes.
+
+    Subscriptions live in a Redis hash so every worker sees them, with an
+    in-process copy used while Redis is down. Every WEBHOOK_POLL_INTERVAL
+    each subscribed flight is looked up by one worker (whoever takes its lock
+    for the round) through the normal cache-first path, diffed field by field
+    against the last version seen, and each subscriber is sent only changes
+    to the fields it watches. The first lookup of a flight only records a
+    baseline.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        service: FlightService,
+        dispatcher: WebhookDispatcher,
+        cache: Optional[Cache] = None
+    ):
+        self.settings = settings
+        self.service = service
+        self.dispatcher = dispatcher
+        self.cache = cache
+        self._local: Dict[str, StoredSubscription] = {}
+        self._snapshots: Dict[str, FlightDataResponseSchema] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.dispatcher.aclose()
+
+    async def subscribe(self, request: WebhookSubscriptionRequestSchema, owner: str) -> WebhookSubscriptionSchema:
+        subscription = StoredSubscription(
+            id=uuid.uuid4().hex,
+            flight_icao=request.flight_icao.upper(),
+            url=str(request.url),
+            fields=request.fields,
+            created_at=time.time(),
+            secret=request.secret,
+            owner=owner,
+        )
+        self._local[subscription.id] = subscription
+        if self.cache:
+            await self.cache.set_shared_field(SUBSCRIPTIONS_KEY, subscription.id, subscription.model_dump_json())
+        return WebhookSubscriptionSchema.model_validate(subscription.model_dump())
+
+    async def unsubscribe(self, subscription_id: str, owner: str) -> bool:
+        """Remove a subscription held by `owner`; returns False if there is no such subscription."""
+        found = any(s.id == subscription_id for s in await self.subscriptions(owner=owner))
+        if not found:
+            return False
+        self._local.pop(subscription_id, None)
+        if self.cache:
+            await self.cache.delete_shared_field(SUBSCRIPTIONS_KEY, subscription_id)
+        return True
+
+    async def subscriptions(
+        self,
+        flight_icao: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> List[StoredSubscription]:
+        if self.cache:
+            stored = await self.cache.get_shared_hash(SUBSCRIPTIONS_KEY)
+            if stored is not None:
+                self._local = {
+                    subscription_id: StoredSubscription.model_validate_json(raw)
+                    for subscription_id, raw in stored.items()
+                }
+        subscriptions = list(self._local.values())
+        if flight_icao:
+            subscriptions = [s for s in subscriptions if s.flight_icao == flight_icao.upper()]
+        if owner is not None:
+            subscriptions = [s for s in subscriptions if s.owner == owner]
+        return subscriptions
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self.settings.WEBHOOK_CHECK_CONCURRENCY)
+
+        async def check(flight_icao: str, subscriptions: List[StoredSubscription]) -> None:
+            async with semaphore:
+                await self.check_flight(flight_icao, subscriptions)
+
+        while True:
+            try:
+                by_flight: Dict[str, List[StoredSubscription]] = {}
+                for subscription in await self.subscriptions():
+                    by_flight.setdefault(subscription.flight_icao, []).append(subscription)
+                for flight_icao in set(self._snapshots) - set(by_flight):
+                    del self._snapshots[flight_icao]
+                await asyncio.gather(*(check(icao, subs) for icao, subs in by_flight.items()))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Webhook change check failed")
+            await asyncio.sleep(self.settings.WEBHOOK_POLL_INTERVAL)
+
+    async def check_flight(self, flight_icao: str, subscriptions: List[StoredSubscription]) -> int:
+        """Look a subscribed flight up and queue its changes for delivery; returns events queued."""
+        if self.cache:
+            token = await self.cache.acquire_lock(
+                f"lock:webhook:{flight_icao}", self.settings.WEBHOOK_POLL_INTERVAL * 0.9
+            )
+            if token is None and self.cache.redis_available:
+                WEBHOOK_CHECKS.labels(result="peer").inc()
+                return 0
+        try:
+            with deadline_scope(self.settings.WEBHOOK_POLL_INTERVAL), priority_scope(Priority.REFRESH):
+                lookup = await self.service.get_flight(flight_icao)
+        except Exception:
+            WEBHOOK_CHECKS.labels(result="error").inc()
+            logger.warning("Webhook change check of %s failed", flight_icao)
+            return 0
+        if lookup is None:
+            WEBHOOK_CHECKS.labels(result="not_found").inc()
+            return 0
+
+        current = lookup.flight
+        previous = await self._swap_snapshot(flight_icao, current)
+        WEBHOOK_CHECKS.labels(result="baseline" if previous is None else "checked").inc()
+        if previous is None:
+            return 0
+
+        watched = sorted({field for s in subscriptions for field in s.fields})
+        changes = {change.field: change for change in diff_flights(previous, current, watched)}
+        for field in changes:
+            FLIGHT_CHANGES.labels(field=field).inc()
+
+        queued = 0
+        detected_at = time.time()
+        for subscription in subscriptions:
+            relevant = [changes[field] for field in subscription.fields if field in changes]
+            if not relevant:
+                continue
+            event = WebhookEventSchema(
+                subscription_id=subscription.id,
+                flight_icao=flight_icao,
+                detected_at=detected_at,
+                changes=relevant,
+                flight=current,
+            )
+            queued += self.dispatcher.enqueue(subscription.url, subscription.secret, event.model_dump(mode="json"))
+        return queued
+
+    async def _swap_snapshot(
+        self,
+        flight_icao: str,
+        current: FlightDataResponseSchema
+    ) -> Optional[FlightDataResponseSchema]:
+        """Store the latest version of a flight and return the one it replaces."""
+        previous = self._snapshots.get(flight_icao)
+        self._snapshots[flight_icao] = current
+        if not self.cache:
+            return previous
+        key = f"webhooks:last:{flight_icao}"
+        stored = await self.cache.get_shared(key)
+        await self.cache.set_shared(key, current.model_dump_json(), self.settings.WEBHOOK_SNAPSHOT_TTL)
+        if stored:
+            try:
+                return FlightDataResponseSchema.model_validate(loads(stored))
+            except (ValueError, TypeError):
+                logger.warning("Discarding unreadable webhook snapshot for %s", flight_icao)
+        return previous
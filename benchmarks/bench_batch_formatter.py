@@ -0,0 +1,81 @@
+"""
+Per-record cost of formatting raw aviationstack pages: format_flight_data
+called record by record versus the columnar format_flight_batch.
+
+Records are synthetic but shaped like a departure-airport page: a few
+hundred distinct schedule times shared across flights, and live blocks on
+roughly half of them.
+
+    python -m benchmarks.bench_batch_formatter [--sizes 100 1000 10000]
+"""
+from typing import Dict, List
+import argparse
+import asyncio
+import random
+import time
+from app.core.config import Settings
+from app.services.flight_service import FlightService
+
+
+def make_records(count: int, seed: int = 7) -> List[Dict]:
+    rng = random.Random(seed)
+    records = []
+    for n in range(count):
+        hour, minute = divmod(rng.randrange(0, 24 * 60, 5), 60)
+        active = rng.random() < 0.5
+        records.append({
+            "flight_status": "active" if active else rng.choice(["scheduled", "landed", "cancelled"]),
+            "flight": {"number": str(100 + n), "icao": f"AAL{100 + n}"},
+            "airline": {"name": "American Airlines"},
+            "departure": {
+                "airport": "John F Kennedy International",
+                "scheduled": f"2025-01-04T{hour:02d}:{minute:02d}:00+00:00",
+                "delay": rng.choice([None, 5, 15, 40]),
+                "gate": f"B{rng.randrange(1, 40)}",
+                "terminal": str(rng.randrange(1, 9)),
+            },
+            "arrival": {
+                "airport": "London Heathrow",
+                "scheduled": f"2025-01-05T{(hour + 7) % 24:02d}:{minute:02d}:00+00:00",
+            },
+            "live": {
+                "updated": "2025-01-04T21:02:11+00:00",
+                "latitude": rng.uniform(-90, 90),
+                "longitude": rng.uniform(-180, 180),
+                "altitude": rng.uniform(0, 12000),
+                "direction": rng.uniform(0, 360),
+                "speed_horizontal": rng.uniform(0, 950),
+                "speed_vertical": 0.0,
+            } if active else {},
+        })
+    return records
+
+
+async def per_record(service: FlightService, records: List[Dict], batch: bool, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        if batch:
+            await service.format_flight_batch(records)
+        else:
+            for record in records:
+                await service.format_flight_data(record)
+    return (time.perf_counter() - started) / (rounds * len(records)) * 1e6
+
+
+async def main(sizes: List[int]) -> None:
+    service = FlightService(Settings(AVIATION_STACK_API_KEY="bench"))
+    print(f"{'records':>8} {'scalar us/rec':>14} {'batch us/rec':>13} {'speedup':>8}")
+    for size in sizes:
+        records = make_records(size)
+        assert await service.format_flight_batch(records) == [await service.format_flight_data(r) for r in records]
+        rounds = max(1, 20000 // size)
+        scalar = await per_record(service, records, batch=False, rounds=rounds)
+        batch = await per_record(service, records, batch=True, rounds=rounds)
+        print(f"{size:>8} {scalar:>14.2f} {batch:>13.2f} {scalar / batch:>7.2f}x")
+    await service.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    asyncio.run(main(parser.parse_args().sizes))
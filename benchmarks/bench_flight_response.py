@@ -0,0 +1,111 @@
+"""
+Requests/sec for flight cache hits, before and after serving precomputed
+response bytes.
+
+"before" reproduces the previous hit path: decode the JSON cache envelope,
+validate it into FlightDataResponseSchema and let FastAPI validate and
+serialize the model against `response_model`. "after" returns the body kept
+with the L1 entry through JSONBytesResponse. Both routes run on one app,
+driven directly over ASGI (no HTTP client or socket) in one process and event
+loop, so the numbers are single-core and dominated by the hit path itself.
+
+    python -m benchmarks.bench_flight_response [--requests 5000]
+"""
+from typing import Tuple
+import argparse
+import asyncio
+import json
+import time
+from fastapi import FastAPI
+from app.core.cache import Cache
+from app.core.config import Settings
+from app.core.serialization import JSONBytesResponse
+from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
+
+FLIGHT = FlightDataResponseSchema(
+    flight_number="AA100",
+    airline="American Airlines",
+    departure_airport="John F Kennedy International",
+    arrival_airport="London Heathrow",
+    flight_status="ACTIVE",
+    departure_time="2025-01-04T18:00:00+00:00",
+    arrival_time="2025-01-05T06:10:00+00:00",
+    duration="7h 10m",
+    delay=15,
+    gate="B7",
+    terminal="8",
+    live=LiveDataSchema(
+        updated_time="2025-01-04T21:02:11+00:00", latitude=51.12, longitude=-30.5, altitude=11277.6,
+        direction=74.0, speed_horizontal=905.2, speed_vertical=0.0,
+    ),
+    description="Flight AA100 by American Airlines from John F Kennedy International to London Heathrow.",
+)
+
+
+def build_app(cache: Cache, legacy_value: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before/{flight_icao}", response_model=FlightDataResponseSchema)
+    async def before(flight_icao: str):
+        envelope = json.loads(legacy_value)
+        return FlightDataResponseSchema.model_validate(envelope["flight"])
+
+    @app.get("/after/{flight_icao}")
+    async def after(flight_icao: str):
+        cached = await cache.get_flight(flight_icao)
+        return JSONBytesResponse(cached.body)
+
+    return app
+
+
+async def call(app: FastAPI, path: str) -> Tuple[int, bytes]:
+    """Send one GET straight through the ASGI interface and return its status and body."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"], b"".join(m.get("body", b"") for m in sent[1:])
+
+
+async def measure(app: FastAPI, path: str, requests: int) -> float:
+    for _ in range(200):
+        await call(app, path)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int) -> None:
+    settings = Settings(AVIATION_STACK_API_KEY="bench", REDIS_URL="redis://127.0.0.1:1/0")
+    cache = Cache(settings)
+    cache._redis_retry_at = float("inf")  # L1 only; no Redis round trips in either path
+    await cache.set_flight("AAL100", FLIGHT)
+    legacy_value = json.dumps({"cached_at": 0, "fresh_until": 0, "expires_at": 0, "flight": FLIGHT.model_dump()})
+
+    app = build_app(cache, legacy_value)
+    before, after = await call(app, "/before/AAL100"), await call(app, "/after/AAL100")
+    assert before[0] == after[0] == 200 and json.loads(before[1]) == json.loads(after[1])
+
+    results = {}
+    for name in ("before", "after"):
+        results[name] = await measure(app, f"/{name}/AAL100", requests)
+        print(f"{name:>6}: {results[name]:8.0f} req/s")
+    print(f"speedup: {results['after'] / results['before']:.2f}x")
+    await cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,78 @@
+"""
+Query latency of the spatial index over tracked aircraft: viewport (bbox)
+and radius lookups against the grid, versus scanning every held position.
+
+Positions are synthetic and clustered like real traffic: most aircraft are
+near a few dozen hub airports, the rest spread over the globe.
+
+    python -m benchmarks.bench_geo_index [--sizes 10000 25000 50000]
+"""
+from typing import Callable, List, Tuple
+import argparse
+import random
+import time
+from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
+from app.services.geo_index import FlightGeoIndex, haversine_km
+
+CELL_DEGREES = 1.0
+# Map viewports (min_lat, min_lon, max_lat, max_lon) and radius queries (lat, lon, km)
+VIEWPORTS = [(49.0, -6.0, 56.0, 4.0), (35.0, -80.0, 45.0, -70.0), (-40.0, 140.0, -30.0, 155.0)]
+CIRCLES = [(51.47, -0.45, 250.0), (40.64, -73.78, 150.0), (1.36, 103.99, 400.0)]
+
+
+def make_positions(count: int, seed: int = 11) -> List[Tuple[float, float]]:
+    rng = random.Random(seed)
+    hubs = [(rng.uniform(-45, 60), rng.uniform(-180, 180)) for _ in range(40)]
+    hubs += [(51.47, -0.45), (40.64, -73.78), (1.36, 103.99), (-33.94, 151.18)]
+    positions = []
+    for _ in range(count):
+        if rng.random() < 0.7:
+            lat, lon = rng.choice(hubs)
+            positions.append((max(-90.0, min(90.0, rng.gauss(lat, 3))), (rng.gauss(lon, 4) + 180) % 360 - 180))
+        else:
+            positions.append((rng.uniform(-70, 75), rng.uniform(-180, 180)))
+    return positions
+
+
+def build(positions: List[Tuple[float, float]]) -> FlightGeoIndex:
+    index = FlightGeoIndex(CELL_DEGREES, len(positions))
+    for n, (lat, lon) in enumerate(positions):
+        flight = FlightDataResponseSchema(live=LiveDataSchema(latitude=lat, longitude=lon))
+        index.upsert(f"FLT{n:05d}", flight, expires_at=time.time() + 3600)
+    return index
+
+
+def per_query(run: Callable[[], object], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        run()
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main(sizes: List[int]) -> None:
+    print(f"{'aircraft':>8} {'query':>7} {'grid us':>9} {'scan us':>9} {'speedup':>8} {'matches':>8}")
+    for size in sizes:
+        positions = make_positions(size)
+        index = build(positions)
+        held = list(index._entries.values())
+        for box in VIEWPORTS:
+            min_lat, min_lon, max_lat, max_lon = box
+            grid = per_query(lambda: index.within_bbox(*box, limit=1000), 200)
+            scan = per_query(lambda: [
+                e for e in held if min_lat <= e.latitude <= max_lat and min_lon <= e.longitude <= max_lon
+            ], 20)
+            total = index.within_bbox(*box, limit=1000)[1]
+            print(f"{size:>8} {'bbox':>7} {grid:>9.1f} {scan:>9.1f} {scan / grid:>7.1f}x {total:>8}")
+        for lat, lon, radius in CIRCLES:
+            grid = per_query(lambda: index.nearby(lat, lon, radius, limit=100), 200)
+            scan = per_query(lambda: [
+                e for e in held if haversine_km(lat, lon, e.latitude, e.longitude) <= radius
+            ], 5)
+            total = index.nearby(lat, lon, radius, limit=100)[1]
+            print(f"{size:>8} {'radius':>7} {grid:>9.1f} {scan:>9.1f} {scan / grid:>7.1f}x {total:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 25000, 50000])
+    main(parser.parse_args().sizes)
@@ -0,0 +1,110 @@
+"""
+Cost of logging on the event loop: a StreamHandler formatting with the
+stdlib json module on the calling thread, versus the queued pipeline of
+app.core.logging, which only enqueues on the caller and leaves orjson
+formatting and the write to a listener thread.
+
+Each call is timed from inside a coroutine, so the per-call figures are how
+long logging holds up the loop; throughput counts until the last line is
+written. The flood scenario logs one identical error over and over to show
+what sampling keeps out of the output.
+
+    python -m benchmarks.bench_logging [--messages 20000] [--burst 5]
+"""
+from typing import Callable, List, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import tempfile
+import time
+from app.core.logging import AsyncQueueHandler, JSONFormatter, RepeatFilter
+
+
+class StdlibJSONFormatter(logging.Formatter):
+    """The JSON formatter as it was before the pipeline: json.dumps on the calling thread."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_data = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+        }
+        if hasattr(record, "props"):
+            log_data.update(record.props)
+        if record.exc_info:
+            log_data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_data)
+
+
+def direct(path: str, burst: int) -> Tuple[logging.Handler, Callable[[], None]]:
+    handler = logging.FileHandler(path)
+    handler.setFormatter(StdlibJSONFormatter())
+    return handler, handler.close
+
+
+def queued(path: str, burst: int) -> Tuple[logging.Handler, Callable[[], None]]:
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(JSONFormatter())
+    handler = AsyncQueueHandler(queue.Queue(100000))
+    handler.addFilter(RepeatFilter(window=10.0, burst=burst))
+    listener = logging.handlers.QueueListener(handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+
+    def stop() -> None:
+        listener.stop()
+        file_handler.close()
+    return handler, stop
+
+
+async def run(make, messages: int, burst: int, flood: bool) -> Tuple[float, float, float, int]:
+    fd, path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    handler, stop = make(path, burst)
+    log = logging.getLogger(f"bench.{make.__name__}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(handler)
+    timings: List[float] = []
+    started = time.perf_counter()
+    for n in range(messages):
+        before = time.perf_counter()
+        if flood:
+            log.error("Upstream request failed: %s", "connection reset")
+        else:
+            log.info("Served flight %s from %s", f"AAL{100 + n % 900}", "cache", extra={"props": {"latency_ms": n % 40}})
+        timings.append(time.perf_counter() - before)
+        if n % 100 == 0:
+            await asyncio.sleep(0)
+    stop()
+    elapsed = time.perf_counter() - started
+    log.removeHandler(handler)
+    with open(path) as f:
+        lines = sum(1 for _ in f)
+    os.unlink(path)
+    timings.sort()
+    p50 = statistics.median(timings) * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    return messages / elapsed, p50, p99, lines
+
+
+async def main(messages: int, burst: int) -> None:
+    print(f"{'scenario':>9} {'pipeline':>9} {'msgs/s':>10} {'p50 us':>8} {'p99 us':>8} {'lines':>7}")
+    for scenario, flood in (("info", False), ("flood", True)):
+        for make in (direct, queued):
+            rate, p50, p99, lines = await run(make, messages, burst, flood)
+            print(f"{scenario:>9} {make.__name__:>9} {rate:>10.0f} {p50:>8.2f} {p99:>8.2f} {lines:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--burst", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.burst))
@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 from app.main import app
@@ -39,6 +39,7 @@ async def mock_cache(mock_redis):
     """Fixture for mocked Cache instance."""
     cache = AsyncMock(spec=Cache)
     cache.redis = mock_redis
+    cache.is_flight_missing.return_value = False
     return cache
 
 @pytest.fixture
@@ -49,8 +50,9 @@ def test_client():
 @pytest.fixture
 async def async_client():
     """Fixture for async test client."""
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        yield client
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
         
 # Sample test data
 @pytest.fixture
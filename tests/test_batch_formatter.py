@@ -0,0 +1,50 @@
+import copy
+import pytest
+from fastapi import HTTPException
+from app.services.flight_service import FlightService
+
+
+def _variants(sample_flight_data):
+    """Records covering the coercion, range and parsing edge cases of the scalar formatter."""
+    variants = [copy.deepcopy(sample_flight_data) for _ in range(6)]
+    variants[1]["live"].update(latitude="45.5", longitude=200, direction=360, altitude="high", updated="not a date")
+    variants[2]["departure"] = {"airport": "JFK", "terminal": "T4"}
+    variants[2]["flight_status"] = "Diverted"
+    variants[3]["departure"]["scheduled"] = "2025-01-04T10:00:00+00:00"
+    variants[3]["arrival"]["scheduled"] = None
+    variants[3]["airline"] = {}
+    variants[4]["flight_status"] = "weird"
+    variants[4]["live"] = {}
+    variants[4]["departure"]["delay"] = "20"
+    del variants[5]["arrival"]
+    variants[5]["flight"] = {}
+    return variants
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fields", [None, ("flight_status", "delay", "gate"), ("duration", "live")])
+async def test_batch_matches_scalar_formatter(test_settings, sample_flight_data, fields):
+    """Test the columnar formatter returns exactly what format_flight_data returns per record."""
+    service = FlightService(test_settings)
+    records = _variants(sample_flight_data)
+
+    batch = await service.format_flight_batch(records, fields)
+    scalar = [await service.format_flight_data(record, fields) for record in records]
+
+    assert batch == scalar
+    assert [f.model_fields_set for f in batch] == [f.model_fields_set for f in scalar]
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_batch_fails_like_scalar_formatter(test_settings, sample_flight_data):
+    """Test a record the scalar formatter rejects fails the batch with the same error."""
+    service = FlightService(test_settings)
+    bad = copy.deepcopy(sample_flight_data)
+    bad["departure"]["delay"] = 12.5
+
+    with pytest.raises(HTTPException) as scalar:
+        await service.format_flight_data(bad)
+    with pytest.raises(HTTPException) as batch:
+        await service.format_flight_batch([sample_flight_data, bad])
+
+    assert batch.value.status_code == scalar.value.status_code == 500
+    await service.aclose()
@@ -1,6 +1,10 @@
 import pytest
-from app.core.cache import Cache
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.core.cache import Cache, LocalCache
+from app.schemas.flight import FlightDataResponseSchema
 import json
+import time
+
 @pytest.mark.asyncio
 async def test_cache_get(mock_redis, test_settings):
     """Test cache get operation."""
@@ -10,7 +14,7 @@ async def test_cache_get(mock_redis, test_settings):
     mock_redis.get.return_value = '{"key": "value"}'
     result = await cache.get("test_key")
     
-    assert result == '{"key": "value"}'
+    assert result == {"key": "value"}
     mock_redis.get.assert_called_once_with("test_key")
 
 @pytest.mark.asyncio
@@ -23,6 +27,111 @@ async def test_cache_set(mock_redis, test_settings):
     
     mock_redis.set.assert_called_once_with(
         "test_key",
-        json.dumps("test_value"),
+        json.dumps("test_value").encode(),
         ex=300
-        )
\ No newline at end of file
+        )
+    mock_redis.get.return_value = None
+    assert await cache.get("test_key") == "test_value"
+
+def test_local_cache_evicts_least_recently_used():
+    """Test the in-process tier evicts the LRU entry when full."""
+    local = LocalCache(max_entries=2, max_bytes=1024)
+    local.set("a", "1", 60)
+    local.set("b", "2", 60)
+    local.get("a")
+    local.set("c", "3", 60)
+
+    assert local.get("a") == "1"
+    assert local.get("b") is None
+    assert local.get("c") == "3"
+
+def test_local_cache_respects_memory_bound():
+    """Test the in-process tier stays under its byte budget."""
+    local = LocalCache(max_entries=100, max_bytes=15)
+    local.set("a", "x" * 9, 60)
+    local.set("b", "y" * 9, 60)
+
+    assert local.size_bytes <= 15
+    assert local.get("a") is None
+    assert local.get("b") == "y" * 9
+
+def test_local_cache_expires_entries(monkeypatch):
+    """Test entries disappear after their TTL."""
+    local = LocalCache(max_entries=10, max_bytes=1024)
+    now = time.monotonic()
+    local.set("a", "1", 5)
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+
+    assert local.get("a") is None
+    assert len(local) == 0
+
+def test_ttl_for_status(test_settings):
+    """Test TTLs follow how quickly a flight status changes."""
+    cache = Cache(test_settings)
+
+    assert cache.ttl_for_status("LANDED") == test_settings.CACHE_TTL_FINAL
+    assert cache.ttl_for_status("CANCELLED") == test_settings.CACHE_TTL_FINAL
+    assert cache.ttl_for_status("ACTIVE") == test_settings.CACHE_TTL_ACTIVE
+    assert cache.ttl_for_status("SCHEDULED") == test_settings.CACHE_TTL_SCHEDULED
+    assert cache.ttl_for_status(None) == test_settings.CACHE_TTL_DEFAULT
+
+@pytest.mark.asyncio
+async def test_flight_round_trip_and_l2_promotion(mock_redis, test_settings):
+    """Test flights written through the cache are served from L1, then L2."""
+    cache = Cache(test_settings)
+    cache.redis = mock_redis
+    flight = FlightDataResponseSchema(flight_number="AA123", flight_status="LANDED")
+
+    await cache.set_flight("aa1234", flight)
+    stored = mock_redis.set.call_args
+    assert stored.args[0] == "flight:AA1234"
+    assert stored.kwargs["ex"] == test_settings.CACHE_TTL_FINAL + test_settings.CACHE_STALE_IF_ERROR
+
+    cached = await cache.get_flight("AA1234")
+    assert cached.tier == "L1"
+    assert cached.flight == flight
+    assert cached.is_fresh
+
+    cache.local.delete("flight:AA1234")
+    mock_redis.get.return_value = stored.args[1]
+    cached = await cache.get_flight("AA1234")
+    assert cached.tier == "L2"
+    promoted = cache.local.get("flight:AA1234")
+    assert promoted.flight == flight
+    assert json.loads(promoted.body) == flight.model_dump(mode="json")
+
+@pytest.mark.asyncio
+async def test_cache_survives_redis_outage(mock_redis, test_settings):
+    """Test the cache keeps serving L1 and backs off Redis when it is down."""
+    cache = Cache(test_settings)
+    cache.redis = mock_redis
+    mock_redis.get.side_effect = RedisConnectionError("down")
+    mock_redis.set.side_effect = RedisConnectionError("down")
+
+    flight = FlightDataResponseSchema(flight_number="AA123", flight_status="ACTIVE")
+    await cache.set_flight("AA1234", flight)
+    assert (await cache.get_flight("AA1234")).tier == "L1"
+    assert await cache.get_flight("BA0001") is None
+    assert mock_redis.get.call_count == 0
+
+@pytest.mark.asyncio
+async def test_flight_missing_is_shared_and_cleared(mock_redis, test_settings):
+    """Test an upstream miss is remembered in both tiers and forgotten once the flight is cached."""
+    cache = Cache(test_settings)
+    cache.redis = mock_redis
+    mock_redis.get.return_value = None
+    assert not await cache.is_flight_missing("AA1234")
+
+    await cache.set_flight_missing("aa1234")
+    stored = mock_redis.set.call_args
+    assert stored.args[0] == "missing:AA1234"
+    assert stored.kwargs["px"] == test_settings.CACHE_NEGATIVE_TTL * 1000
+    assert await cache.is_flight_missing("AA1234")
+
+    cache.local.delete("missing:AA1234")
+    mock_redis.get.return_value = stored.args[1]
+    assert await cache.is_flight_missing("AA1234")
+
+    await cache.set_flight("AA1234", FlightDataResponseSchema(flight_number="AA123"))
+    mock_redis.get.return_value = None
+    assert not await cache.is_flight_missing("AA1234")
@@ -0,0 +1,106 @@
+import time
+import pytest
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class UpstreamError(Exception):
+    pass
+
+
+@pytest.fixture
+def breaker_settings(test_settings):
+    test_settings.CIRCUIT_MIN_CALLS = 4
+    test_settings.CIRCUIT_FAILURE_RATE = 0.5
+    test_settings.CIRCUIT_OPEN_DURATION = 30
+    test_settings.CIRCUIT_HALF_OPEN_PROBES = 2
+    return test_settings
+
+async def _call(breaker, fail=False):
+    async with breaker.call():
+        if fail:
+            raise UpstreamError()
+
+async def _trip(breaker):
+    for _ in range(4):
+        with pytest.raises(UpstreamError):
+            await _call(breaker, fail=True)
+
+@pytest.mark.asyncio
+async def test_opens_on_failure_rate_and_fails_fast(breaker_settings):
+    """Test the circuit opens once the failure rate crosses the threshold."""
+    breaker = CircuitBreaker("test", breaker_settings)
+    await _call(breaker)
+    await _call(breaker)
+    with pytest.raises(UpstreamError):
+        await _call(breaker, fail=True)
+    assert breaker.state == CLOSED
+    with pytest.raises(UpstreamError):
+        await _call(breaker, fail=True)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        await _call(breaker)
+
+@pytest.mark.asyncio
+async def test_opens_on_slow_calls(breaker_settings):
+    """Test the circuit opens when most calls are slower than the threshold."""
+    breaker_settings.CIRCUIT_SLOW_CALL_THRESHOLD = 0
+    breaker = CircuitBreaker("test", breaker_settings)
+    for _ in range(4):
+        await _call(breaker)
+
+    assert breaker.state == OPEN
+
+@pytest.mark.asyncio
+async def test_ignores_non_failures(breaker_settings):
+    """Test errors classified as healthy do not trip the circuit."""
+    breaker = CircuitBreaker("test", breaker_settings, is_failure=lambda exc: False)
+    await _trip(breaker)
+
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_half_open_probes_close_circuit(breaker_settings):
+    """Test successful probes close the circuit after the open period."""
+    breaker = CircuitBreaker("test", breaker_settings)
+    await _trip(breaker)
+    breaker.opened_at -= breaker_settings.CIRCUIT_OPEN_DURATION
+
+    async with breaker.call():
+        assert breaker.state == HALF_OPEN
+        async with breaker.call():
+            with pytest.raises(CircuitOpenError):
+                await _call(breaker)
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_circuit(breaker_settings):
+    """Test a failing probe sends the circuit back to open."""
+    breaker = CircuitBreaker("test", breaker_settings)
+    await _trip(breaker)
+    breaker.opened_at -= breaker_settings.CIRCUIT_OPEN_DURATION
+
+    with pytest.raises(UpstreamError):
+        await _call(breaker, fail=True)
+    assert breaker.state == OPEN
+
+@pytest.mark.asyncio
+async def test_shares_open_state_across_workers(breaker_settings, mock_cache):
+    """Test a worker adopts a circuit opened by another worker."""
+    mock_cache.get_shared.return_value = str(time.time())
+    breaker = CircuitBreaker("test", breaker_settings, cache=mock_cache)
+
+    with pytest.raises(CircuitOpenError):
+        await _call(breaker)
+    mock_cache.get_shared.assert_called_once_with("circuit:test")
+
+@pytest.mark.asyncio
+async def test_publishes_open_state(breaker_settings, mock_cache):
+    """Test opening the circuit publishes it for other workers."""
+    mock_cache.get_shared.return_value = None
+    breaker = CircuitBreaker("test", breaker_settings, cache=mock_cache)
+    await _trip(breaker)
+
+    key, _, ttl = mock_cache.set_shared.call_args.args
+    assert key == "circuit:test"
+    assert ttl == breaker_settings.CIRCUIT_OPEN_DURATION
@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+import pytest
+from app.schemas.flight import LiveDataSchema
+from app.services.dead_reckoning import destination, extrapolate
+from app.services.geo_index import haversine_km
+
+REPORTED = datetime(2025, 1, 4, 11, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _live(**overrides):
+    live = {
+        "updated_time": "2025-01-04T11:00:00+00:00",
+        "latitude": 0.0,
+        "longitude": 179.9,
+        "altitude": 10000.0,
+        "direction": 90.0,
+        "speed_horizontal": 900.0,
+        "speed_vertical": -3.6,
+    }
+    return LiveDataSchema(**{**live, **overrides})
+
+def test_destination_follows_great_circle():
+    """Test projected points are the requested distance away, along the heading."""
+    lat, lon = destination(51.47, -0.45, 0.0, 111.195)
+    assert lat == pytest.approx(52.47, abs=1e-3) and lon == pytest.approx(-0.45)
+    lat, lon = destination(40.64, -73.78, 51.0, 5500.0)
+    assert haversine_km(40.64, -73.78, lat, lon) == pytest.approx(5500.0, rel=1e-6)
+
+def test_extrapolate_moves_and_bounds_error():
+    """Test a position moves at ground speed, wraps the antimeridian and carries its error bound."""
+    estimate = extrapolate(_live(), REPORTED + 60, drift=0.05)
+
+    assert estimate.elapsed == 60
+    assert estimate.live.estimated and estimate.live.error_km == pytest.approx(0.75)
+    assert estimate.live.longitude < -179.7
+    assert haversine_km(0.0, 179.9, estimate.live.latitude, estimate.live.longitude) == pytest.approx(15.0, rel=1e-4)
+    assert estimate.live.altitude == pytest.approx(9940.0)
+    assert estimate.live.updated_time == "2025-01-04T11:01:00+00:00"
+
+def test_extrapolate_needs_heading_and_speed():
+    """Test reports without a heading, speed or time cannot be extrapolated."""
+    assert extrapolate(_live(direction=None), REPORTED, drift=0.05) is None
+    assert extrapolate(_live(speed_horizontal=None), REPORTED, drift=0.05) is None
+    assert extrapolate(_live(updated_time=None), REPORTED, drift=0.05) is None
+
+def test_only_estimates_serialize_estimate_fields():
+    """Test reported positions keep their original payload and estimates carry the flag and bound."""
+    reported = _live()
+    assert "estimated" not in reported.model_dump(mode="json")
+    assert "error_km" not in reported.model_dump_json()
+
+    estimate = extrapolate(reported, REPORTED + 60, drift=0.05)
+    assert estimate.live.model_dump(mode="json")["estimated"] is True
+    assert LiveDataSchema.model_validate(estimate.live.model_dump()) == estimate.live
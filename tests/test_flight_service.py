@@ -1,8 +1,14 @@
-from unittest.mock import AsyncMock
+import asyncio
+import time
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
 import pytest
 from fastapi import HTTPException
 import httpx
+from app.core.cache import CachedFlight
 from app.core.config import Settings
+from app.core.retry import deadline_scope
+from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
 from app.services.flight_service import FlightService
 from unittest.mock import patch
 from fastapi import status
@@ -27,7 +33,7 @@ async def test_validate_flight_icao():
 async def test_fetch_flight_data_success(test_settings, sample_flight_data):
     """Test successful flight data fetching."""
     with patch('httpx.AsyncClient.get') as mock_get:
-        mock_response = AsyncMock()
+        mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"data": [sample_flight_data]}
         mock_get.return_value = mock_response
@@ -98,6 +104,18 @@ async def test_format_flight_data(test_settings, sample_flight_data):
     assert result.live.speed_horizontal == 500
     assert result.live.speed_vertical == 0
 
+@pytest.mark.asyncio
+async def test_format_flight_data_projection(test_settings, sample_flight_data):
+    """Test a field projection skips live parsing and the description."""
+    service = FlightService(test_settings)
+    with patch.object(service, "_generate_description") as describe, \
+            patch.object(service, "_validate_coordinate") as coordinate:
+        result = await service.format_flight_data(sample_flight_data, fields=("flight_status", "delay", "gate"))
+
+    describe.assert_not_called()
+    coordinate.assert_not_called()
+    assert result.model_dump(exclude_unset=True) == {"flight_status": "ACTIVE", "delay": 15, "gate": "A1"}
+
 # @pytest.mark.asyncio
 # async def test_get_flight_data_not_found(async_client, mock_cache):
 #     """Test flight data retrieval when flight is not found."""
@@ -110,3 +128,312 @@ async def test_format_flight_data(test_settings, sample_flight_data):
 #         assert response.status_code == status.HTTP_404_NOT_FOUND  # Ensure your endpoint handles this correctly
 #         data = response.json()
 #         assert "Flight not found" in data["detail"]  # Ensure this matches your error response structure
+
+@pytest.mark.asyncio
+async def test_upstream_client_uses_configured_pool(test_settings):
+    """Test the shared upstream client honours the pool settings."""
+    test_settings.UPSTREAM_MAX_CONNECTIONS = 42
+    test_settings.UPSTREAM_KEEPALIVE_EXPIRY = 12.5
+    service = FlightService(test_settings)
+
+    pool = service.client._transport._pool
+    assert pool._max_connections == 42
+    assert pool._keepalive_expiry == 12.5
+    await service.aclose()
+    assert service.client.is_closed
+
+@pytest.mark.asyncio
+async def test_aclose_drains_inflight_requests(test_settings):
+    """Test shutdown waits for in-flight upstream calls before closing the pool."""
+    service = FlightService(test_settings)
+    release = asyncio.Event()
+
+    async def inflight_call():
+        async with service._track_inflight():
+            await release.wait()
+
+    task = asyncio.create_task(inflight_call())
+    await asyncio.sleep(0)
+    closing = asyncio.create_task(service.aclose())
+    await asyncio.sleep(0.01)
+    assert not service.client.is_closed
+
+    release.set()
+    await asyncio.gather(task, closing)
+    assert service.client.is_closed
+
+@pytest.mark.asyncio
+async def test_pool_trace_records_connection_reuse():
+    """Test the pool trace hook distinguishes new and reused connections."""
+    from app.core import http_client
+
+    before = dict(http_client._connection_counts)
+    new_trace = http_client.PoolTrace()
+    await new_trace("connection.connect_tcp.started", {})
+    await new_trace("http11.send_request_headers.started", {})
+    reused_trace = http_client.PoolTrace()
+    await reused_trace("http11.send_request_headers.started", {})
+
+    assert http_client._connection_counts["new"] == before["new"] + 1
+    assert http_client._connection_counts["reused"] == before["reused"] + 1
+
+@pytest.mark.asyncio
+async def test_get_flight_coalesces_concurrent_lookups(test_settings, sample_flight_data):
+    """Test concurrent lookups of one ICAO make a single upstream call."""
+    service = FlightService(test_settings)
+
+    async def slow_fetch(flight_icao):
+        await asyncio.sleep(0.01)
+        return sample_flight_data
+
+    with patch.object(service, 'fetch_flight_data', side_effect=slow_fetch) as mock_fetch:
+        results = await asyncio.gather(
+            *(service.get_flight(icao) for icao in ["AA1234", "aa1234"] * 10)
+        )
+
+    assert mock_fetch.call_count == 1
+    assert all(r.flight.flight_number == "AA123" for r in results)
+    assert all(r.cache_tier is None for r in results)
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_get_flight_waits_for_peer_worker(test_settings, mock_cache):
+    """Test a worker that loses the Redis lock waits for the holder's result."""
+    cached = _cached_flight(age=0, fresh_for=15)
+    mock_cache.get_flight.side_effect = [None, None, cached]
+    mock_cache.acquire_lock.return_value = None
+    mock_cache.redis_available = True
+    mock_cache.lock_held.return_value = True
+    test_settings.SINGLEFLIGHT_POLL_INTERVAL = 0
+    service = FlightService(test_settings, cache=mock_cache)
+
+    with patch.object(service, 'fetch_flight_data') as mock_fetch:
+        result = await service.get_flight("AA1234")
+
+    assert result.flight == cached.flight
+    mock_fetch.assert_not_called()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_get_flight_waiting_on_peer_sees_its_cached_miss(test_settings, mock_cache):
+    """Test a worker waiting on a peer's lookup stops as soon as the peer caches a not-found."""
+    mock_cache.get_flight.return_value = None
+    mock_cache.is_flight_missing.side_effect = [False, False, True]
+    mock_cache.acquire_lock.return_value = None
+    mock_cache.redis_available = True
+    mock_cache.lock_held.return_value = True
+    test_settings.SINGLEFLIGHT_POLL_INTERVAL = 0
+    service = FlightService(test_settings, cache=mock_cache)
+
+    with patch.object(service, 'fetch_flight_data') as mock_fetch:
+        assert await service.get_flight("AA1234") is None
+
+    mock_fetch.assert_not_called()
+    assert mock_cache.lock_held.await_count == 1
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_wait_for_peer_stops_at_caller_deadline(test_settings, mock_cache):
+    """Test a lock wait longer than the caller's deadline fails with a timeout at the deadline."""
+    mock_cache.get_flight.return_value = None
+    mock_cache.acquire_lock.return_value = None
+    mock_cache.redis_available = True
+    mock_cache.lock_held.return_value = True
+    test_settings.SINGLEFLIGHT_LOCK_WAIT = 5
+    service = FlightService(test_settings, cache=mock_cache)
+
+    started = time.monotonic()
+    with patch.object(service, 'fetch_flight_data') as mock_fetch:
+        with deadline_scope(0.1), pytest.raises(HTTPException) as exc_info:
+            await service.get_flight("AA1234")
+
+    assert exc_info.value.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+    assert time.monotonic() - started < 1
+    mock_fetch.assert_not_called()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_get_flights_reports_upstream_errors_per_item(test_settings, sample_flight_data):
+    """Test an upstream 429 fails only its own batch item."""
+    test_settings.BATCH_MAX_CONCURRENCY = 1
+    service = FlightService(test_settings)
+
+    async def fetch(flight_icao):
+        if flight_icao == "BA0001":
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
+        return sample_flight_data
+
+    with patch.object(service, 'fetch_flight_data', side_effect=fetch):
+        results = await service.get_flights(["AA1234", "BA0001"])
+
+    assert [r.status_code for r in results] == [200, 429]
+    assert results[1].error.code == "RATE_LIMITED"
+    await service.aclose()
+
+def _cached_flight(age: float, fresh_for: float) -> CachedFlight:
+    now = time.time()
+    flight = FlightDataResponseSchema(flight_number="AA123", flight_status="ACTIVE")
+    return CachedFlight(flight, "L2", now - age, now - age + fresh_for)
+
+@pytest.mark.asyncio
+async def test_get_flight_serves_stale_while_revalidating(test_settings, mock_cache, sample_flight_data):
+    """Test a recently expired entry is served at once and refreshed in the background."""
+    mock_cache.get_flight.return_value = _cached_flight(age=20, fresh_for=15)
+    service = FlightService(test_settings, cache=mock_cache)
+
+    with patch.object(service, 'fetch_flight_data', return_value=sample_flight_data) as mock_fetch:
+        result = await service.get_flight("AA1234")
+        assert result.stale_reason == "revalidating"
+        assert result.cache_tier == "L2"
+        await asyncio.gather(*service._refreshing.values())
+
+    mock_fetch.assert_called_once_with("AA1234")
+    mock_cache.set_flight.assert_called_once()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_get_flight_serves_stale_on_upstream_error(test_settings, mock_cache):
+    """Test the last good entry is served when the upstream is unavailable."""
+    mock_cache.get_flight.return_value = _cached_flight(age=600, fresh_for=15)
+    service = FlightService(test_settings, cache=mock_cache)
+    unavailable = HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="External service unavailable")
+
+    with patch.object(service, 'fetch_flight_data', side_effect=unavailable):
+        result = await service.get_flight("AA1234")
+
+    assert result.stale_reason == "upstream_error"
+    assert result.staleness >= 585
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_get_flight_refreshes_old_entry_synchronously(test_settings, mock_cache, sample_flight_data):
+    """Test entries past the revalidation window are refetched before responding."""
+    mock_cache.get_flight.return_value = _cached_flight(age=600, fresh_for=15)
+    service = FlightService(test_settings, cache=mock_cache)
+
+    with patch.object(service, 'fetch_flight_data', return_value=sample_flight_data):
+        result = await service.get_flight("AA1234")
+
+    assert result.cache_tier is None
+    assert result.stale_reason is None
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_fetch_flight_data_fails_fast_when_circuit_open(test_settings):
+    """Test an open circuit rejects calls without reaching the upstream."""
+    service = FlightService(test_settings)
+    service.breaker.state = "open"
+    service.breaker.opened_at = time.monotonic()
+
+    with patch('httpx.AsyncClient.get') as mock_get:
+        with pytest.raises(HTTPException) as exc_info:
+            await service.fetch_flight_data("AA1234")
+
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    mock_get.assert_not_called()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_short_client_deadlines_leave_circuit_closed(test_settings):
+    """Test calls cut short by the caller's own deadline are not counted as upstream failures."""
+    test_settings.CIRCUIT_MIN_CALLS = 3
+    test_settings.RETRY_MAX_ATTEMPTS = 1
+    service = FlightService(test_settings)
+
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    with patch('httpx.AsyncClient.get', side_effect=slow_get):
+        for _ in range(test_settings.CIRCUIT_MIN_CALLS * 2):
+            with deadline_scope(0.01), pytest.raises(HTTPException) as exc_info:
+                await service.fetch_flight_data("AA1234")
+            assert exc_info.value.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+
+    assert service.breaker.state == "closed"
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_fetch_flight_data_retries_transient_errors(test_settings, sample_flight_data):
+    """Test timeouts are retried with short backoff and then succeed."""
+    test_settings.RETRY_BASE_BACKOFF = 0
+    service = FlightService(test_settings)
+    response = MagicMock()
+    response.json.return_value = {"data": [sample_flight_data]}
+
+    with patch('httpx.AsyncClient.get', side_effect=[httpx.ConnectTimeout("slow"), response]) as mock_get:
+        result = await service.fetch_flight_data("AA1234")
+
+    assert result == sample_flight_data
+    assert mock_get.call_count == 2
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_fetch_flight_data_does_not_retry_past_deadline(test_settings):
+    """Test no retry is attempted when it cannot fit in the caller's deadline."""
+    test_settings.RETRY_MIN_ATTEMPT_TIME = 1
+    service = FlightService(test_settings)
+
+    with patch('httpx.AsyncClient.get', side_effect=httpx.ConnectTimeout("slow")) as mock_get:
+        with deadline_scope(0.5), pytest.raises(HTTPException) as exc_info:
+            await service.fetch_flight_data("AA1234")
+
+    assert exc_info.value.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+    assert mock_get.call_count == 1
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_fetch_flight_data_respects_retry_budget(test_settings):
+    """Test retries stop once the retry budget is spent."""
+    test_settings.RETRY_BASE_BACKOFF = 0
+    test_settings.RETRY_BUDGET_RATIO = 0
+    test_settings.RETRY_BUDGET_MIN_PER_SECOND = 0
+    service = FlightService(test_settings)
+
+    with patch('httpx.AsyncClient.get', side_effect=httpx.ConnectError("down")) as mock_get:
+        with pytest.raises(HTTPException) as exc_info:
+            await service.fetch_flight_data("AA1234")
+
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert mock_get.call_count == 1
+    await service.aclose()
+
+def _reported_flight(age: float, reported_ago: float) -> CachedFlight:
+    now = time.time()
+    live = LiveDataSchema(
+        updated_time=datetime.fromtimestamp(now - reported_ago, timezone.utc).isoformat(),
+        latitude=51.0,
+        longitude=-1.0,
+        direction=270.0,
+        speed_horizontal=800.0,
+    )
+    flight = FlightDataResponseSchema(flight_number="BA117", flight_status="ACTIVE", live=live)
+    return CachedFlight(flight, "L1", now - age, now - age + 15)
+
+@pytest.mark.asyncio
+async def test_get_flight_estimate_extends_stale_entry(test_settings, mock_cache, sample_flight_data):
+    """Test a stale active flight is dead-reckoned without a refresh while within its error bound."""
+    mock_cache.get_flight.return_value = _reported_flight(age=40, reported_ago=45)
+    service = FlightService(test_settings, cache=mock_cache)
+
+    with patch.object(service, 'fetch_flight_data', return_value=sample_flight_data) as mock_fetch:
+        result = await service.get_flight("BA117", estimate=True)
+
+    mock_fetch.assert_not_called()
+    assert result.stale_reason is None and result.body is None
+    assert result.flight.live.estimated and result.flight.live.error_km <= test_settings.DEAD_RECKONING_MAX_ERROR_KM
+    assert result.flight.live.longitude < -1.0
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_get_flight_estimate_refreshes_past_error_bound(test_settings, mock_cache, sample_flight_data):
+    """Test an estimate past DEAD_RECKONING_MAX_ERROR_KM falls back to the usual stale handling."""
+    mock_cache.get_flight.return_value = _reported_flight(age=40, reported_ago=900)
+    service = FlightService(test_settings, cache=mock_cache)
+
+    with patch.object(service, 'fetch_flight_data', return_value=sample_flight_data):
+        result = await service.get_flight("BA117", estimate=True)
+        await asyncio.gather(*service._refreshing.values())
+
+    assert result.stale_reason == "revalidating"
+    assert not result.flight.live.estimated
+    await service.aclose()
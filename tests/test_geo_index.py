@@ -0,0 +1,58 @@
+import random
+import time
+from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
+from app.services.geo_index import FlightGeoIndex, haversine_km
+
+
+def _flight(latitude, longitude):
+    return FlightDataResponseSchema(live=LiveDataSchema(latitude=latitude, longitude=longitude))
+
+def _random_index(count, seed=3):
+    rng = random.Random(seed)
+    index = FlightGeoIndex(cell_degrees=2.0, max_entries=count)
+    positions = {}
+    for n in range(count):
+        positions[f"AAL{n:04d}"] = (rng.uniform(-90, 90), rng.uniform(-180, 180))
+        index.upsert(f"AAL{n:04d}", _flight(*positions[f"AAL{n:04d}"]), expires_at=1e12)
+    return index, positions
+
+def test_bbox_matches_brute_force():
+    """Test bounding-box queries, including ones across the antimeridian, find exactly the flights inside."""
+    index, positions = _random_index(3000)
+    for box in [(40.0, -10.0, 60.0, 30.0), (-20.0, 170.0, 20.0, -170.0), (-90.0, -180.0, 90.0, 180.0)]:
+        min_lat, min_lon, max_lat, max_lon = box
+        expected = sorted(
+            icao for icao, (lat, lon) in positions.items()
+            if min_lat <= lat <= max_lat
+            and (lon >= min_lon or lon <= max_lon if min_lon > max_lon else min_lon <= lon <= max_lon)
+        )
+        page, total = index.within_bbox(*box, limit=10000)
+        assert [e.flight_icao for e in page] == expected and total == len(expected)
+
+def test_nearby_matches_brute_force():
+    """Test radius queries near the antimeridian and a pole return every flight in range, nearest first."""
+    index, positions = _random_index(3000)
+    for lat, lon, radius in [(51.47, -0.45, 1500.0), (10.0, 179.5, 800.0), (88.0, 0.0, 600.0)]:
+        expected = sorted(
+            (round(haversine_km(lat, lon, *position), 6), icao) for icao, position in positions.items()
+            if haversine_km(lat, lon, *position) <= radius
+        )
+        page, total = index.nearby(lat, lon, radius, limit=5)
+        assert total == len(expected)
+        assert [e.flight_icao for e, _ in page] == [icao for _, icao in expected[:5]]
+
+def test_refresh_moves_and_expiry_evicts():
+    """Test refreshed positions move between cells and positionless or expired flights drop out."""
+    now = time.time()
+    index = FlightGeoIndex(cell_degrees=1.0, max_entries=10)
+    index.upsert("AAL1", _flight(51.5, -0.5), expires_at=now + 100)
+    index.upsert("AAL1", _flight(40.6, -73.8), expires_at=now + 200)
+    index.upsert("AAL2", _flight(40.7, -73.9), expires_at=now + 50)
+    index.upsert("AAL3", _flight(None, None), expires_at=now + 50)
+
+    assert index.within_bbox(50, -1, 52, 0, limit=10) == ([], 0)
+    assert index.nearby(40.64, -73.78, 50, limit=10)[1] == 2
+    assert index.purge_expired(now=now + 60) == 1
+    assert [e.flight_icao for e, _ in index.nearby(40.64, -73.78, 50, limit=10)[0]] == ["AAL1"]
+    index.upsert("AAL1", _flight(None, None), expires_at=now + 300)
+    assert len(index) == 0
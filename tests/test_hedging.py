@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.core.hedging import Hedger, LatencyTracker
+
+
+@pytest.fixture
+def hedge_settings(test_settings):
+    test_settings.HEDGE_ENABLED = True
+    test_settings.HEDGE_MIN_SAMPLES = 10
+    test_settings.HEDGE_MIN_DELAY = 0.01
+    test_settings.HEDGE_MAX_RATIO = 1.0
+    return test_settings
+
+def _warm(hedger, latency=0.01, samples=10):
+    for _ in range(samples):
+        hedger.latency.record(latency)
+
+def test_latency_tracker_quantiles():
+    """Test quantiles come from the recent sample window."""
+    tracker = LatencyTracker(window=100, refresh_every=1)
+    for i in range(1, 101):
+        tracker.record(i / 100)
+
+    assert tracker.quantile(0.5) == pytest.approx(0.51)
+    assert tracker.quantile(0.99) == pytest.approx(1.0)
+
+def test_no_hedge_until_enough_samples(hedge_settings):
+    """Test hedging waits for a latency baseline."""
+    hedger = Hedger(hedge_settings)
+    assert hedger.hedge_delay() is None
+    _warm(hedger)
+    assert hedger.hedge_delay() == pytest.approx(0.01)
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled(hedge_settings):
+    """Test a slow first request is raced by a hedge and the loser cancelled."""
+    hedger = Hedger(hedge_settings)
+    _warm(hedger)
+    calls = []
+    cancelled = asyncio.Event()
+
+    async def request():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return "hedge"
+
+    assert await hedger.run(request) == "hedge"
+    assert len(calls) == 2
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+@pytest.mark.asyncio
+async def test_hedges_capped_by_budget(hedge_settings):
+    """Test no hedge is sent once the hedge budget is spent."""
+    hedge_settings.HEDGE_MAX_RATIO = 0
+    hedger = Hedger(hedge_settings)
+    _warm(hedger)
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.03)
+        return "primary"
+
+    assert await hedger.run(request) == "primary"
+    assert calls == 1
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary(hedge_settings):
+    """Test a failing hedge does not hide a successful primary."""
+    hedger = Hedger(hedge_settings)
+    _warm(hedger)
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise ValueError("hedge failed")
+        await asyncio.sleep(0.03)
+        return "primary"
+
+    assert await hedger.run(request) == "primary"
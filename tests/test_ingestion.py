@@ -0,0 +1,112 @@
+import json
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from app.schemas.flight import FlightDataResponseSchema
+from app.services.flight_index import FlightIndex
+from app.services.flight_service import FlightService
+from app.services.ingestion_service import SnapshotIngestor
+
+
+def _record(sample_flight_data, icao):
+    return {**sample_flight_data, "flight": {"number": icao[3:], "icao": icao}}
+
+@pytest.fixture
+def ingest_settings(test_settings):
+    test_settings.INGEST_AIRLINES = ["aal"]
+    test_settings.INGEST_PAGE_SIZE = 2
+    return test_settings
+
+@pytest.mark.asyncio
+async def test_poll_pages_through_slice_into_index(ingest_settings, sample_flight_data):
+    """Test a poll follows upstream pagination and indexes every flight by ICAO."""
+    index = FlightIndex(100)
+    service = FlightService(ingest_settings, index=index)
+    ingestor = SnapshotIngestor(ingest_settings, service, index)
+    pages = [
+        ([_record(sample_flight_data, "AAL100"), _record(sample_flight_data, "AAL200")], 3),
+        ([_record(sample_flight_data, "AAL300")], 3),
+    ]
+
+    with patch.object(service, 'fetch_flights_page', side_effect=pages) as mock_page:
+        indexed = await ingestor.poll(ingestor.slices[0])
+
+    assert indexed == 3
+    assert mock_page.call_args_list[1].args == ({"airline_icao": "AAL"},)
+    assert mock_page.call_args_list[1].kwargs == {"offset": 2, "limit": 2}
+    assert "AAL300" in index
+
+    with patch.object(service, 'fetch_flight_data') as mock_fetch:
+        lookup = await service.get_flight("aal200")
+    mock_fetch.assert_not_called()
+    assert lookup.cache_tier == "index"
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_poll_uses_snapshot_published_by_peer(ingest_settings, mock_cache):
+    """Test a worker that loses the slice lock indexes the shared snapshot instead of polling."""
+    mock_cache.acquire_lock.return_value = None
+    mock_cache.redis_available = True
+    flight = FlightDataResponseSchema(flight_number="100", flight_status="ACTIVE")
+    mock_cache.get_shared.return_value = json.dumps({
+        "polled_at": time.time(),
+        "flights": {"AAL100": flight.model_dump()},
+    })
+    index = FlightIndex(100)
+    service = FlightService(ingest_settings, cache=mock_cache, index=index)
+    ingestor = SnapshotIngestor(ingest_settings, service, index, mock_cache)
+
+    with patch.object(service, 'fetch_flights_page') as mock_page:
+        assert await ingestor.poll(ingestor.slices[0]) == 1
+        assert await ingestor.poll(ingestor.slices[0]) == 0
+
+    mock_page.assert_not_called()
+    assert index.get("AAL100").flight == flight
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_poll_caps_index_freshness_at_status_ttl(ingest_settings, sample_flight_data):
+    """Test indexed flights stay fresh no longer than the cache TTL for their status."""
+    index = FlightIndex(100)
+    service = FlightService(ingest_settings, index=index)
+    ingestor = SnapshotIngestor(ingest_settings, service, index)
+    landed = {**_record(sample_flight_data, "AAL200"), "flight_status": "landed"}
+    pages = [([_record(sample_flight_data, "AAL100"), landed], 2)]
+
+    with patch.object(service, 'fetch_flights_page', side_effect=pages):
+        await ingestor.poll(ingestor.slices[0])
+
+    active, final = index.get("AAL100"), index.get("AAL200")
+    assert active.fresh_until - active.indexed_at == ingest_settings.CACHE_TTL_ACTIVE
+    assert final.fresh_until - final.indexed_at == ingest_settings.INGEST_INDEX_TTL
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_fetch_flights_page_sends_query_and_pagination(test_settings, sample_flight_data):
+    """Test a slice page request carries the filter, limit and offset."""
+    with patch('httpx.AsyncClient.get') as mock_get:
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"data": [sample_flight_data], "pagination": {"total": 41}}
+        mock_get.return_value = mock_response
+
+        service = FlightService(test_settings)
+        records, total = await service.fetch_flights_page({"dep_icao": "KJFK"}, offset=40, limit=100)
+
+    assert records == [sample_flight_data]
+    assert total == 41
+    assert mock_get.call_args.kwargs["params"]["dep_icao"] == "KJFK"
+    assert mock_get.call_args.kwargs["params"]["offset"] == 40
+    await service.aclose()
+
+def test_index_drops_expired_and_oldest_entries():
+    """Test the index forgets expired flights and evicts past its size bound."""
+    index = FlightIndex(2)
+    flight = FlightDataResponseSchema()
+    index.upsert("OLD100", flight, ttl=-1)
+    index.upsert("AAL100", flight, ttl=60)
+    index.upsert("AAL200", flight, ttl=60)
+    index.upsert("AAL300", flight, ttl=60)
+
+    assert index.get("OLD100") is None
+    assert "AAL100" not in index
+    assert len(index) == 2
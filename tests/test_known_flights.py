@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import patch
+from app.core.bloom import BloomFilter
+from app.core.config import Settings
+from app.services.flight_service import FlightService
+from app.services.known_flights import KNOWN, PLAUSIBLE, UNKNOWN, KnownFlights
+
+
+def _settings(tmp_path, **overrides):
+    return Settings(
+        AVIATION_STACK_API_KEY="test",
+        KNOWN_FLIGHTS_CAPACITY=1000,
+        KNOWN_FLIGHTS_MIN_ENTRIES=4,
+        KNOWN_FLIGHTS_PATH=str(tmp_path / "known.bloom"),
+        **overrides
+    )
+
+def test_bloom_filter_false_positive_rate():
+    """Test added items are always found and unseen ones rarely, near the configured rate."""
+    bloom = BloomFilter(10000, 0.01)
+    for n in range(10000):
+        bloom.add(f"AAL{n}")
+
+    assert all(f"AAL{n}" in bloom for n in range(10000))
+    false_positives = sum(f"BAW{n}" in bloom for n in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert BloomFilter.from_bytes(bloom.to_bytes())._bits == bloom._bits
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(b"junk")
+
+def test_classify_and_persist(tmp_path):
+    """Test identifiers are judged only once the filter is warm, and survive a restart."""
+    known = KnownFlights(_settings(tmp_path, KNOWN_AIRLINE_PREFIXES=["DLH"]))
+    assert known.classify("XQZ999") == PLAUSIBLE
+    for icao in ("BAW117", "BAW118", "AAL100"):
+        known.record(icao)
+
+    assert known.classify("BAW117") == KNOWN
+    assert known.classify("BAW999") == PLAUSIBLE
+    assert known.classify("DLH400") == PLAUSIBLE
+    assert known.classify("XQZ999") == UNKNOWN
+
+    known.save()
+    assert KnownFlights(_settings(tmp_path)).classify("BAW117") == KNOWN
+    assert KnownFlights(_settings(tmp_path, KNOWN_FLIGHTS_ERROR_RATE=0.001)).classify("BAW117") == PLAUSIBLE
+
+@pytest.mark.asyncio
+async def test_unknown_identifiers_are_rejected_without_upstream(tmp_path, mock_cache):
+    """Test reject mode answers unknown identifiers as not found without an upstream call."""
+    settings = _settings(tmp_path, KNOWN_FLIGHTS_MODE="reject")
+    known = KnownFlights(settings)
+    for icao in ("BAW117", "BAW118", "AAL100"):
+        known.record(icao)
+    mock_cache.get_flight.return_value = None
+    service = FlightService(settings, cache=mock_cache, known=known)
+
+    with patch.object(service, 'fetch_flight_data', return_value=None) as mock_fetch:
+        assert await service.get_flight("XQZ999") is None
+        mock_fetch.assert_not_called()
+        assert await service.get_flight("BAW999") is None
+        mock_fetch.assert_called_once_with("BAW999")
+
+    mock_cache.set_flight_missing.assert_awaited_once_with("BAW999")
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_not_found_is_negatively_cached(test_settings, mock_cache):
+    """Test a recent upstream miss is answered from the negative cache."""
+    mock_cache.get_flight.return_value = None
+    mock_cache.is_flight_missing.return_value = True
+    service = FlightService(test_settings, cache=mock_cache)
+
+    with patch.object(service, 'fetch_flight_data') as mock_fetch:
+        assert await service.get_flight("AA1234") is None
+
+    mock_fetch.assert_not_called()
+    await service.aclose()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.api.routes.flight import _sse_events
+from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
+from app.services.flight_service import FlightLookup, FlightService
+from app.services.live_stream import LiveStreamHub, LiveSubscription
+
+
+def _lookup(latitude: float) -> FlightLookup:
+    return FlightLookup(FlightDataResponseSchema(live=LiveDataSchema(latitude=latitude, longitude=1.0)))
+
+@pytest.fixture
+def stream_settings(test_settings):
+    test_settings.STREAM_POLL_INTERVAL = 0.01
+    test_settings.STREAM_HEARTBEAT_INTERVAL = 0.01
+    return test_settings
+
+@pytest.mark.asyncio
+async def test_one_poll_fans_out_to_every_subscriber(stream_settings):
+    """Test each changed position is polled once and delivered to all subscribers."""
+    service = FlightService(stream_settings)
+    service.get_flight = AsyncMock(side_effect=[_lookup(10.0), _lookup(10.0), _lookup(11.0)] + [_lookup(11.0)] * 100)
+    hub = LiveStreamHub(stream_settings, service)
+
+    async with hub.subscribe("aal100") as first, hub.subscribe("AAL100") as second:
+        assert hub.subscriber_count == 2
+        updates = [json.loads(await first.next(1.0)) for _ in range(2)]
+        assert [u["live"]["latitude"] for u in updates] == [10.0, 11.0]
+        assert second.queue.qsize() == 2
+        await asyncio.sleep(0.05)
+        assert first.queue.empty()
+
+    assert hub.subscriber_count == 0
+    await hub.close()
+    await service.aclose()
+
+def test_slow_subscriber_keeps_latest_updates():
+    """Test a full subscriber queue drops its oldest update instead of blocking."""
+    subscription = LiveSubscription("AAL100", queue_size=2)
+    for message in ("a", "b", "c"):
+        subscription.offer(message)
+
+    assert subscription.dropped == 1
+    assert [subscription.queue.get_nowait() for _ in range(2)] == ["b", "c"]
+
+@pytest.mark.asyncio
+async def test_poll_publishes_through_redis_channel(stream_settings, mock_cache):
+    """Test the lock holder publishes on the flight channel instead of fanning out locally."""
+    async def quiet(**kwargs):
+        await asyncio.sleep(0.01)
+
+    pubsub = AsyncMock()
+    pubsub.get_message.side_effect = quiet
+    mock_cache.pubsub = MagicMock(return_value=pubsub)
+    mock_cache.redis_available = True
+    mock_cache.acquire_lock.return_value = "token"
+    mock_cache.publish.return_value = 1
+    service = FlightService(stream_settings, cache=mock_cache)
+    service.get_flight = AsyncMock(return_value=_lookup(10.0))
+    hub = LiveStreamHub(stream_settings, service, mock_cache)
+
+    async with hub.subscribe("AAL100") as subscription:
+        await asyncio.sleep(0.05)
+        pubsub.subscribe.assert_awaited_once_with("live:AAL100")
+        channel, message = mock_cache.publish.call_args.args
+        assert channel == "live:AAL100"
+        mock_cache.publish.assert_awaited_once()
+        assert subscription.queue.empty()
+
+        hub.dispatch("AAL100", message)
+        assert json.loads(await subscription.next(1.0))["live"]["latitude"] == 10.0
+
+    pubsub.unsubscribe.assert_awaited_once_with("live:AAL100")
+    await hub.close()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_subscriber_is_not_sent_its_first_position_again(stream_settings):
+    """Test the position sent when the stream opened is not repeated by the feed or the relay."""
+    service = FlightService(stream_settings)
+    service.get_flight = AsyncMock(side_effect=[_lookup(10.0)] * 3 + [_lookup(11.0)] * 100)
+    hub = LiveStreamHub(stream_settings, service)
+
+    async with hub.subscribe("AAL100", _lookup(10.0).flight.live) as subscription:
+        hub.dispatch("AAL100", hub.message("AAL100", _lookup(10.0).flight.live))
+        update = json.loads(await subscription.next(1.0))
+        assert update["live"]["latitude"] == 11.0
+
+    await hub.close()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_sse_stream_sends_first_update_then_heartbeats(stream_settings):
+    """Test the event stream opens with the current position and keeps the connection alive."""
+    service = FlightService(stream_settings)
+    service.get_flight = AsyncMock(return_value=None)
+    hub = LiveStreamHub(stream_settings, service)
+
+    events = _sse_events(hub, "AAL100", LiveDataSchema(latitude=10.0))
+    first = await events.__anext__()
+    assert first.startswith("event: live\ndata: ")
+    assert await events.__anext__() == ": heartbeat\n\n"
+    await events.aclose()
+
+    assert hub.subscriber_count == 0
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_stream_rejects_invalid_icao(async_client):
+    """Test the stream endpoint validates the identifier before streaming."""
+    response = await async_client.get("/api/v1/flights/INVALID!/stream")
+    assert response.status_code == 400
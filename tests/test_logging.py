@@ -0,0 +1,113 @@
+import io
+import logging
+import sys
+import orjson
+import pytest
+from app.core import logging as app_logging
+from app.core.config import Settings
+from app.core.logging import AsyncQueueHandler, JSONFormatter, RepeatFilter
+
+
+def make_record(level: int, message: str, *args, exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, args, exc_info)
+
+
+@pytest.fixture
+def fresh_pipeline():
+    """Stop the running pipeline for the test, then restore it however the test left things."""
+    was_running = app_logging._pipeline is not None
+    app_logging.shutdown_logging()
+    yield
+    app_logging.shutdown_logging()
+    if was_running:
+        app_logging.setup_logging(Settings(AVIATION_STACK_API_KEY="test"))
+
+
+def test_formatter_emits_json_with_props_and_suppressed():
+    record = make_record(logging.ERROR, "Lookup failed for %s", "AAL100")
+    record.props = {"flight_icao": "AAL100"}
+    record.suppressed = 3
+
+    data = orjson.loads(JSONFormatter().format(record))
+
+    assert data["level"] == "ERROR"
+    assert data["message"] == "Lookup failed for AAL100"
+    assert data["flight_icao"] == "AAL100"
+    assert data["suppressed"] == 3
+
+
+def test_repeat_filter_suppresses_after_burst_and_counts():
+    repeats = RepeatFilter(window=60.0, burst=2)
+
+    passed = [repeats.filter(make_record(logging.ERROR, "Upstream down")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert repeats.filter(make_record(logging.INFO, "Upstream down"))
+    assert repeats.filter(make_record(logging.ERROR, "Other failure"))
+
+    # Next window: the first record through reports what was dropped
+    repeats._seen[("test", logging.ERROR, "Upstream down")][0] -= 60.0
+    record = make_record(logging.ERROR, "Upstream down")
+    assert repeats.filter(record)
+    assert record.suppressed == 3
+
+
+def test_repeat_filter_groups_by_call_site_not_arguments():
+    """Test one message template logged for many flights shares a single burst."""
+    repeats = RepeatFilter(window=60.0, burst=2)
+
+    passed = [
+        repeats.filter(make_record(logging.WARNING, "Scheduled refresh of %s failed", f"AAL{n}"))
+        for n in range(100, 105)
+    ]
+
+    assert passed == [True, True, False, False, False]
+
+
+def test_queue_handler_enqueues_rendered_copy():
+    """Test the queued record is a copy with its message and traceback rendered up front."""
+    handler = AsyncQueueHandler(app_logging.queue.Queue())
+    args = ["AAL100"]
+    try:
+        raise RuntimeError("upstream reset")
+    except RuntimeError:
+        record = make_record(logging.ERROR, "Lookup of %s failed", args, exc_info=sys.exc_info())
+
+    queued = handler.prepare(record)
+    args[0] = "changed"
+
+    assert queued is not record and record.exc_info is not None
+    assert queued.getMessage() == "Lookup of ['AAL100'] failed"
+    assert queued.exc_info is None and "RuntimeError: upstream reset" in queued.exc_text
+    assert "upstream reset" in orjson.loads(JSONFormatter().format(queued))["exception"]
+
+
+def test_repeat_filter_flush_reports_pending_counts(caplog):
+    repeats = RepeatFilter(window=60.0, burst=1)
+    for _ in range(4):
+        repeats.filter(make_record(logging.WARNING, "Cache unavailable"))
+
+    target = logging.getLogger("test.repeats")
+    with caplog.at_level(logging.WARNING, logger="test.repeats"):
+        repeats.flush(target)
+
+    assert [(r.getMessage(), r.suppressed) for r in caplog.records] == [("Cache unavailable", 3)]
+    assert not repeats._seen
+
+
+def test_shutdown_drains_queue(fresh_pipeline, monkeypatch):
+    output = io.StringIO()
+    monkeypatch.setattr(app_logging.sys, "stdout", output)
+    app_logging.setup_logging(Settings(AVIATION_STACK_API_KEY="test", LOG_SAMPLE_BURST=2))
+
+    log = logging.getLogger("test.pipeline")
+    for n in range(50):
+        log.info("Message %d", n)
+    for _ in range(5):
+        log.error("Same failure")
+    app_logging.shutdown_logging()
+
+    lines = [orjson.loads(line) for line in output.getvalue().splitlines()]
+    assert [line["message"] for line in lines[:50]] == [f"Message {n}" for n in range(50)]
+    failures = [line for line in lines if line["message"] == "Same failure"]
+    assert len(failures) == 3
+    assert failures[-1]["suppressed"] == 3
@@ -0,0 +1,61 @@
+import time
+from app.schemas.flight import FlightDataResponseSchema
+from app.services.query_index import FlightQueryIndex, delay_bucket
+
+
+def _flight(departure="KJFK", arrival="KLAX", airline="American Airlines", status="ACTIVE", delay=None, at="10:00"):
+    return FlightDataResponseSchema(
+        departure_icao=departure,
+        arrival_icao=arrival,
+        airline=airline,
+        flight_status=status,
+        delay=delay,
+        departure_time=f"2025-01-04T{at}:00+00:00",
+    )
+
+def test_delay_buckets():
+    """Test delays map to the lower bound of their bucket."""
+    assert delay_bucket(None) is None
+    assert delay_bucket(-5) is None
+    assert [delay_bucket(d) for d in (0, 14, 15, 59, 60, 500)] == [0, 0, 15, 30, 60, 240]
+
+def test_query_intersects_filters_in_order():
+    """Test filters combine, are case-insensitive and results are ordered by departure time."""
+    index = FlightQueryIndex(max_entries=100)
+    index.upsert("aal1", _flight(delay=40, at="12:00"), expires_at=1e12)
+    index.upsert("AAL2", _flight(delay=5, at="09:00"), expires_at=1e12)
+    index.upsert("AAL3", _flight(delay=90, at="08:00", status="LANDED"), expires_at=1e12)
+    index.upsert("BAW1", _flight(departure="EGLL", airline="British Airways", delay=45), expires_at=1e12)
+
+    page, total = index.query(departure="kjfk")
+    assert [e.flight_icao for e in page] == ["AAL3", "AAL2", "AAL1"] and total == 3
+
+    page, total = index.query(departure="KJFK", flight_status="active", min_delay=30)
+    assert [e.flight_icao for e in page] == ["AAL1"]
+
+    page, total = index.query(airline="american airlines", offset=1, limit=1)
+    assert [e.flight_icao for e in page] == ["AAL2"] and total == 3
+    assert index.query(arrival="EGLL") == ([], 0)
+
+def test_refresh_reposts_and_expiry_unposts():
+    """Test a refreshed flight moves between postings and expired ones drop out."""
+    now = time.time()
+    index = FlightQueryIndex(max_entries=100)
+    index.upsert("AAL1", _flight(status="SCHEDULED"), expires_at=now + 100)
+    index.upsert("AAL1", _flight(status="ACTIVE"), expires_at=now + 200)
+    index.upsert("AAL2", _flight(), expires_at=now + 150)
+
+    assert index.query(flight_status="scheduled", departure="KJFK") == ([], 0)
+    assert index.purge_expired(now=now + 160) == 1
+    assert [e.flight_icao for e in index.query(departure="KJFK")[0]] == ["AAL1"]
+    assert index.purge_expired(now=now + 210) == 1
+    assert len(index) == 0
+
+def test_evicts_soonest_to_expire_past_capacity():
+    """Test the index keeps at most max_entries, dropping the soonest to expire."""
+    index = FlightQueryIndex(max_entries=2)
+    index.upsert("AAL1", _flight(), expires_at=3e12)
+    index.upsert("AAL2", _flight(), expires_at=1e12)
+    index.upsert("AAL3", _flight(), expires_at=2e12)
+
+    assert sorted(e.flight_icao for e in index.query(departure="KJFK")[0]) == ["AAL1", "AAL3"]
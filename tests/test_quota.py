@@ -0,0 +1,75 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+from app.core.quota import Priority, QuotaExhausted, QuotaGovernor, priority_scope
+from app.services.flight_service import FlightService
+
+
+@pytest.fixture
+def quota_settings(test_settings):
+    test_settings.QUOTA_RATE_PER_SECOND = 1.0
+    test_settings.QUOTA_BURST = 10
+    test_settings.QUOTA_RESERVE_REFRESH = 0.5
+    test_settings.QUOTA_MAX_WAIT_USER = 0.0
+    test_settings.QUOTA_MAX_WAIT_REFRESH = 0.0
+    return test_settings
+
+@pytest.mark.asyncio
+async def test_local_bucket_enforces_rate_without_redis(quota_settings):
+    """Test the full burst is granted in-process and the next call is refused."""
+    governor = QuotaGovernor(quota_settings)
+    for _ in range(10):
+        await governor.acquire()
+
+    with pytest.raises(QuotaExhausted):
+        await governor.acquire()
+
+@pytest.mark.asyncio
+async def test_background_priority_leaves_reserve_for_users(quota_settings):
+    """Test refreshes stop at their reserve while user calls can still drain the bucket."""
+    governor = QuotaGovernor(quota_settings)
+    with priority_scope(Priority.REFRESH):
+        granted = [await governor.try_acquire() for _ in range(10)]
+
+    assert granted.count(True) == 5
+    assert all([await governor.try_acquire(Priority.USER) for _ in range(5)])
+
+@pytest.mark.asyncio
+async def test_redis_script_gets_priority_floor(quota_settings, mock_cache):
+    """Test the shared bucket is used with the caller's reserve as the floor."""
+    quota_settings.QUOTA_MONTHLY_LIMIT = 1000
+    mock_cache.redis_available = True
+    mock_cache.run_script.return_value = [1, 0, 42]
+    governor = QuotaGovernor(quota_settings, mock_cache)
+
+    await governor.acquire(Priority.REFRESH)
+
+    kwargs = mock_cache.run_script.call_args.kwargs
+    assert kwargs["keys"][0] == "quota:bucket"
+    assert kwargs["keys"][1].startswith("quota:month:")
+    assert kwargs["args"][2] == 5
+    assert kwargs["args"][3] == 500
+
+@pytest.mark.asyncio
+async def test_monthly_exhaustion_refuses_without_waiting(quota_settings, mock_cache):
+    """Test an exhausted monthly quota fails at once even with time to wait."""
+    quota_settings.QUOTA_MAX_WAIT_USER = 5.0
+    mock_cache.redis_available = True
+    mock_cache.run_script.return_value = [0, -1, 1000]
+    governor = QuotaGovernor(quota_settings, mock_cache)
+
+    with pytest.raises(QuotaExhausted):
+        await governor.acquire()
+    mock_cache.run_script.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_exhausted_quota_maps_to_429(test_settings):
+    """Test the service reports quota exhaustion as rate limited."""
+    service = FlightService(test_settings)
+
+    with patch.object(service.quota, 'acquire', side_effect=QuotaExhausted("no quota")):
+        with pytest.raises(HTTPException) as exc_info:
+            await service.fetch_flight_data("AA1234")
+
+    assert exc_info.value.status_code == 429
+    await service.aclose()
@@ -0,0 +1,101 @@
+import pytest
+from starlette.requests import Request
+from pydantic import ValidationError
+from app.core.config import Settings
+from app.core.rate_limit import RateLimiter
+
+
+def _request(host="1.2.3.4", api_key=None):
+    headers = [(b"x-api-key", api_key.encode())] if api_key else []
+    return Request({"type": "http", "headers": headers, "client": (host, 1234)})
+
+@pytest.fixture
+def limit_settings(test_settings):
+    test_settings.RATE_LIMIT_REQUESTS = 10
+    test_settings.RATE_LIMIT_WINDOW = 60
+    test_settings.RATE_LIMIT_LOCAL_FRACTION = 0.2
+    return test_settings
+
+@pytest.mark.asyncio
+async def test_local_fallback_enforces_limit_without_redis(limit_settings):
+    """Test the full limit is enforced in-process when Redis is not available."""
+    limiter = RateLimiter(limit_settings)
+    decisions = [await limiter.check(_request()) for _ in range(11)]
+
+    assert all(d.allowed for d in decisions[:10])
+    assert not decisions[10].allowed
+    assert int(decisions[10].headers["Retry-After"]) >= 1
+    assert (await limiter.check(_request(host="5.6.7.8"))).allowed
+
+@pytest.mark.asyncio
+async def test_precheck_skips_redis_then_charges_pending(limit_settings, mock_cache):
+    """Test under-limit clients skip Redis and are charged on the next check."""
+    mock_cache.redis_available = True
+    mock_cache.run_script.return_value = [1, 7, 0, 18000]
+    limiter = RateLimiter(limit_settings, mock_cache)
+
+    first, second, third = [await limiter.check(_request()) for _ in range(3)]
+
+    assert first.allowed and second.allowed and third.allowed
+    mock_cache.run_script.assert_called_once()
+    assert mock_cache.run_script.call_args.kwargs["args"][2] == 2
+    assert mock_cache.run_script.call_args.kwargs["keys"] == ["ratelimit:ip:1.2.3.4"]
+    assert third.remaining == 7
+    assert third.headers["X-RateLimit-Reset"] == "18"
+
+@pytest.mark.asyncio
+async def test_redis_denial_sets_retry_after(limit_settings, mock_cache):
+    """Test a Redis denial carries the retry delay from the script."""
+    limit_settings.RATE_LIMIT_LOCAL_FRACTION = 0
+    mock_cache.redis_available = True
+    mock_cache.run_script.return_value = [0, 0, 2500, 60000]
+    limiter = RateLimiter(limit_settings, mock_cache)
+
+    decision = await limiter.check(_request())
+
+    assert not decision.allowed
+    assert decision.headers["Retry-After"] == "3"
+    assert decision.headers["X-RateLimit-Remaining"] == "0"
+
+@pytest.mark.asyncio
+async def test_known_api_keys_get_their_own_limit(limit_settings):
+    """Test listed API keys are limited per key with their configured limit."""
+    limit_settings.RATE_LIMIT_API_KEYS = {"partner-key": 1000}
+    limiter = RateLimiter(limit_settings)
+
+    identity, limit = limiter.identify(_request(api_key="partner-key"))
+    assert identity.startswith("key:") and "partner-key" not in identity
+    assert limit == 1000
+    assert limiter.identify(_request(api_key="made-up")) == ("ip:1.2.3.4", 10)
+
+@pytest.mark.asyncio
+async def test_redis_denial_skips_local_precheck_until_retry(limit_settings, mock_cache):
+    """Test a client denied by Redis is not admitted locally before its retry delay."""
+    mock_cache.redis_available = True
+    mock_cache.run_script.return_value = [0, 0, 60000, 60000]
+    limiter = RateLimiter(limit_settings, mock_cache)
+    limiter._state("ip:1.2.3.4", 10).pending = 2
+
+    decisions = [await limiter.check(_request()) for _ in range(3)]
+
+    assert not any(d.allowed for d in decisions)
+    assert mock_cache.run_script.call_count == 3
+
+@pytest.mark.asyncio
+async def test_local_precheck_stays_within_redis_remaining(limit_settings, mock_cache):
+    """Test local admits never exceed the capacity Redis last reported, even when it allowed the request."""
+    mock_cache.redis_available = True
+    mock_cache.run_script.side_effect = [[1, 0, 0, 60000], [1, 0, 0, 60000], [1, 1, 0, 60000], [1, 0, 0, 60000]]
+    limiter = RateLimiter(limit_settings, mock_cache)
+    limiter._state("ip:1.2.3.4", 10).remaining = 0
+
+    decisions = [await limiter.check(_request()) for _ in range(5)]
+
+    assert all(d.allowed for d in decisions)
+    assert mock_cache.run_script.call_count == 4
+    assert mock_cache.run_script.call_args.kwargs["args"][2] == 1
+
+def test_api_key_limits_must_be_positive():
+    """Test a zero API key limit is rejected when settings load."""
+    with pytest.raises(ValidationError):
+        Settings(AVIATION_STACK_API_KEY="test", RATE_LIMIT_API_KEYS={"partner-key": 0})
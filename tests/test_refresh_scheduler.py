@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import time
+import pytest
+from unittest.mock import AsyncMock
+from pydantic import ValidationError
+from app.core.config import Settings
+from app.schemas.flight import FlightDataResponseSchema
+from app.services.flight_service import FlightLookup, FlightService
+from app.services.refresh_scheduler import RefreshScheduler
+
+
+def _scheduled(departs_in: timedelta) -> FlightDataResponseSchema:
+    departure = datetime.now(timezone.utc) + departs_in
+    return FlightDataResponseSchema(flight_status="SCHEDULED", departure_time=departure.isoformat())
+
+@pytest.mark.asyncio
+async def test_interval_follows_status_departure_and_read_rate(test_settings):
+    """Test refresh intervals track how fast each flight's data changes."""
+    scheduler = RefreshScheduler(test_settings, FlightService(test_settings))
+    busy, rare = 1.0, 1 / 3600
+
+    assert scheduler.interval_for(FlightDataResponseSchema(flight_status="ACTIVE"), busy) == 12.0
+    assert scheduler.interval_for(FlightDataResponseSchema(flight_status="ACTIVE"), rare) == 60.0
+    assert scheduler.interval_for(_scheduled(timedelta(days=1)), busy) == 1800
+    assert scheduler.interval_for(_scheduled(timedelta(minutes=5)), busy) == pytest.approx(30.0, rel=0.01)
+    assert scheduler.interval_for(_scheduled(timedelta(minutes=1)), busy) == 10.0
+    assert scheduler.interval_for(_scheduled(timedelta(hours=2)), busy) == pytest.approx(720, rel=0.01)
+    assert scheduler.interval_for(FlightDataResponseSchema(flight_status="LANDED"), busy) is None
+
+def test_interval_settings_must_be_ordered():
+    """Test the active and default intervals must lie between the minimum and maximum."""
+    with pytest.raises(ValidationError):
+        Settings(AVIATION_STACK_API_KEY="test", SCHEDULER_INTERVAL_MIN=60, SCHEDULER_INTERVAL_DEFAULT=45)
+
+@pytest.mark.asyncio
+async def test_due_flights_are_refreshed_and_final_ones_dropped(test_settings):
+    """Test a tracked flight is refreshed when due and untracked once it lands."""
+    test_settings.SCHEDULER_INTERVAL_ACTIVE = 0.01
+    test_settings.SCHEDULER_MAX_STRETCH = 1
+    service = FlightService(test_settings)
+    service.load_flight = AsyncMock(return_value=FlightLookup(FlightDataResponseSchema(flight_status="LANDED")))
+    scheduler = RefreshScheduler(test_settings, service)
+
+    scheduler.track("aal100", FlightDataResponseSchema(flight_status="ACTIVE"))
+    scheduler.track("BAW200", FlightDataResponseSchema(flight_status="CANCELLED"))
+    assert "AAL100" in scheduler and "BAW200" not in scheduler
+
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    service.load_flight.assert_awaited_once_with("AAL100")
+    assert len(scheduler) == 0
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_idle_flights_stop_being_refreshed(test_settings):
+    """Test flights nobody has read recently are dropped instead of refreshed."""
+    test_settings.SCHEDULER_INTERVAL_ACTIVE = 0.01
+    test_settings.SCHEDULER_IDLE_TIMEOUT = 0
+    service = FlightService(test_settings)
+    service.load_flight = AsyncMock()
+    scheduler = RefreshScheduler(test_settings, service)
+
+    scheduler.track("AAL100", FlightDataResponseSchema(flight_status="ACTIVE"))
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    service.load_flight.assert_not_awaited()
+    assert "AAL100" not in scheduler
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_refresh_made_by_peer_is_reused(test_settings, mock_cache):
+    """Test a flight another worker just refreshed is rescheduled without an upstream call."""
+    test_settings.SCHEDULER_INTERVAL_ACTIVE = 0.01
+    service = FlightService(test_settings, cache=mock_cache)
+    service.load_flight = AsyncMock()
+    flight = FlightDataResponseSchema(flight_status="ACTIVE")
+    service.get_cached_flight = AsyncMock(return_value=FlightLookup(flight, "L2", 0.0, float("inf")))
+    scheduler = RefreshScheduler(test_settings, service)
+
+    scheduler.track("AAL100", flight)
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    service.get_cached_flight.assert_awaited()
+    service.load_flight.assert_not_awaited()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_refresh_backs_off_once_reads_stop(test_settings):
+    """Test a flight that was read heavily and then left alone is refreshed less often."""
+    service = FlightService(test_settings)
+    flight = FlightDataResponseSchema(flight_status="ACTIVE")
+    service.get_cached_flight = AsyncMock(return_value=None)
+    service.load_flight = AsyncMock(return_value=FlightLookup(flight))
+    scheduler = RefreshScheduler(test_settings, service)
+    for _ in range(100):
+        scheduler.track("AAL100", flight)
+    tracked = scheduler._tracked["AAL100"]
+
+    await scheduler._refresh("AAL100", tracked)
+    assert tracked.due_at - time.monotonic() == pytest.approx(12.0, abs=0.5)
+
+    tracked.last_seen -= 10 * test_settings.SCHEDULER_RATE_WINDOW
+    await scheduler._refresh("AAL100", tracked)
+    assert tracked.due_at - time.monotonic() == pytest.approx(60.0, abs=0.5)
+    await service.aclose()
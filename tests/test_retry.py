@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from app.core.retry import RetryBudget, backoff_delay, deadline_scope, detached_context, remaining_time
+
+
+def test_deadline_scope_tracks_remaining_time():
+    """Test the deadline is visible inside the scope and cleared after it."""
+    assert remaining_time() is None
+    with deadline_scope(2):
+        assert 1.9 < remaining_time() <= 2
+        with deadline_scope(10):
+            assert remaining_time() <= 2  # nested scopes never extend the deadline
+    assert remaining_time() is None
+
+@pytest.mark.asyncio
+async def test_deadline_flows_into_tasks_but_not_detached_ones():
+    """Test child tasks inherit the deadline unless started detached."""
+    async def probe():
+        return remaining_time()
+
+    with deadline_scope(2):
+        inherited = await asyncio.create_task(probe())
+        detached = await asyncio.create_task(probe(), context=detached_context())
+
+    assert inherited is not None
+    assert detached is None
+
+def test_backoff_delay_is_jittered_and_capped():
+    """Test backoff stays within the exponential envelope and the cap."""
+    delays = [backoff_delay(attempt, 0.1, 0.8) for attempt in range(1, 10) for _ in range(20)]
+
+    assert all(0 <= d <= 0.8 for d in delays)
+    assert all(backoff_delay(1, 0.1, 0.8) <= 0.1 for _ in range(20))
+
+def test_retry_budget_caps_retries_to_share_of_requests():
+    """Test the budget allows the floor plus a ratio of recent requests."""
+    budget = RetryBudget(ratio=0.1, min_per_second=0, window=10)
+    for _ in range(100):
+        budget.record_request()
+
+    spent = sum(budget.try_spend() for _ in range(50))
+    assert spent == 10
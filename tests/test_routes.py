@@ -1,6 +1,11 @@
+import copy
+import json
 import pytest
 from fastapi import status
+from httpx import ASGITransport, AsyncClient
 from unittest.mock import patch
+from app.core.rate_limit import RateLimitDecision
+from app.main import app
 
 @pytest.mark.asyncio
 async def test_get_flight_data_success(async_client, mock_cache, sample_flight_data):
@@ -48,3 +53,254 @@ async def test_get_flight_data_invalid_icao(async_client, mock_cache):
 #     assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
 #     data = response.json()
 #     assert "Rate limit exceeded" in data["detail"]
+
+@pytest.mark.asyncio
+async def test_get_flight_data_served_from_cache(async_client, sample_flight_data):
+    """Test repeat lookups are served from cache without an upstream call."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data') as mock_fetch:
+        mock_fetch.return_value = sample_flight_data
+
+        first = await async_client.get("/api/v1/flights/AA1234")
+        second = await async_client.get("/api/v1/flights/aa1234")
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["X-Cache-Tier"] == "L1"
+        assert second.json() == first.json()
+        mock_fetch.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_get_flight_data_unexpected_error_is_uncacheable_500(async_client):
+    """Test an unexpected failure is a generic 500 without caching headers or exception text."""
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with patch('app.services.flight_service.FlightService.get_flight', side_effect=RuntimeError("pool secret")):
+            response = await client.get("/api/v1/flights/AA1234")
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert response.json()["code"] == "INTERNAL_ERROR"
+    assert "pool secret" not in response.text
+    assert "ETag" not in response.headers and "Cache-Control" not in response.headers
+
+@pytest.mark.asyncio
+async def test_get_flight_data_conditional_get(async_client, sample_flight_data):
+    """Test a matching If-None-Match gets an empty 304 with the same ETag."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data') as mock_fetch:
+        mock_fetch.return_value = sample_flight_data
+
+        first = await async_client.get("/api/v1/flights/AA1234")
+        etag = first.headers["ETag"]
+        assert first.headers["Cache-Control"].startswith("public, max-age=")
+
+        cached = await async_client.get("/api/v1/flights/AA1234", headers={"If-None-Match": f'W/{etag}'})
+        changed = await async_client.get("/api/v1/flights/AA1234", headers={"If-None-Match": '"other"'})
+
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed.headers["ETag"] == etag
+
+@pytest.mark.asyncio
+async def test_get_flight_data_field_projection(async_client, sample_flight_data):
+    """Test `fields` limits the payload and gets its own ETag."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data') as mock_fetch:
+        mock_fetch.return_value = sample_flight_data
+
+        full = await async_client.get("/api/v1/flights/AA1234")
+        projected = await async_client.get("/api/v1/flights/AA1234", params={"fields": "gate,flight_status"})
+        invalid = await async_client.get("/api/v1/flights/AA1234", params={"fields": "gate,seat"})
+
+        assert projected.json() == {"flight_status": full.json()["flight_status"], "gate": "A1"}
+        assert projected.headers["ETag"] != full.headers["ETag"]
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_get_flight_batch(async_client, sample_flight_data):
+    """Test batch lookups dedupe, validate and report per-item status."""
+    async def fetch(flight_icao):
+        return sample_flight_data if flight_icao == "AA1234" else None
+
+    with patch('app.services.flight_service.FlightService.fetch_flight_data', side_effect=fetch) as mock_fetch:
+        response = await async_client.post(
+            "/api/v1/flights/batch",
+            json={"flight_icaos": ["AA1234", "aa1234", "BA0001", "bad!"]}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [r["flight_icao"] for r in results] == ["AA1234", "BA0001", "BAD!"]
+        assert results[0]["status_code"] == 200
+        assert results[0]["data"]["flight_number"] == "AA123"
+        assert results[1]["status_code"] == 404
+        assert results[2]["status_code"] == 400
+        assert results[2]["error"]["code"] == "INVALID_FORMAT"
+        assert mock_fetch.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_flight_batch_field_projection(async_client, sample_flight_data):
+    """Test batch `fields` limits each item's data."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data', return_value=sample_flight_data):
+        response = await async_client.post(
+            "/api/v1/flights/batch",
+            json={"flight_icaos": ["AA1234"], "fields": ["delay", "gate"]}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["results"][0]["data"] == {"delay": 15, "gate": "A1"}
+
+@pytest.mark.asyncio
+async def test_get_flight_batch_too_large(async_client):
+    """Test oversized batches are rejected."""
+    response = await async_client.post(
+        "/api/v1/flights/batch",
+        json={"flight_icaos": [f"AA{i:04d}" for i in range(51)]}
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_get_flight_data_rate_limited(async_client):
+    """Test requests over the limit get 429 with rate limit headers."""
+    denied = RateLimitDecision(False, 100, 0, 30, 12)
+    with patch('app.core.rate_limit.RateLimiter.check', return_value=denied):
+        response = await async_client.get("/api/v1/flights/AA1234")
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["Retry-After"] == "12"
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    assert "Rate limit exceeded" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_get_flight_data_reports_rate_limit_headers(async_client, sample_flight_data):
+    """Test allowed requests carry X-RateLimit-* headers."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data', return_value=sample_flight_data):
+        response = await async_client.get("/api/v1/flights/AA1234")
+
+    assert response.headers["X-RateLimit-Limit"] == "100"
+    assert "X-RateLimit-Remaining" in response.headers
+
+
+def _legs_upstream(sample_flight_data, total):
+    """Fake fetch_flights_page serving `total` numbered legs."""
+    calls = []
+
+    async def fetch(params, offset=0, limit=100):
+        calls.append((dict(params), offset, limit))
+        records = []
+        for n in range(offset, min(offset + limit, total)):
+            record = copy.deepcopy(sample_flight_data)
+            record["flight"]["number"] = str(n)
+            records.append(record)
+        return records, total
+
+    return fetch, calls
+
+@pytest.mark.asyncio
+async def test_get_flight_legs_cursor_pagination(async_client, sample_flight_data):
+    """Test legs are paged with a cursor bound to the query and date filter."""
+    fetch, calls = _legs_upstream(sample_flight_data, total=3)
+    with patch('app.services.flight_service.FlightService.fetch_flights_page', side_effect=fetch):
+        first = await async_client.get("/api/v1/flights/aa1234/legs", params={"limit": 2, "date": "2025-01-04"})
+        body = first.json()
+        assert [leg["flight_number"] for leg in body["legs"]] == ["0", "1"]
+        assert body["total"] == 3
+
+        second = await async_client.get(
+            "/api/v1/flights/AA1234/legs",
+            params={"limit": 2, "date": "2025-01-04", "cursor": body["next_cursor"]}
+        )
+        assert [leg["flight_number"] for leg in second.json()["legs"]] == ["2"]
+        assert second.json()["next_cursor"] is None
+        assert calls[-1] == ({"flight_icao": "AA1234", "flight_date": "2025-01-04"}, 2, 2)
+
+        mismatched = await async_client.get(
+            "/api/v1/flights/AA1234/legs", params={"cursor": body["next_cursor"]}
+        )
+        assert mismatched.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_get_flight_legs_ndjson_stream(async_client, sample_flight_data):
+    """Test NDJSON streaming emits one projected line per leg across upstream pages."""
+    fetch, calls = _legs_upstream(sample_flight_data, total=250)
+    with patch('app.services.flight_service.FlightService.fetch_flights_page', side_effect=fetch):
+        response = await async_client.get(
+            "/api/v1/flights/AA1234/legs",
+            params={"fields": "flight_number"},
+            headers={"Accept": "application/x-ndjson"}
+        )
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 250
+    assert lines[-1] == {"flight_number": "249"}
+    assert [offset for _, offset, _ in calls] == [0, 100, 200]
+
+@pytest.mark.asyncio
+async def test_airport_and_airline_listings(async_client, sample_flight_data):
+    """Test listings are served from flights already held, with paging and filters."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data') as mock_fetch:
+        for n, delay in enumerate([0, 30, 90]):
+            record = copy.deepcopy(sample_flight_data)
+            record["departure"].update(icao="KJFK", delay=delay)
+            record["arrival"]["icao"] = "KLAX"
+            mock_fetch.return_value = record
+            await async_client.get(f"/api/v1/flights/AAL10{n}")
+
+        mock_fetch.reset_mock()
+        departures = await async_client.get("/api/v1/airports/kjfk/departures", params={"limit": 2})
+        delayed = await async_client.get("/api/v1/airports/KLAX/arrivals", params={"min_delay": 30})
+        airline = await async_client.get(
+            "/api/v1/airlines/American Airlines/flights", params={"status": "landed"}
+        )
+        invalid = await async_client.get("/api/v1/airports/JFK!/departures")
+        mock_fetch.assert_not_called()
+
+    body = departures.json()
+    assert body["total"] == 3 and body["limit"] == 2
+    assert [item["flight_icao"] for item in body["results"]] == ["AAL100", "AAL101"]
+    assert {item["flight_icao"] for item in delayed.json()["results"]} == {"AAL101", "AAL102"}
+    assert airline.json()["total"] == 0
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_flights_nearby_and_bbox(async_client, sample_flight_data):
+    """Test nearby and bbox are served from held live positions without upstream calls."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data') as mock_fetch:
+        for n, (lat, lon) in enumerate([(40.7, -74.0), (40.9, -73.5), (51.5, -0.4)]):
+            record = copy.deepcopy(sample_flight_data)
+            record["live"].update(latitude=lat, longitude=lon)
+            mock_fetch.return_value = record
+            await async_client.get(f"/api/v1/flights/AAL20{n}")
+
+        mock_fetch.reset_mock()
+        nearby = await async_client.get("/api/v1/flights/nearby", params={"lat": 40.64, "lon": -73.78, "radius_km": 100})
+        bbox = await async_client.get(
+            "/api/v1/flights/bbox", params={"min_lat": 50, "min_lon": -2, "max_lat": 52, "max_lon": 1}
+        )
+        too_far = await async_client.get("/api/v1/flights/nearby", params={"lat": 0, "lon": 0, "radius_km": 1e6})
+        mock_fetch.assert_not_called()
+
+    assert [item["flight_icao"] for item in nearby.json()["results"]] == ["AAL200", "AAL201"]
+    assert nearby.json()["results"][0]["distance_km"] < nearby.json()["results"][1]["distance_km"]
+    assert bbox.json()["total"] == 1 and bbox.json()["results"][0]["flight_icao"] == "AAL202"
+    assert too_far.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_get_flight_track(async_client, sample_flight_data):
+    """Test each refreshed position is recorded and served as a track without upstream calls."""
+    with patch('app.services.flight_service.FlightService.fetch_flight_data') as mock_fetch:
+        for minute in range(3):
+            record = copy.deepcopy(sample_flight_data)
+            record["live"].update(updated=f"2025-01-04T11:0{minute}:00Z", latitude=40 + minute)
+            mock_fetch.return_value = record
+            await app.state.flight_service.load_flight("AAL300")
+
+        mock_fetch.reset_mock()
+        track = await async_client.get("/api/v1/flights/aal300/track", params={"max_points": 2})
+        missing = await async_client.get("/api/v1/flights/AAL999/track")
+        mock_fetch.assert_not_called()
+
+    assert track.json()["samples"] == 3
+    assert [p["latitude"] for p in track.json()["points"]] == [40, 42]
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
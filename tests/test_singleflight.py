@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test concurrent callers for the same key share a single call."""
+    singleflight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(singleflight.do("AA1234", work) for _ in range(50)))
+
+    assert results == ["result"] * 50
+    assert calls == 1
+    assert len(singleflight) == 0
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_caller():
+    """Test an upstream failure is raised in all waiting callers."""
+    singleflight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(
+        *(singleflight.do("AA1234", work) for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
+
+@pytest.mark.asyncio
+async def test_leader_cancellation_does_not_cancel_followers():
+    """Test followers still get the result when the first caller is cancelled."""
+    singleflight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "result"
+
+    leader = asyncio.create_task(singleflight.do("AA1234", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(singleflight.do("AA1234", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "result"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+@pytest.mark.asyncio
+async def test_work_cancelled_when_all_callers_leave():
+    """Test the shared call is cancelled once nobody is waiting for it."""
+    singleflight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(singleflight.do("AA1234", work))
+    await started.wait()
+    caller.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    await asyncio.sleep(0)
+    assert len(singleflight) == 0
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from app.schemas.flight import FlightDataResponseSchema, LiveDataSchema
+from app.services.trajectory import TrajectoryStore
+
+
+def _flight(minute, latitude=40.0, altitude=None):
+    return FlightDataResponseSchema(live=LiveDataSchema(
+        updated_time=f"2025-01-04T11:{minute:02d}:00+00:00",
+        latitude=latitude,
+        longitude=-74.0,
+        altitude=altitude,
+        speed_horizontal=812.34,
+    ))
+
+def test_ring_buffer_keeps_latest_samples_in_order():
+    """Test new positions append once, and a full track overwrites its oldest sample."""
+    store = TrajectoryStore(samples_per_flight=3, max_bytes=1 << 20)
+    for minute in range(5):
+        store.record("aal100", _flight(minute, latitude=40 + minute))
+    store.record("AAL100", _flight(4, latitude=99))  # same updated_time: not a new sample
+    store.record("AAL100", FlightDataResponseSchema())  # no position
+
+    samples, points = store.track("AAL100")
+    assert samples == 3
+    assert [p.latitude for p in points] == [42, 43, 44]
+    assert points[-1].updated_time == "2025-01-04T11:04:00+00:00"
+    assert points[0].altitude is None and points[0].speed_horizontal == 812.34
+    assert store.nbytes == 3 * 40
+
+def test_downsampling_and_since():
+    """Test downsampling keeps the first and latest points and `since` drops older ones."""
+    store = TrajectoryStore(samples_per_flight=100, max_bytes=1 << 20)
+    for minute in range(10):
+        store.record("AAL100", _flight(minute, latitude=minute))
+
+    assert [p.latitude for p in store.track("AAL100", max_points=4)[1]] == [0, 3, 6, 9]
+    assert [p.latitude for p in store.track("AAL100", since=datetime(2025, 1, 4, 11, 7, tzinfo=timezone.utc).timestamp())[1]] == [8, 9]
+
+def test_memory_cap_evicts_least_recently_used():
+    """Test the byte cap evicts whole tracks, least recently updated or read first."""
+    store = TrajectoryStore(samples_per_flight=10, max_bytes=4 * 40)
+    for icao in ("AAL100", "AAL200"):
+        store.record(icao, _flight(0))
+        store.record(icao, _flight(1))
+    store.track("AAL100")
+    store.record("AAL300", _flight(0))
+
+    assert store.track("AAL200") is None
+    assert store.track("AAL100")[0] == 2 and store.nbytes == 3 * 40
\ No newline at end of file
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.main import app
+from app.schemas.flight import FlightDataResponseSchema
+from app.schemas.webhook import WebhookSubscriptionRequestSchema
+from app.services.flight_service import FlightLookup, FlightService
+from app.services.webhook_dispatcher import UnsafeWebhookTarget, WebhookDispatcher, check_webhook_target
+from app.services.webhook_service import WebhookService, diff_flights
+
+
+def _flight(**fields) -> FlightDataResponseSchema:
+    return FlightDataResponseSchema(flight_status="scheduled", gate="A1", terminal="T1", **fields)
+
+@pytest.fixture
+def webhook_settings(test_settings):
+    test_settings.WEBHOOK_BATCH_WINDOW = 0.01
+    test_settings.WEBHOOK_BASE_BACKOFF = 0.001
+    test_settings.WEBHOOK_MAX_BACKOFF = 0.001
+    return test_settings
+
+def test_diff_flights_reports_only_watched_fields():
+    """Test the diff covers changed fields that are being watched."""
+    previous = _flight()
+    current = previous.model_copy(update={"gate": "B7", "flight_status": "active"})
+
+    changes = diff_flights(previous, current, ["gate", "terminal"])
+
+    assert [(c.field, c.previous, c.current) for c in changes] == [("gate", "A1", "B7")]
+
+@pytest.mark.asyncio
+async def test_check_flight_queues_changes_after_baseline(webhook_settings):
+    """Test the first lookup sets a baseline and later changes reach only interested subscribers."""
+    service = FlightService(webhook_settings)
+    service.get_flight = AsyncMock(side_effect=[
+        FlightLookup(_flight()),
+        FlightLookup(_flight(delay=20).model_copy(update={"gate": "B7"})),
+    ])
+    dispatcher = MagicMock(spec=WebhookDispatcher)
+    dispatcher.enqueue.return_value = True
+    webhooks = WebhookService(webhook_settings, service, dispatcher)
+    gate = await webhooks.subscribe(WebhookSubscriptionRequestSchema(
+        flight_icao="aal100", url="https://example.com/hook", fields=["gate"]
+    ), "ip:203.0.113.7")
+    await webhooks.subscribe(WebhookSubscriptionRequestSchema(
+        flight_icao="AAL100", url="https://example.com/other", fields=["terminal"]
+    ), "ip:203.0.113.7")
+    subscriptions = await webhooks.subscriptions("AAL100")
+
+    assert await webhooks.check_flight("AAL100", subscriptions) == 0
+    assert await webhooks.check_flight("AAL100", subscriptions) == 1
+
+    url, secret, event = dispatcher.enqueue.call_args.args
+    assert url == "https://example.com/hook"
+    assert event["subscription_id"] == gate.id
+    assert event["changes"] == [{"field": "gate", "previous": "A1", "current": "B7"}]
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_check_flight_skips_when_peer_holds_lock(webhook_settings, mock_cache):
+    """Test a worker that loses the round's lock leaves the check to its peer."""
+    mock_cache.acquire_lock.return_value = None
+    mock_cache.redis_available = True
+    service = FlightService(webhook_settings)
+    service.get_flight = AsyncMock()
+    webhooks = WebhookService(webhook_settings, service, MagicMock(spec=WebhookDispatcher), mock_cache)
+
+    assert await webhooks.check_flight("AAL100", []) == 0
+    service.get_flight.assert_not_called()
+    await service.aclose()
+
+@pytest.mark.asyncio
+async def test_dispatcher_batches_signs_and_retries(webhook_settings):
+    """Test queued events go out as one signed batch, retried after a server error."""
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.post.side_effect = [httpx.Response(503), httpx.Response(204)]
+    dispatcher = WebhookDispatcher(webhook_settings, client)
+
+    for n in range(3):
+        assert dispatcher.enqueue("https://93.184.216.34/hook", "s3cret", {"n": n})
+    for _ in range(100):
+        if client.post.call_count == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert client.post.call_count == 2
+    kwargs = client.post.call_args.kwargs
+    assert [e["n"] for e in json.loads(kwargs["content"])["events"]] == [0, 1, 2]
+    expected = hmac.new(b"s3cret", kwargs["content"], hashlib.sha256).hexdigest()
+    assert kwargs["headers"]["X-Webhook-Signature"] == f"sha256={expected}"
+    await dispatcher.aclose()
+
+@pytest.mark.asyncio
+async def test_webhook_subscription_routes(async_client):
+    """Test a subscription can be created, listed without its secret and deleted."""
+    created = await async_client.post(
+        "/api/v1/webhooks",
+        json={"flight_icao": "aal100", "url": "https://93.184.216.34/hook?token=abc", "secret": "s3cret"}
+    )
+    assert created.status_code == 201
+    subscription = created.json()
+    assert subscription["flight_icao"] == "AAL100"
+    assert "secret" not in subscription
+
+    listed = await async_client.get("/api/v1/webhooks", params={"flight_icao": "AAL100"})
+    assert [s["id"] for s in listed.json()] == [subscription["id"]]
+    assert listed.json()[0]["url"] == "https://93.184.216.34"
+
+    deleted = await async_client.delete(f"/api/v1/webhooks/{subscription['id']}")
+    assert deleted.status_code == 204
+    missing = await async_client.delete(f"/api/v1/webhooks/{subscription['id']}")
+    assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_webhooks_are_visible_only_to_their_owner(async_client):
+    """Test one caller can neither list nor delete another caller's subscriptions."""
+    created = await async_client.post(
+        "/api/v1/webhooks", json={"flight_icao": "AAL100", "url": "https://93.184.216.34/hook"}
+    )
+    subscription_id = created.json()["id"]
+
+    other_transport = httpx.ASGITransport(app=app, client=("203.0.113.7", 4321))
+    async with httpx.AsyncClient(transport=other_transport, base_url="http://test") as other:
+        assert (await other.get("/api/v1/webhooks")).json() == []
+        assert (await other.delete(f"/api/v1/webhooks/{subscription_id}")).status_code == 404
+
+    assert [s["id"] for s in (await async_client.get("/api/v1/webhooks")).json()] == [subscription_id]
+    assert (await async_client.delete(f"/api/v1/webhooks/{subscription_id}")).status_code == 204
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_unknown_fields(async_client):
+    """Test subscribing to a field the flight schema does not have is rejected."""
+    response = await async_client.post(
+        "/api/v1/webhooks",
+        json={"flight_icao": "AAL100", "url": "https://example.com/hook", "fields": ["seat"]}
+    )
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/hook",
+    "http://localhost:8000/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "https://10.0.0.5/hook",
+    "https://[::ffff:192.168.1.1]/hook",
+])
+async def test_webhook_rejects_internal_targets(async_client, url):
+    """Test webhooks cannot point the server at loopback, link-local or private addresses."""
+    response = await async_client.post("/api/v1/webhooks", json={"flight_icao": "AAL100", "url": url})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_webhook_allowlist_restricts_and_trusts_hosts(webhook_settings):
+    """Test an allowlist admits only its hosts, internal ones included."""
+    webhook_settings.WEBHOOK_ALLOWED_HOSTS = ["hooks.internal"]
+
+    await check_webhook_target("https://hooks.internal/flight", webhook_settings)
+    with pytest.raises(UnsafeWebhookTarget):
+        await check_webhook_target("https://93.184.216.34/hook", webhook_settings)
+
+@pytest.mark.asyncio
+async def test_dispatcher_does_not_deliver_to_internal_targets(webhook_settings):
+    """Test a delivery is dropped when its URL fails the address check at send time."""
+    client = AsyncMock(spec=httpx.AsyncClient)
+    dispatcher = WebhookDispatcher(webhook_settings, client)
+
+    assert dispatcher.enqueue("http://169.254.169.254/latest", None, {"n": 1})
+    await asyncio.sleep(0.05)
+
+    client.post.assert_not_called()
+    await dispatcher.aclose()
+
+@pytest.mark.asyncio
+async def test_dispatcher_forgets_idle_endpoints(webhook_settings):
+    """Test an endpoint's worker, queue and URL limit go away once it has been idle."""
+    webhook_settings.WEBHOOK_IDLE_TIMEOUT = 0.02
+    client = AsyncMock(spec=httpx.AsyncClient)
+    client.post.return_value = httpx.Response(204)
+    dispatcher = WebhookDispatcher(webhook_settings, client)
+
+    assert dispatcher.enqueue("https://93.184.216.34/hook", None, {"n": 1})
+    for _ in range(100):
+        if not dispatcher._workers:
+            break
+        await asyncio.sleep(0.01)
+
+    client.post.assert_awaited_once()
+    assert not dispatcher._queues and not dispatcher._workers and not dispatcher._limits
+
+    assert dispatcher.enqueue("https://93.184.216.34/hook", None, {"n": 2})
+    for _ in range(100):
+        if client.post.await_count == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert client.post.await_count == 2
+    await dispatcher.aclose()